@@ -14,22 +14,71 @@ Login, database, session management
 import sqlite3
 import hashlib
 from datetime import datetime
+import heapq
 import os
+import re
+import struct
+import threading
+import time
+from itertools import chain, islice
+from operator import itemgetter
+
+# SQLite's default compile-time limit on attached databases per connection
+MAX_ATTACHED = 10
+
+# Violations of the same type closer together than this (seconds) are
+# stored as one interval
+MERGE_GAP_SECONDS = 5
+
+
+def _epoch(iso_timestamp):
+    """ISO timestamp text -> integer epoch seconds, or None if missing or unparseable"""
+    try:
+        return int(datetime.fromisoformat(iso_timestamp).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _chunked(iterable, size):
+    """Yield lists of at most `size` items without materializing the input"""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 class AuthManager:
     """Handle authentication and database operations"""
     
-    def __init__(self):
-        self.db_path = 'data/users.db'
+    def __init__(self, db_path='data/users.db', shard_by='exam',
+                 busy_timeout=5.0, max_lock_retries=5):
+        # Users (and the session routing index) live in the central DB;
+        # sessions and violations go to per-exam or per-day shard files
+        # so concurrent candidates don't serialize on one writer lock.
+        # shard_by: 'exam', 'day' or None (everything in the central DB)
+        self.db_path = db_path
+        self.shard_by = shard_by
+        self.shard_dir = os.path.join(os.path.dirname(db_path) or '.', 'shards')
+        self._session_shards = {}   # session_id -> shard path (routing cache)
+        self._ready_shards = set()  # shard paths whose tables exist
+
+        # Lock handling: SQLite waits up to busy_timeout for the write lock,
+        # then writes are retried with backoff up to max_lock_retries times
+        self.busy_timeout = busy_timeout
+        self.max_lock_retries = max_lock_retries
+        self.lock_retries = 0
+        self._stats_lock = threading.Lock()
         self.init_database()
     
     def init_database(self):
         """Initialize database tables"""
-        os.makedirs('data', exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
         cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
         
         # Users table
         cursor.execute('''
@@ -43,6 +92,40 @@ class AuthManager:
             )
         ''')
         
+        # Sessions created before sharding stay readable in the central DB
+        self._create_session_tables(cursor)
+
+        # Session routing index: allocates globally unique session ids and
+        # records which shard holds each session (NULL = central DB)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS session_index (
+                session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                exam_code TEXT,
+                shard TEXT,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_index_user ON session_index(user_id)")
+        # Index legacy sessions once; checking first avoids taking the write
+        # lock on every startup
+        cursor.execute('''
+            SELECT 1 FROM exam_sessions
+            WHERE session_id NOT IN (SELECT session_id FROM session_index) LIMIT 1
+        ''')
+        if cursor.fetchone():
+            cursor.execute('''
+                INSERT OR IGNORE INTO session_index (session_id, user_id, exam_code, shard)
+                SELECT session_id, user_id, exam_code, NULL FROM exam_sessions
+            ''')
+        
+        conn.commit()
+        conn.close()
+        
+        print("✅ Database initialized")
+
+    def _create_session_tables(self, cursor):
+        """Create session/violation tables (central DB and every shard)"""
         # Exam sessions table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS exam_sessions (
@@ -68,7 +151,7 @@ class AuthManager:
             except Exception as e:
                 print(f"⚠️ Could not add score column: {e}")
         
-        # Violations table
+        # Violations table (legacy one-row-per-event; compacted on startup)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS violations (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -80,11 +163,189 @@ class AuthManager:
                 FOREIGN KEY (session_id) REFERENCES exam_sessions(session_id)
             )
         ''')
-        
-        conn.commit()
+
+        # Violation intervals: one row per run of same-type violations,
+        # timestamps are integer epoch seconds
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS violation_intervals (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER,
+                violation_type TEXT,
+                message TEXT,
+                start_ts INTEGER,
+                end_ts INTEGER,
+                count INTEGER DEFAULT 1,
+                peak_confidence REAL,
+                FOREIGN KEY (session_id) REFERENCES exam_sessions(session_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_violation_intervals_session
+            ON violation_intervals(session_id, start_ts)
+        ''')
+        self._compact_violations(cursor)
+
+        # Submitted answers in bank coordinates: items are int32 bank
+        # indices in paper order, choices int8 original option indices
+        # (-1 = unanswered), both little-endian
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                session_id INTEGER PRIMARY KEY,
+                exam_code TEXT,
+                items BLOB,
+                choices BLOB,
+                FOREIGN KEY (session_id) REFERENCES exam_sessions(session_id)
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_responses_exam ON responses(exam_code)")
+
+    def _compact_violations(self, cursor):
+        """Migrate legacy per-event violation rows into intervals"""
+        cursor.execute("SELECT 1 FROM violations LIMIT 1")
+        if not cursor.fetchone():
+            return
+
+        rows = cursor.connection.execute('''
+            SELECT session_id, violation_type, message, confidence, timestamp
+            FROM violations
+            ORDER BY session_id, violation_type, timestamp
+        ''')
+        intervals = []
+        current = None
+        skipped = 0
+        for session_id, v_type, message, confidence, timestamp in rows:
+            ts = _epoch(timestamp)
+            if ts is None:
+                # No usable time to place it in an interval
+                skipped += 1
+                continue
+            if (current and current[0] == session_id and current[1] == v_type
+                    and ts - current[4] <= MERGE_GAP_SECONDS):
+                current[4] = ts
+                current[5] += 1
+                current[6] = max(current[6], confidence or 0.0)
+            else:
+                if current:
+                    intervals.append(current)
+                current = [session_id, v_type, message, ts, ts, 1, confidence or 0.0]
+        if current:
+            intervals.append(current)
+
+        cursor.executemany('''
+            INSERT INTO violation_intervals
+                (session_id, violation_type, message, start_ts, end_ts, count, peak_confidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', intervals)
+        cursor.execute("DELETE FROM violations")
+        print(f"✅ Compacted legacy violations into {len(intervals)} intervals")
+        if skipped:
+            print(f"⚠️ Dropped {skipped} legacy violations without a valid timestamp")
+
+    # ------------------------------------------
+    # Shard routing
+    # ------------------------------------------
+
+    def _shard_path(self, exam_code):
+        """Shard file for a new session (None = central DB)"""
+        if self.shard_by == 'exam':
+            key = re.sub(r'[^A-Za-z0-9_.-]', '_', exam_code or 'default')
+        elif self.shard_by == 'day':
+            key = datetime.now().strftime('%Y-%m-%d')
+        else:
+            return None
+        return os.path.join(self.shard_dir, f"{key}.db")
+
+    def _connect_shard(self, shard):
+        """Open a shard (None = central DB), creating its tables on first use"""
+        if shard is None:
+            return sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        if shard not in self._ready_shards:
+            os.makedirs(os.path.dirname(shard), exist_ok=True)
+            conn = sqlite3.connect(shard, timeout=self.busy_timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._create_session_tables(conn.cursor())
+            conn.commit()
+            self._ready_shards.add(shard)
+            return conn
+        return sqlite3.connect(shard, timeout=self.busy_timeout)
+
+    def _write(self, shard, query, params):
+        """Execute one write statement on a shard; returns the cursor's lastrowid"""
+        return self._transact(shard, lambda cursor: cursor.execute(query, params).lastrowid)
+
+    def _transact(self, shard, fn):
+        """
+        Run fn(cursor) in one transaction on a shard and commit, retrying
+        with backoff while the database is locked. Returns fn's result.
+        """
+        delay = 0.01
+        for attempt in range(self.max_lock_retries + 1):
+            conn = self._connect_shard(shard)
+            try:
+                result = fn(conn.cursor())
+                conn.commit()
+                return result
+            except sqlite3.OperationalError as e:
+                locked = 'locked' in str(e) or 'busy' in str(e)
+                if not locked or attempt == self.max_lock_retries:
+                    raise
+                with self._stats_lock:
+                    self.lock_retries += 1
+            finally:
+                conn.close()
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _session_shard(self, session_id):
+        """Look up which shard holds a session"""
+        if session_id in self._session_shards:
+            return self._session_shards[session_id]
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        row = conn.execute(
+            "SELECT shard FROM session_index WHERE session_id = ?", (session_id,)
+        ).fetchone()
         conn.close()
-        
-        print("✅ Database initialized")
+        shard = row[0] if row else None
+        self._session_shards[session_id] = shard
+        return shard
+
+    def _all_shards(self, user_id=None):
+        """Distinct shards holding sessions (optionally only a user's)"""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        if user_id is None:
+            rows = conn.execute("SELECT DISTINCT shard FROM session_index").fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT DISTINCT shard FROM session_index WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        conn.close()
+        return [r[0] for r in rows]
+
+    def _query_across_shards(self, query, params, shards):
+        """
+        Run `query` against each shard by ATTACHing it to the central DB.
+        The query names shard tables as `{db}.table` and must not ORDER BY;
+        callers sort the combined rows.
+        """
+        rows = []
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            if None in shards:
+                rows.extend(conn.execute(query.format(db='main'), params).fetchall())
+
+            attached = [s for s in shards if s is not None and os.path.exists(s)]
+            for start in range(0, len(attached), MAX_ATTACHED):
+                group = attached[start:start + MAX_ATTACHED]
+                aliases = [f"shard{i}" for i in range(len(group))]
+                for alias, shard in zip(aliases, group):
+                    conn.execute(f"ATTACH DATABASE ? AS {alias}", (shard,))
+                sql = " UNION ALL ".join(query.format(db=alias) for alias in aliases)
+                rows.extend(conn.execute(sql, list(params) * len(aliases)).fetchall())
+                for alias in aliases:
+                    conn.execute(f"DETACH DATABASE {alias}")
+        finally:
+            conn.close()
+        return rows
     
     def hash_password(self, password):
         """Hash password using SHA-256"""
@@ -93,7 +354,7 @@ class AuthManager:
     def register_user(self, student_id, full_name, email, password):
         """Register new user"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
             cursor = conn.cursor()
             
             password_hash = self.hash_password(password)
@@ -117,10 +378,73 @@ class AuthManager:
             print(f"❌ Registration error: {e}")
             return False, str(e)
     
+    def bulk_register_users(self, rows, chunk_size=500):
+        """
+        Register many users in chunked transactions.
+        rows: iterable of (student_id, full_name, email, password)
+        Returns (imported_count, conflicts) where conflicts is a list of
+        (student_id, reason) for rows that were skipped. Any other failure
+        rolls back the current chunk and is raised; earlier chunks stay committed.
+        """
+        imported = 0
+        conflicts = []
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        cursor = conn.cursor()
+        try:
+            for chunk in _chunked(rows, chunk_size):
+                ids = [str(r[0]).strip() for r in chunk]
+                placeholders = ','.join('?' * len(ids))
+                cursor.execute(
+                    f'SELECT student_id FROM users WHERE student_id IN ({placeholders})',
+                    ids
+                )
+                taken = {r[0] for r in cursor.fetchall()}
+
+                batch = []
+                for student_id, (_, full_name, email, password) in zip(ids, chunk):
+                    if not student_id or not full_name or not password:
+                        conflicts.append((student_id, "Missing required field"))
+                    elif student_id in taken:
+                        conflicts.append((student_id, "Student ID already registered"))
+                    else:
+                        taken.add(student_id)
+                        batch.append((student_id, full_name.strip(), (email or '').strip(),
+                                      self.hash_password(password.strip())))
+
+                insert = '''
+                    INSERT INTO users (student_id, full_name, email, password_hash)
+                    VALUES (?, ?, ?, ?)
+                '''
+                try:
+                    cursor.executemany(insert, batch)
+                except sqlite3.IntegrityError:
+                    # Another writer registered some of these since the check;
+                    # redo the chunk row by row to find which
+                    conn.rollback()
+                    inserted = []
+                    for row in batch:
+                        try:
+                            cursor.execute(insert, row)
+                            inserted.append(row)
+                        except sqlite3.IntegrityError:
+                            conflicts.append((row[0], "Student ID already registered"))
+                    batch = inserted
+                conn.commit()
+                imported += len(batch)
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Bulk registration error: {e}")
+            raise
+        finally:
+            conn.close()
+
+        print(f"✅ Bulk registration: {imported} imported, {len(conflicts)} skipped")
+        return imported, conflicts
+
     def login_user(self, student_id, password):
         """Login user"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
             cursor = conn.cursor()
             
             password_hash = self.hash_password(password)
@@ -154,17 +478,20 @@ class AuthManager:
     def start_exam_session(self, user_id, exam_code):
         """Start new exam session"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO exam_sessions (user_id, exam_code, start_time, status, score)
-                VALUES (?, ?, ?, 'in_progress', 0)
-            ''', (user_id, exam_code, datetime.now().isoformat()))
+            shard = self._shard_path(exam_code)
+
+            # Allocate the id centrally so it is unique across shards
+            session_id = self._write(None, '''
+                INSERT INTO session_index (user_id, exam_code, shard)
+                VALUES (?, ?, ?)
+            ''', (user_id, exam_code, shard))
             
-            conn.commit()
-            session_id = cursor.lastrowid
-            conn.close()
+            self._write(shard, '''
+                INSERT INTO exam_sessions (session_id, user_id, exam_code, start_time, status, score)
+                VALUES (?, ?, ?, ?, 'in_progress', 0)
+            ''', (session_id, user_id, exam_code, datetime.now().isoformat()))
+
+            self._session_shards[session_id] = shard
             
             print(f"✅ Exam session started: {session_id}")
             return session_id
@@ -176,18 +503,12 @@ class AuthManager:
     def end_exam_session(self, session_id, total_violations, score=0):
         """End exam session"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            self._write(self._session_shard(session_id), '''
                 UPDATE exam_sessions
                 SET end_time = ?, total_violations = ?, score = ?, status = 'completed'
                 WHERE session_id = ?
             ''', (datetime.now().isoformat(), total_violations, score, session_id))
             
-            conn.commit()
-            conn.close()
-            
             print(f"✅ Exam session ended: {session_id} with score {score}")
             return True
             
@@ -195,71 +516,110 @@ class AuthManager:
             print(f"❌ Session end error: {e}")
             return False
     
-    def log_violation(self, session_id, violation_type, message, confidence):
-        """Log violation to database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
+    def log_violation(self, session_id, violation_type, message, confidence, ts=None):
+        """
+        Log violation to database at ts (epoch seconds, default now).
+        Extends the latest interval of the same type if it ended less than
+        MERGE_GAP_SECONDS ago, otherwise starts a new interval.
+        """
+        now = int(time.time()) if ts is None else int(ts)
+
+        def upsert(cursor):
             cursor.execute('''
-                INSERT INTO violations (session_id, violation_type, message, confidence, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (session_id, violation_type, message, confidence, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
-            
+                UPDATE violation_intervals
+                SET end_ts = MAX(end_ts, ?), count = count + 1,
+                    peak_confidence = MAX(peak_confidence, ?)
+                WHERE id = (
+                    SELECT id FROM violation_intervals
+                    WHERE session_id = ? AND violation_type = ? AND end_ts >= ?
+                    ORDER BY start_ts DESC LIMIT 1
+                )
+            ''', (now, confidence, session_id, violation_type, now - MERGE_GAP_SECONDS))
+            if cursor.rowcount == 0:
+                cursor.execute('''
+                    INSERT INTO violation_intervals
+                        (session_id, violation_type, message, start_ts, end_ts, count, peak_confidence)
+                    VALUES (?, ?, ?, ?, ?, 1, ?)
+                ''', (session_id, violation_type, message, now, now, confidence))
+
+        try:
+            self._transact(self._session_shard(session_id), upsert)
             return True
             
         except Exception as e:
             print(f"❌ Violation log error: {e}")
             return False
-    
-    def get_session_violations(self, session_id):
-        """Get all violations for a session"""
+
+    def extend_violation(self, session_id, violation_type, end_ts=None):
+        """Extend the latest interval of a type to end_ts (epoch seconds, default now)"""
+        end_ts = int(time.time()) if end_ts is None else int(end_ts)
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT violation_type, message, confidence, timestamp
-                FROM violations
+            self._write(self._session_shard(session_id), '''
+                UPDATE violation_intervals SET end_ts = MAX(end_ts, ?)
+                WHERE id = (
+                    SELECT id FROM violation_intervals
+                    WHERE session_id = ? AND violation_type = ?
+                    ORDER BY start_ts DESC LIMIT 1
+                )
+            ''', (end_ts, session_id, violation_type))
+            return True
+
+        except Exception as e:
+            print(f"❌ Violation extend error: {e}")
+            return False
+
+    def get_session_intervals(self, session_id):
+        """Get violation intervals for a session, oldest first"""
+        try:
+            conn = self._connect_shard(self._session_shard(session_id))
+            rows = conn.execute('''
+                SELECT violation_type, message, start_ts, end_ts, count, peak_confidence
+                FROM violation_intervals
                 WHERE session_id = ?
-                ORDER BY timestamp
-            ''', (session_id,))
-            
-            violations = cursor.fetchall()
+                ORDER BY start_ts
+            ''', (session_id,)).fetchall()
             conn.close()
-            
+
             return [
                 {
-                    'type': v[0],
-                    'message': v[1],
-                    'confidence': v[2],
-                    'timestamp': v[3]
+                    'type': r[0],
+                    'message': r[1],
+                    'start': r[2],
+                    'end': r[3],
+                    'count': r[4],
+                    'peak_confidence': r[5]
                 }
-                for v in violations
+                for r in rows
             ]
-            
+
         except Exception as e:
-            print(f"❌ Get violations error: {e}")
+            print(f"❌ Get intervals error: {e}")
             return []
+    
+    def get_session_violations(self, session_id):
+        """Get all violations for a session (one entry per interval)"""
+        return [
+            {
+                'type': i['type'],
+                'message': i['message'],
+                'confidence': i['peak_confidence'],
+                'timestamp': datetime.fromtimestamp(i['start']).isoformat(),
+                'start': i['start'],
+                'end': i['end'],
+                'count': i['count']
+            }
+            for i in self.get_session_intervals(session_id)
+        ]
 
     def get_user_history(self, user_id):
-        """Get exam history for a user"""
+        """Get exam history for a user (across all shards)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            sessions = self._query_across_shards('''
                 SELECT session_id, exam_code, start_time, end_time, total_violations, score, status
-                FROM exam_sessions
+                FROM {db}.exam_sessions
                 WHERE user_id = ? AND status = 'completed'
-                ORDER BY start_time DESC
-            ''', (user_id,))
-            
-            sessions = cursor.fetchall()
-            conn.close()
+            ''', (user_id,), self._all_shards(user_id))
+            sessions.sort(key=lambda s: s[2] or '', reverse=True)
             history = []
             
             for s in sessions:
@@ -277,4 +637,127 @@ class AuthManager:
             
         except Exception as e:
             print(f"❌ Get history error: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def save_responses(self, session_id, exam_code, items, choices):
+        """Store a candidate's answers (bank indices and original option indices)"""
+        try:
+            self._write(self._session_shard(session_id), '''
+                INSERT OR REPLACE INTO responses (session_id, exam_code, items, choices)
+                VALUES (?, ?, ?, ?)
+            ''', (session_id, exam_code,
+                  struct.pack(f"<{len(items)}i", *items),
+                  struct.pack(f"<{len(choices)}b", *choices)))
+            return True
+
+        except Exception as e:
+            print(f"❌ Save responses error: {e}")
+            return False
+
+    def iter_exam_responses(self, exam_code, batch_size=5000):
+        """Stream {'session_id', 'items', 'choices'} blobs for every submitted paper of an exam"""
+        return self._iter_query('''
+            SELECT session_id, items, choices
+            FROM {db}.responses
+            WHERE exam_code = ?
+        ''', batch_size, (exam_code,))
+
+    def update_scores(self, scores, chunk_size=500):
+        """Bulk-update session scores: scores is {session_id: score}"""
+        try:
+            by_shard = {}
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+            for chunk in _chunked(scores.items(), chunk_size):
+                ids = [session_id for session_id, _ in chunk]
+                placeholders = ','.join('?' * len(ids))
+                shards = dict(conn.execute(
+                    f"SELECT session_id, shard FROM session_index WHERE session_id IN ({placeholders})",
+                    ids
+                ).fetchall())
+                for session_id, score in chunk:
+                    by_shard.setdefault(shards.get(session_id), []).append((score, session_id))
+            conn.close()
+
+            for shard, rows in by_shard.items():
+                self._transact(shard, lambda cursor: cursor.executemany(
+                    "UPDATE exam_sessions SET score = ? WHERE session_id = ?", rows
+                ))
+            print(f"✅ Updated {len(scores)} scores")
+            return True
+
+        except Exception as e:
+            print(f"❌ Update scores error: {e}")
+            return False
+
+    def get_in_progress_sessions(self, user_id):
+        """Sessions of a user that were started but never ended, newest first"""
+        try:
+            sessions = self._query_across_shards('''
+                SELECT session_id, exam_code, start_time
+                FROM {db}.exam_sessions
+                WHERE user_id = ? AND status = 'in_progress'
+            ''', (user_id,), self._all_shards(user_id))
+            sessions.sort(key=lambda s: s[2] or '', reverse=True)
+            return [
+                {'session_id': s[0], 'exam_code': s[1], 'start_time': s[2]}
+                for s in sessions
+            ]
+
+        except Exception as e:
+            print(f"❌ Get in-progress sessions error: {e}")
+            return []
+
+    def _iter_query(self, query, batch_size, params=(), order_by=None):
+        """
+        Stream rows of a query as dicts, `batch_size` rows at a time.
+        `{db}` in the query names the shard. Shards follow one another,
+        unless `order_by` names the output column the query sorts on: each
+        shard is sorted on its own, so their streams are merged on it.
+        """
+        streams = [self._iter_shard(shard, query, batch_size, params)
+                   for shard in self._all_shards()
+                   if shard is None or os.path.exists(shard)]
+        if order_by is None:
+            return chain.from_iterable(streams)
+        return heapq.merge(*streams, key=itemgetter(order_by))
+
+    def _iter_shard(self, shard, query, batch_size, params):
+        """Rows of `query` in one shard (None: the central database), as dicts"""
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        try:
+            db = 'main'
+            if shard is not None:
+                conn.execute("ATTACH DATABASE ? AS shard", (shard,))
+                db = 'shard'
+            cursor = conn.cursor()
+            cursor.execute(query.format(db=db), params)
+            columns = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(columns, row))
+        finally:
+            conn.close()
+
+    def iter_session_results(self, batch_size=1000):
+        """Stream every exam session joined with its student, in session id order"""
+        return self._iter_query('''
+            SELECT s.session_id, u.student_id, u.full_name, s.exam_code,
+                   s.start_time, s.end_time, s.total_violations, s.score, s.status
+            FROM {db}.exam_sessions s
+            LEFT JOIN main.users u ON u.id = s.user_id
+            ORDER BY s.session_id
+        ''', batch_size, order_by='session_id')
+
+    def iter_violation_records(self, batch_size=1000):
+        """Stream every violation interval with its session and student, by session id"""
+        return self._iter_query('''
+            SELECT v.session_id, u.student_id, s.exam_code, v.violation_type,
+                   v.message, v.start_ts, v.end_ts, v.count, v.peak_confidence
+            FROM {db}.violation_intervals v
+            LEFT JOIN {db}.exam_sessions s ON s.session_id = v.session_id
+            LEFT JOIN main.users u ON u.id = s.user_id
+            ORDER BY v.session_id, v.id
+        ''', batch_size, order_by='session_id')
@@ -0,0 +1,276 @@
+"""
+Headless batch proctoring
+Runs ProctorMonitor over recorded exam videos on a process pool and writes
+one violation report per recording. Each worker loads the models once.
+Long recordings are split into chunks that are processed in parallel:
+a chunk starts `overlap` seconds early so the event flags are warm at its
+boundary, only keeps events that start inside it, and runs past its end
+until those events have closed.
+
+With --raw-outputs each recording's model outputs are also kept in
+<out>/<name>_raw for retune.py; a recording is then processed as a single
+chunk, so its outputs form one continuous timeline. Like the report, a
+rerun replaces the earlier recording.
+
+Usage:
+    python batch_proctor.py recordings/ --out reports/
+    python batch_proctor.py recordings/ --out reports/ --workers 4 --chunk-minutes 10 --fps 5
+    python batch_proctor.py recordings/ --out reports/ --raw-outputs
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import psutil
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+WORKER_MEMORY_MB = 1500     # rough resident size of one ProctorMonitor
+REFERENCE_SECONDS = 30      # search this much of the start for the candidate's face
+
+# Per-process state, created by _init_worker
+_monitor = None
+_clock = None
+
+
+class VideoClock:
+    """Injectable clock that reads the timestamp of the frame being processed"""
+
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def default_workers(per_worker_mb=WORKER_MEMORY_MB):
+    """As many workers as there are physical cores and memory for a model copy each"""
+    cores = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    available_mb = psutil.virtual_memory().available // (1024 * 1024)
+    return max(1, min(cores, available_mb // per_worker_mb))
+
+
+def find_videos(path):
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+
+def probe_video(path):
+    """(fps, duration in seconds) of a recording"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return fps, frames / fps
+
+
+def plan_chunks(duration, chunk_seconds):
+    """[(start, end)] covering the recording; the last chunk runs to the end"""
+    n = max(1, math.ceil(duration / chunk_seconds)) if chunk_seconds else 1
+    bounds = [i * chunk_seconds for i in range(n)] + [math.inf]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _init_worker(device, threads):
+    global _monitor, _clock
+    from cpu_budget import CpuBudget
+    from detector import ProctorMonitor
+
+    # Workers split the cores between them rather than each using all of them
+    budget = CpuBudget(torch_threads=threads, interop_threads=1, opencv_threads=1)
+    _clock = VideoClock()
+    _monitor = ProctorMonitor(device=device, clock=_clock, cpu_budget=budget)
+
+
+def _lock_reference(cap, fps, step):
+    """Take the reference face from the start of the recording, as the live app does"""
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for index in range(int(REFERENCE_SECONDS * fps)):
+        if not cap.grab():
+            break
+        if index % step:
+            continue
+        ok, frame = cap.retrieve()
+        if ok and _monitor.set_reference_face(frame):
+            return True
+    return False
+
+
+def _chunk_is_done(end):
+    """Past the chunk end, continue only while an event that began in the chunk is pending or open"""
+    return all(flag.active_since is None or flag.active_since >= end
+               for flag in _monitor.event_flags.values())
+
+
+def process_chunk(path, start, end, overlap, sample_fps, raw_dir=None):
+    """Events of one recording that start in [start, end), as dicts"""
+    from detector import EVENT_CLOSED
+    from raw_outputs import RawOutputRecorder
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(fps / sample_fps))
+
+    _monitor.reset()
+    _lock_reference(cap, fps, step)
+
+    if raw_dir:
+        _monitor.raw_outputs = RawOutputRecorder(raw_dir, _monitor.decision_settings())
+
+    cap.set(cv2.CAP_PROP_POS_FRAMES, int(max(0.0, start - overlap) * fps))
+    index = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+    closed = []
+    frames = 0
+    while cap.grab():
+        if index % step == 0:
+            t = index / fps
+            if t >= end and _chunk_is_done(end):
+                break
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            _clock.t = t
+            _, info = _monitor.process_frame(frame)
+            closed.extend(e for e in info.get("events", []) if e["state"] == EVENT_CLOSED)
+            frames += 1
+        index += 1
+    cap.release()
+    closed.extend(_monitor.close_events())
+    if _monitor.raw_outputs is not None:
+        _monitor.raw_outputs.close(_monitor.counters)
+        _monitor.raw_outputs = None
+
+    events = [
+        {"type": e["type"], "start": round(e["start"], 2),
+         "end": round(e["start"] + e["duration"], 2), "duration": round(e["duration"], 2)}
+        for e in closed if start <= e["start"] < end
+    ]
+    return {"events": events, "frames": frames}
+
+
+def _run_chunk(task):
+    return process_chunk(*task)
+
+
+def write_report(out_dir, path, fps, duration, sample_fps, chunks, results):
+    events = sorted((e for r in results for e in r["events"]), key=lambda e: (e["start"], e["type"]))
+    counts = {}
+    for e in events:
+        counts[e["type"]] = counts.get(e["type"], 0) + 1
+    report = {
+        "video": os.path.abspath(path),
+        "duration": round(duration, 2),
+        "fps": fps,
+        "sample_fps": sample_fps,
+        "chunks": chunks,
+        "frames_processed": sum(r["frames"] for r in results),
+        "counts": counts,
+        "events": events,
+    }
+    out_path = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + ".json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return out_path, report
+
+
+def proctor_videos(paths, out_dir, workers=None, chunk_seconds=600.0, overlap=10.0,
+                   sample_fps=5.0, device="cpu", raw_outputs=False):
+    """Process recordings in parallel; returns {path: report path, or None on failure}"""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or default_workers()
+    if raw_outputs and chunk_seconds:
+        print("ℹ️ Recording raw outputs: one chunk per recording")
+        chunk_seconds = 0
+
+    tasks = []
+    plans = {}
+    for path in paths:
+        try:
+            fps, duration = probe_video(path)
+        except IOError as e:
+            print(f"❌ {e}")
+            continue
+        chunks = plan_chunks(duration, chunk_seconds)
+        plans[path] = {"fps": fps, "duration": duration, "chunks": len(chunks), "results": []}
+        raw_dir = None
+        if raw_outputs:
+            raw_dir = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + "_raw")
+            shutil.rmtree(raw_dir, ignore_errors=True)
+        tasks.extend((path, start, end, overlap, sample_fps, raw_dir) for start, end in chunks)
+
+    if not tasks:
+        print("⚠️ No recordings to process")
+        return {}
+    workers = min(workers, len(tasks))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"🎬 {len(plans)} recordings, {len(tasks)} chunks on {workers} workers "
+          f"({threads} threads each)")
+
+    outputs = {path: None for path in paths}
+    failed = set()
+    started = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(device, threads)) as pool:
+        futures = {pool.submit(_run_chunk, task): task[0] for task in tasks}
+        for future in as_completed(futures):
+            path = futures[future]
+            plan = plans[path]
+            try:
+                plan["results"].append(future.result())
+            except Exception as e:
+                print(f"❌ {os.path.basename(path)}: {e}")
+                failed.add(path)
+                continue
+            if len(plan["results"]) == plan["chunks"] and path not in failed:
+                out_path, report = write_report(out_dir, path, plan["fps"], plan["duration"],
+                                                sample_fps, plan["chunks"], plan["results"])
+                outputs[path] = out_path
+                print(f"✅ {os.path.basename(path)}: {len(report['events'])} events -> {out_path}")
+
+    print(f"⏱️ Done in {time.perf_counter() - started:.1f}s")
+    return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proctor recorded exam videos in parallel")
+    parser.add_argument("input", help="Recording or directory of recordings")
+    parser.add_argument("--out", default=os.path.join("data", "reports"))
+    parser.add_argument("--workers", type=int, help="Default: sized to cores and free memory")
+    parser.add_argument("--chunk-minutes", type=float, default=10.0,
+                        help="Split longer recordings across workers (0 = never)")
+    parser.add_argument("--overlap", type=float, default=10.0,
+                        help="Warm-up seconds before each chunk; keep above the longest hold + release")
+    parser.add_argument("--fps", type=float, default=5.0, help="Frames per second to analyse")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--raw-outputs", action="store_true",
+                        help="Also keep raw model outputs in <out>/<name>_raw for retune.py")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"❌ {args.input}: no such file or directory")
+        return 1
+    paths = find_videos(args.input)
+    outputs = proctor_videos(paths, args.out, args.workers, args.chunk_minutes * 60,
+                             args.overlap, args.fps, args.device, args.raw_outputs)
+    return 0 if outputs and all(outputs.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Hot-path micro-benchmarks
+Times the detector primitives on synthetic frames at several resolutions,
+the full process_frame, and each AuthManager operation on a scratch
+database. Results can be saved as a JSON baseline and later runs compared
+against it; a median slower than the baseline by more than the threshold
+(and by more than --min-delta in absolute terms, so timer noise on
+microsecond benchmarks doesn't count) fails the comparison.
+
+Usage:
+    python bench.py --save data/bench/baseline.json
+    python bench.py --compare data/bench/baseline.json --threshold 0.15
+    python bench.py --filter pose,db --quick
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from detector import (compute_head_pose_flags, preprocess_bgr_to_rgb, draw_box, put_label,
+                      assess_frame_quality)
+from frame_source import synthetic_frame
+
+RESOLUTIONS = {"240p": (320, 240), "480p": (640, 480), "720p": (1280, 720)}
+
+
+def synthetic_keypoints(rng):
+    """Plausible 5-point face landmarks with a little jitter"""
+    kps = np.array([[40, 40], [80, 40], [60, 60], [45, 85], [75, 85]], dtype=np.float32)
+    return kps + rng.normal(0, 2, kps.shape).astype(np.float32)
+
+
+def measure(fn, min_time=0.5, min_runs=5, max_runs=10000, warmup=2):
+    """Call fn repeatedly; returns latency stats in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - started < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "median_ms": statistics.median(samples) * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000,
+        "min_ms": samples[0] * 1000,
+    }
+
+
+# ==========================================
+# Benchmark groups: each yields (name, fn)
+# ==========================================
+
+def bench_pose():
+    rng = np.random.default_rng(0)
+    kps = [synthetic_keypoints(rng) for _ in range(256)]
+    box = (20, 20, 100, 110)
+    state = {"i": 0}
+
+    def pose():
+        state["i"] = (state["i"] + 1) % len(kps)
+        compute_head_pose_flags(kps[state["i"]], box)
+    yield "pose/compute_head_pose_flags", pose
+
+
+def bench_image(frames):
+    for res, frame in frames.items():
+        yield f"image/preprocess_bgr_to_rgb[{res}]", lambda f=frame: preprocess_bgr_to_rgb(f)
+        yield f"image/assess_frame_quality[{res}]", lambda f=frame: assess_frame_quality(f)
+
+
+def bench_draw(frames):
+    for res, frame in frames.items():
+        h, w = frame.shape[:2]
+        canvas = frame.copy()
+
+        def draw(c=canvas, w=w, h=h):
+            draw_box(c, (w * 0.3, h * 0.3, w * 0.6, h * 0.7), (0, 255, 0), "Face")
+            draw_box(c, (w * 0.1, h * 0.5, w * 0.25, h * 0.8), (0, 0, 255), "cell phone 0.82")
+            put_label(c, "Faces: 1 | Away: False", (10, 30))
+        yield f"draw/draw_box+put_label[{res}]", draw
+
+
+def bench_models(monitor, frames):
+    import torch
+
+    from detector import FACE_PRESETS
+
+    preset = monitor.face_preset
+    for res, frame in frames.items():
+        rgb = preprocess_bgr_to_rgb(frame)
+        for name in FACE_PRESETS:
+            def detect(r=rgb, name=name):
+                if monitor.face_preset != name:
+                    monitor.set_face_preset(name)
+                monitor.detect_faces(r)
+            yield f"models/mtcnn_detect_faces:{name}[{res}]", detect
+        yield f"models/yolo_detect_objects[{res}]", lambda r=rgb: monitor.detect_objects(r)
+    monitor.set_face_preset(preset)
+
+    face = torch.rand(1, 3, 160, 160, device=monitor.device) * 2 - 1
+
+    def embed():
+        with torch.no_grad():
+            monitor.resnet(face)
+    yield "models/resnet_embedding", embed
+
+
+def bench_frame(monitor, frames):
+    monitor.telemetry = None
+    for res, frame in frames.items():
+        def with_yolo(f=frame):
+            monitor.last_yolo_time = float("-inf")
+            monitor.process_frame(f)
+
+        def without_yolo(f=frame):
+            monitor.last_yolo_time = float("inf")
+            monitor.process_frame(f)
+        yield f"frame/process_frame+yolo[{res}]", with_yolo
+        yield f"frame/process_frame[{res}]", without_yolo
+    monitor.last_yolo_time = 0.0
+
+
+def bench_db(db_dir):
+    from auth import AuthManager
+
+    auth = AuthManager(os.path.join(db_dir, "users.db"))
+    auth.register_user("bench0", "Bench Candidate", "bench@example.com", "bench")
+    user = auth.login_user("bench0", "bench")[1]
+    session_id = auth.start_exam_session(user["user_id"], "BENCH-1")
+    counter = {"n": 0}
+
+    def register():
+        counter["n"] += 1
+        auth.register_user(f"bench{counter['n']}", "Bench Candidate", "", "bench")
+
+    def log_violation():
+        auth.log_violation(session_id, "looking_away", "Looking Away", 1.0)
+
+    def start_end():
+        sid = auth.start_exam_session(user["user_id"], "BENCH-1")
+        auth.end_exam_session(sid, 0, 0)
+
+    items = list(range(20))
+    choices = [i % 4 for i in items]
+    yield "db/register_user", register
+    yield "db/login_user", lambda: auth.login_user("bench0", "bench")
+    yield "db/start+end_exam_session", start_end
+    yield "db/log_violation", log_violation
+    yield "db/extend_violation", lambda: auth.extend_violation(session_id, "looking_away")
+    yield "db/get_session_violations", lambda: auth.get_session_violations(session_id)
+    yield "db/get_user_history", lambda: auth.get_user_history(user["user_id"])
+    yield "db/save_responses", lambda: auth.save_responses(session_id, "BENCH-1", items, choices)
+
+
+GROUPS = ("pose", "image", "draw", "models", "frame", "db")
+
+
+def run(groups, min_time=0.5, device="cpu"):
+    frames = {res: synthetic_frame(w, h) for res, (w, h) in RESOLUTIONS.items()}
+    benches = []
+    if "pose" in groups:
+        benches.append(bench_pose())
+    if "image" in groups:
+        benches.append(bench_image(frames))
+    if "draw" in groups:
+        benches.append(bench_draw(frames))
+    if "models" in groups or "frame" in groups:
+        try:
+            from detector import ProctorMonitor
+            with contextlib.redirect_stdout(io.StringIO()):
+                monitor = ProctorMonitor(device=device)
+        except Exception as e:
+            print(f"⚠️ Skipping model benchmarks, ProctorMonitor unavailable: {e}")
+        else:
+            if "models" in groups:
+                benches.append(bench_models(monitor, frames))
+            if "frame" in groups:
+                benches.append(bench_frame(monitor, frames))
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="proctor_bench_") as db_dir:
+        if "db" in groups:
+            benches.append(bench_db(db_dir))
+        for group in benches:
+            # AuthManager and the detector report on stdout; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                pairs = []
+                for name, fn in group:
+                    pairs.append((name, measure(fn, min_time=min_time)))
+            for name, stats in pairs:
+                results[name] = stats
+                print(f"  {name:<42}{stats['median_ms']:>10.3f} ms  (p95 {stats['p95_ms']:.3f}, n={stats['runs']})")
+    return results
+
+
+def environment():
+    import torch
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms=0.05):
+    """
+    Names whose median regressed by more than `threshold` (fraction) vs. the
+    baseline and by more than `min_delta_ms`
+    """
+    regressions = []
+    print(f"\n{'benchmark':<44}{'baseline':>11}{'current':>11}{'change':>9}")
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = stats["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+        mark = ""
+        if change > threshold and stats["median_ms"] - base["median_ms"] > min_delta_ms:
+            regressions.append(name)
+            mark = "  ❌"
+        print(f"{name:<44}{base['median_ms']:>9.3f}ms{stats['median_ms']:>9.3f}ms{change:>+8.0%}{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for detector and storage hot paths")
+    parser.add_argument("--filter", default=",".join(GROUPS),
+                        help=f"Comma-separated groups to run ({', '.join(GROUPS)})")
+    parser.add_argument("--quick", action="store_true", help="Shorter measurement per benchmark")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed slowdown of the median before a comparison fails (0.15 = 15%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05, metavar="MS",
+                        help="Ignore slowdowns smaller than this many milliseconds (timer noise)")
+    args = parser.parse_args(argv)
+
+    groups = {g.strip() for g in args.filter.split(",") if g.strip()}
+    unknown = groups - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    print(f"⏱️ Running benchmarks: {', '.join(g for g in GROUPS if g in groups)}")
+    results = run(groups, min_time=0.1 if args.quick else 0.5, device=args.device)
+    report = {"environment": environment(), "results": results}
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f"✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
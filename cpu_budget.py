@@ -0,0 +1,246 @@
+"""
+CPU thread budget
+torch's intra-op pool, OpenCV's pool and the Qt GUI all default to using
+every core, which oversubscribes small exam PCs and makes frame times
+jittery. A CpuBudget caps each pool and can pin the inference thread to a
+set of cores. ProctorMonitor applies one on construction; it can be set
+from the environment:
+
+    PROCTOR_CPU_BUDGET="torch=3,interop=1,opencv=1,cores=1-3"
+
+Usage:
+    python cpu_budget.py sweep [--seconds 3] [--resolution 480p]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import cv2
+import torch
+
+ENV_VAR = "PROCTOR_CPU_BUDGET"
+
+
+def _parse_cores(value):
+    """'0-2+5' -> [0, 1, 2, 5]"""
+    cores = []
+    for part in value.split("+"):
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cores.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            cores.append(int(part))
+    return cores
+
+
+def _thread_count(key, value):
+    count = int(value)
+    if count < 1:
+        raise ValueError(f"CPU budget {key}={count} must be at least 1")
+    return count
+
+
+def _format_cores(cores):
+    """[0, 1, 2, 5] -> '0-2+5'"""
+    parts = []
+    cores = sorted(set(cores))
+    i = 0
+    while i < len(cores):
+        j = i
+        while j + 1 < len(cores) and cores[j + 1] == cores[j] + 1:
+            j += 1
+        parts.append(str(cores[i]) if i == j else f"{cores[i]}-{cores[j]}")
+        i = j + 1
+    return "+".join(parts)
+
+
+class CpuBudget:
+    """
+    torch_threads: intra-op threads for inference
+    interop_threads: torch inter-op threads (only settable once per process)
+    opencv_threads: OpenCV's pool (frames are small; more threads mostly add jitter)
+    cores: CPU ids the inference thread is pinned to, or None to leave it unpinned
+    """
+
+    def __init__(self, torch_threads=None, interop_threads=None, opencv_threads=None, cores=None):
+        self.torch_threads = torch_threads
+        self.interop_threads = interop_threads
+        self.opencv_threads = opencv_threads
+        self.cores = cores
+
+    @classmethod
+    def default(cls):
+        """
+        From PROCTOR_CPU_BUDGET if set and valid; otherwise leave one core
+        free for the GUI
+        """
+        spec = os.environ.get(ENV_VAR)
+        if spec:
+            try:
+                return cls.parse(spec)
+            except ValueError as e:
+                print(f"⚠️ Ignoring {ENV_VAR}={spec!r} ({e}), using automatic settings")
+        cpus = os.cpu_count() or 1
+        return cls(torch_threads=max(1, cpus - 1), interop_threads=1, opencv_threads=1)
+
+    @classmethod
+    def parse(cls, spec):
+        """'torch=3,interop=1,opencv=1,cores=1-3' (cores may join ranges with '+')"""
+        budget = cls()
+        for item in spec.split(","):
+            if not item.strip():
+                continue
+            key, sep, value = (s.strip() for s in item.partition("="))
+            if not sep:
+                raise ValueError(f"Expected key=value, got {item.strip()!r}")
+            if key == "torch":
+                budget.torch_threads = _thread_count(key, value)
+            elif key == "interop":
+                budget.interop_threads = _thread_count(key, value)
+            elif key == "opencv":
+                budget.opencv_threads = _thread_count(key, value)
+            elif key == "cores":
+                budget.cores = _parse_cores(value)
+            else:
+                raise ValueError(f"Unknown CPU budget key {key!r}")
+        return budget
+
+    def __str__(self):
+        parts = []
+        for key, value in (("torch", self.torch_threads), ("interop", self.interop_threads),
+                           ("opencv", self.opencv_threads)):
+            if value is not None:
+                parts.append(f"{key}={value}")
+        if self.cores:
+            parts.append(f"cores={_format_cores(self.cores)}")
+        return ",".join(parts)
+
+    def apply(self):
+        """Set the torch and OpenCV pool sizes for this process"""
+        if self.torch_threads is not None:
+            torch.set_num_threads(self.torch_threads)
+        if self.interop_threads is not None and torch.get_num_interop_threads() != self.interop_threads:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                # Fails once any inter-op work has started in this process
+                print(f"⚠️ Could not set torch inter-op threads: {e}")
+        if self.opencv_threads is not None:
+            cv2.setNumThreads(self.opencv_threads)
+        print(f"[CpuBudget] {str(self) or 'library defaults'}")
+
+    def pin_current_thread(self):
+        """
+        Pin the calling thread (the inference thread) to `cores`. Call it before
+        the thread runs any model, so torch's pool threads inherit the mask.
+        """
+        if not self.cores:
+            return False
+        if not hasattr(os, "sched_setaffinity"):
+            print("⚠️ CPU affinity is not supported on this platform")
+            return False
+        try:
+            os.sched_setaffinity(0, self.cores)
+            return True
+        except OSError as e:
+            print(f"⚠️ Could not pin inference thread to cores {self.cores}: {e}")
+            return False
+
+
+# ==========================================
+# Sweep benchmark
+# ==========================================
+
+def _measure(spec, seconds, resolution):
+    """Frame-time stats of process_frame under one budget (runs in a child process)"""
+    import contextlib
+    import io
+    from bench import RESOLUTIONS
+    from frame_source import synthetic_frame
+    from detector import ProctorMonitor
+
+    budget = CpuBudget.parse(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        monitor = ProctorMonitor(cpu_budget=budget)
+    budget.pin_current_thread()
+    frame = synthetic_frame(*RESOLUTIONS[resolution])
+    for _ in range(3):
+        monitor.process_frame(frame)
+
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline or len(samples) < 5:
+        t0 = time.perf_counter()
+        monitor.process_frame(frame)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000,
+        "frames": len(samples),
+    }
+
+
+def sweep_budgets(cpus=None):
+    """Candidate budgets: torch threads 1..N-1 (one core kept for the GUI), OpenCV 1 or N"""
+    cpus = cpus or os.cpu_count() or 1
+    max_torch = max(1, cpus - 1)
+    budgets = []
+    for t in sorted(t for t in {1, 2, max_torch // 2, max_torch} if 1 <= t <= max_torch):
+        for cv in sorted({1, cpus}):
+            budgets.append(CpuBudget(torch_threads=t, interop_threads=1, opencv_threads=cv))
+    if cpus > 2:
+        budgets.append(CpuBudget(torch_threads=max_torch, interop_threads=1, opencv_threads=1,
+                                 cores=list(range(1, cpus))))
+    return budgets
+
+
+def sweep(seconds=3.0, resolution="480p"):
+    """Measure each candidate budget in a fresh process; returns (results, best spec)"""
+    results = []
+    print(f"🔬 Sweeping CPU budgets on {os.cpu_count()} CPUs, {resolution}, {seconds:.0f}s each")
+    for budget in sweep_budgets():
+        spec = str(budget)
+        try:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "_measure", spec,
+                 "--seconds", str(seconds), "--resolution", resolution],
+                capture_output=True, text=True, check=True,
+            )
+            stats = json.loads(out.stdout.strip().splitlines()[-1])
+        except (subprocess.CalledProcessError, ValueError) as e:
+            print(f"  {spec:<40} failed: {e}")
+            continue
+        results.append((spec, stats))
+        print(f"  {spec:<40}{stats['median_ms']:>9.1f} ms median{stats['p95_ms']:>9.1f} ms p95")
+
+    if not results:
+        return results, None
+    # Jitter matters more than the median for a live feed: rank by p95
+    best = min(results, key=lambda r: (r[1]["p95_ms"], r[1]["median_ms"]))[0]
+    print(f"✅ Recommended: {ENV_VAR}=\"{best}\"")
+    return results, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU thread budget for the detector")
+    parser.add_argument("command", choices=["sweep", "_measure"])
+    parser.add_argument("spec", nargs="?")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--resolution", default="480p", choices=["240p", "480p", "720p"])
+    args = parser.parse_args(argv)
+
+    if args.command == "_measure":
+        print(json.dumps(_measure(args.spec, args.seconds, args.resolution)))
+        return 0
+    _, best = sweep(args.seconds, args.resolution)
+    return 0 if best else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,13 @@ import torch
 from facenet_pytorch import MTCNN, InceptionResnetV1
 from ultralytics import YOLO
 
+from cpu_budget import CpuBudget
+from model_cache import load_face_embedder, load_object_detector, YOLO_IMGSZ
+from tracking import ObjectTracker
+from event_bus import ViolationEvent
+from metrics import NULL_FRAME_TIMER
+from telemetry import FLAG_AWAY, FLAG_PHONE, FLAG_BOOK, FLAG_IDENTITY, FLAG_MULTI, FLAG_OBSTRUCTED
+
 # ==========================================
 # Helpers / Utils
 # ==========================================
@@ -16,12 +23,13 @@ class RollingFlag:
     smooths out flickering detections.
     If 'is_active' is True for 'hold_seconds', the flag triggers.
     """
-    def __init__(self, hold_seconds: float):
+    def __init__(self, hold_seconds: float, clock=time.time):
         self.hold = hold_seconds
+        self.clock = clock
         self.active_since = None
 
     def update(self, is_active: bool) -> bool:
-        now = time.time()
+        now = self.clock()
         if is_active:
             if self.active_since is None:
                 self.active_since = now
@@ -30,6 +38,78 @@ class RollingFlag:
             self.active_since = None
             return False
 
+
+EVENT_OPENED = "opened"
+EVENT_CLOSED = "closed"
+
+
+class EventFlag:
+    """
+    Edge-triggered version of RollingFlag.
+    Once 'is_active' has held for 'hold_seconds' the event opens (reported
+    once), stays open while the condition persists, tolerating gaps shorter
+    than 'release_seconds', and then closes with a duration. A new event
+    can't open until 'cooldown_seconds' after the previous one closed.
+    update() returns EVENT_OPENED, EVENT_CLOSED or None.
+    """
+    def __init__(self, hold_seconds: float, release_seconds: float = 1.0,
+                 cooldown_seconds: float = 0.0, clock=time.monotonic):
+        self.hold = hold_seconds
+        self.release = release_seconds
+        self.cooldown = cooldown_seconds
+        self.clock = clock
+        self.active_since = None
+        self.closed_at = None
+        self.is_open = False
+        # Current (or most recent) event interval
+        self.event_start = None
+        self.event_end = None
+
+    @property
+    def duration(self) -> float:
+        if self.event_start is None:
+            return 0.0
+        return self.event_end - self.event_start
+
+    def update(self, is_active: bool):
+        now = self.clock()
+        if self.is_open:
+            if is_active:
+                self.event_end = now
+            elif now - self.event_end >= self.release:
+                return self.close(now)
+            return None
+
+        if not is_active:
+            self.active_since = None
+            return None
+        if self.active_since is None:
+            self.active_since = now
+        armed = self.closed_at is None or (now - self.closed_at) >= self.cooldown
+        if armed and (now - self.active_since) >= self.hold:
+            self.is_open = True
+            self.event_start = self.active_since
+            self.event_end = now
+            return EVENT_OPENED
+        return None
+
+    def close(self, now=None):
+        """Force-close an open event (e.g. at the end of a session)"""
+        if not self.is_open:
+            return None
+        self.is_open = False
+        self.active_since = None
+        self.closed_at = self.clock() if now is None else now
+        return EVENT_CLOSED
+
+    def reset(self):
+        """Forget all state, as if newly created"""
+        self.active_since = None
+        self.closed_at = None
+        self.is_open = False
+        self.event_start = None
+        self.event_end = None
+
 def put_label(img, text, org=(10, 30), color=(0, 255, 0)):
     cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX,
                 0.7, color, 2, cv2.LINE_AA)
@@ -42,33 +122,94 @@ def draw_box(img, box, color=(0, 255, 0), label=None):
         cv2.putText(img, label, (x1 + 4, y1 - 6),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1, cv2.LINE_AA)
 
-def compute_head_pose_flags(kps, box):
+# Decision thresholds. retune.py replays recorded model outputs
+# (raw_outputs.py) against other values of these and of the hold times.
+YAW_THRESHOLD = 0.45         # |nose offset from the eyes midpoint| / eye distance
+PITCH_RANGE = (0.15, 0.85)   # nose position between eyes (0) and mouth (1) counted as facing the screen
+IDENTITY_THRESHOLD = 0.9     # embedding distance to the reference face (approx 1.0 for VGGface2)
+YOLO_CONF_FLOOR = 0.25       # lowest YOLO confidence passed to the tracker
+
+# Event key -> seconds the condition must persist before an event opens
+EVENT_HOLDS = {
+    "away": 2.5,
+    "multi": 1.0,
+    "phone": 1.0,
+    "book": 1.0,
+    "identity": 1.0,
+    "obstructed": 2.0,
+}
+
+def compute_head_pose(kps):
     """
-    Return True if head pose suggests looking away based on simple yaw/pitch heuristics.
-    kps: np.array shape (5,2) -> [left_eye, right_eye, nose, mouth_left, mouth_right]
+    Return (yaw_ratio, pitch_pos) from facial keypoints.
+    kps: np.array shape (5,2) -> [left_eye, right_eye, nose, mouth_left, mouth_right],
+    or (..., 5, 2) for many faces at once
     """
-    left_eye, right_eye, nose, mouth_l, mouth_r = kps
+    left_eye, right_eye, nose, mouth_l, mouth_r = (kps[..., i, :] for i in range(5))
     eyes_center = (left_eye + right_eye) / 2.0
     mouth_center = (mouth_l + mouth_r) / 2.0
-    eye_dist = np.linalg.norm(right_eye - left_eye) + 1e-6
+    eye_dist = np.linalg.norm(right_eye - left_eye, axis=-1) + 1e-6
     
     # Yaw: horizontal offset of nose from eyes midpoint normalized by eye distance
-    yaw_ratio = (nose[0] - eyes_center[0]) / eye_dist
+    yaw_ratio = (nose[..., 0] - eyes_center[..., 0]) / eye_dist
     
     # Pitch: relative vertical position of nose between eyes and mouth
-    eyes_to_mouth = (mouth_center[1] - eyes_center[1]) + 1e-6
-    pitch_pos = (nose[1] - eyes_center[1]) / eyes_to_mouth  # ~0 near eyes, ~1 near mouth
-    
+    eyes_to_mouth = (mouth_center[..., 1] - eyes_center[..., 1]) + 1e-6
+    pitch_pos = (nose[..., 1] - eyes_center[..., 1]) / eyes_to_mouth  # ~0 near eyes, ~1 near mouth
+    return yaw_ratio, pitch_pos
+
+def compute_head_pose_flags(kps, box):
+    """
+    Return True if head pose suggests looking away based on simple yaw/pitch heuristics.
+    kps: np.array shape (5,2) -> [left_eye, right_eye, nose, mouth_left, mouth_right]
+    """
+    return is_looking_away(*compute_head_pose(kps))
+
+def is_looking_away(yaw_ratio, pitch_pos, yaw_threshold=YAW_THRESHOLD, pitch_range=PITCH_RANGE):
     # Heuristics
     # You may need to tune these thresholds for your specific camera setup
-    yaw_away = abs(yaw_ratio) > 0.45
-    pitch_away = (pitch_pos < 0.15) or (pitch_pos > 0.85)
+    # (retune.py). Also works elementwise on numpy arrays.
+    pitch_min, pitch_max = pitch_range
+    yaw_away = abs(yaw_ratio) > yaw_threshold
+    pitch_away = (pitch_pos < pitch_min) | (pitch_pos > pitch_max)
     
-    return yaw_away or pitch_away
+    return yaw_away | pitch_away
 
 def preprocess_bgr_to_rgb(frame):
     return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
+# Frame quality gate (on a QUALITY_WIDTH-pixel wide grayscale thumbnail)
+QUALITY_WIDTH = 128
+MIN_BRIGHTNESS = 20     # mean gray level: below this the camera is dark or covered
+MAX_BRIGHTNESS = 240    # above this it is blown out (e.g. a light held to the lens)
+MIN_CONTRAST = 10       # gray level std: a covered lens gives a near-flat image
+MIN_SHARPNESS = 8       # Laplacian variance: below this the image is badly out of focus
+
+def assess_frame_quality(frame):
+    """
+    Cheap brightness / contrast / blur check of a BGR frame.
+    Returns (ok, reason, stats) where reason is None, 'dark', 'bright', 'flat' or 'blurred'.
+    """
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, (QUALITY_WIDTH, max(1, h * QUALITY_WIDTH // w)),
+                       interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    mean, std = cv2.meanStdDev(gray)
+    brightness = float(mean[0, 0])
+    contrast = float(std[0, 0])
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+    stats = {"brightness": brightness, "contrast": contrast, "sharpness": sharpness}
+
+    if brightness < MIN_BRIGHTNESS:
+        return False, "dark", stats
+    if brightness > MAX_BRIGHTNESS:
+        return False, "bright", stats
+    if contrast < MIN_CONTRAST:
+        return False, "flat", stats
+    if sharpness < MIN_SHARPNESS:
+        return False, "blurred", stats
+    return True, None, stats
+
 
 # ==========================================
 # Main Detection Logic
@@ -77,6 +218,27 @@ def preprocess_bgr_to_rgb(frame):
 COCO_PHONE_NAME = "cell phone"
 COCO_BOOK_NAME = "book"
 
+# Face detection speed/accuracy presets.
+# detect_width: frame width MTCNN runs at (None = full resolution);
+# min_face_size is in pixels of that downscaled frame and factor is the
+# image pyramid step. An exam candidate's face is large and close to the
+# camera, so the small scales MTCNN spends most of its time on are wasted.
+FACE_PRESETS = {
+    "accurate": {"detect_width": None, "min_face_size": 20, "factor": 0.709, "thresholds": [0.6, 0.7, 0.7]},
+    "balanced": {"detect_width": 480, "min_face_size": 40, "factor": 0.709, "thresholds": [0.6, 0.7, 0.7]},
+    "fast": {"detect_width": 320, "min_face_size": 40, "factor": 0.6, "thresholds": [0.6, 0.7, 0.7]},
+}
+
+# Event key -> counter name in ProctorMonitor.counters
+EVENT_COUNTERS = {
+    "away": "away_events",
+    "multi": "multi_face_events",
+    "phone": "phone_events",
+    "book": "book_events",
+    "identity": "identity_events",
+    "obstructed": "obstructed_events",
+}
+
 class ProctorMonitor:
     """
     Per-frame monitoring: 
@@ -86,30 +248,61 @@ class ProctorMonitor:
     4. Identity Verification (InceptionResnetV1)
     """
 
-    def __init__(self, device: str | None = None):
+    def __init__(self, device: str | None = None, clock=time.monotonic,
+                 event_release: float = 1.0, event_cooldown: float = 0.0,
+                 use_model_cache: bool = True, cpu_budget: CpuBudget | None = None,
+                 face_preset: str = "balanced", yolo_interval: float = 0.6):
         # Automatically detect device
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         print(f"[ProctorMonitor] Using device: {self.device}")
 
+        # Cap torch / OpenCV threads so inference doesn't starve the GUI;
+        # the inference thread calls cpu_budget.pin_current_thread() itself
+        self.cpu_budget = cpu_budget or CpuBudget.default()
+        self.cpu_budget.apply()
+
         # Initialize MTCNN for face detection
-        self.mtcnn = MTCNN(keep_all=True, device=self.device)
+        self.set_face_preset(face_preset)
         
-        # Initialize Face Recognition (vggface2)
-        self.resnet = InceptionResnetV1(pretrained='vggface2').eval().to(self.device)
+        # Initialize Face Recognition (vggface2) and YOLO for object detection.
+        # Compiled artifacts from data/cache/models load much faster than
+        # building the models; the first run (or a version change) builds them.
+        # Ensure 'yolov8n.pt' is available or allowed to download
+        self.resnet = self.yolo = None
+        if use_model_cache:
+            try:
+                self.resnet = load_face_embedder(self.device)
+                self.yolo = load_object_detector(self.device)
+            except Exception as e:
+                print(f"⚠️ Model cache unavailable, building models directly: {e}")
+        if self.resnet is None:
+            self.resnet = InceptionResnetV1(pretrained='vggface2').eval().to(self.device)
+        if self.yolo is None:
+            self.yolo = YOLO("yolov8n.pt")
+            self.yolo.to(self.device)
         self.reference_embedding = None
         self.identity_confirmed = False
-        
-        # Initialize YOLO for object detection
-        # Ensure 'yolov8n.pt' is available or allowed to download
-        self.yolo = YOLO("yolov8n.pt") 
-        self.yolo.to(self.device)
 
-        # Event timers (seconds) - to prevent instant triggering
-        self.away_flag = RollingFlag(hold_seconds=2.5)
-        self.multi_flag = RollingFlag(hold_seconds=1.0)
-        self.phone_flag = RollingFlag(hold_seconds=1.0)
-        self.book_flag = RollingFlag(hold_seconds=1.0)
-        self.identity_flag = RollingFlag(hold_seconds=1.0)
+        # Event timers (seconds) - to prevent instant triggering.
+        # Each behaviour produces one event per continuous interval.
+        self.clock = clock
+        def event_flag(hold):
+            return EventFlag(hold_seconds=hold, release_seconds=event_release,
+                             cooldown_seconds=event_cooldown, clock=clock)
+        self.away_flag = event_flag(EVENT_HOLDS["away"])
+        self.multi_flag = event_flag(EVENT_HOLDS["multi"])
+        self.phone_flag = event_flag(EVENT_HOLDS["phone"])
+        self.book_flag = event_flag(EVENT_HOLDS["book"])
+        self.identity_flag = event_flag(EVENT_HOLDS["identity"])
+        self.obstructed_flag = event_flag(EVENT_HOLDS["obstructed"])
+        self.event_flags = {
+            "away": self.away_flag,
+            "multi": self.multi_flag,
+            "phone": self.phone_flag,
+            "book": self.book_flag,
+            "identity": self.identity_flag,
+            "obstructed": self.obstructed_flag,
+        }
 
         # Counters for stats
         self.counters = {
@@ -117,61 +310,105 @@ class ProctorMonitor:
             "multi_face_events": 0,
             "phone_events": 0, 
             "book_events": 0,
-            "identity_events": 0
+            "identity_events": 0,
+            "obstructed_events": 0
         }
 
-        # Optimization: run YOLO less frequently than face detection
+        # Optimization: run YOLO less frequently than face detection;
+        # the tracker carries phones/books between runs
         self.last_yolo_time = 0.0
-        self.yolo_interval = 0.6  # seconds
+        self.yolo_interval = yolo_interval  # seconds
         self.last_objects = []
+        self.object_classes = None  # YOLO class id -> name, phone and book only
+        self.tracker = ObjectTracker()
+
+        # Optional per-frame telemetry (telemetry.TelemetryRecorder)
+        self.telemetry = None
+        # Optional event_bus.EventBus that opened/closed violations are published to
+        self.bus = None
+        # Optional metrics.ProctorMetrics recording per-stage latency
+        self.metrics = None
+        # Optional raw_outputs.RawOutputRecorder keeping model outputs for retune.py
+        self.raw_outputs = None
+
+    def decision_settings(self):
+        """Thresholds and hold times the violation decisions use (stored with raw outputs)"""
+        return {
+            "yaw_threshold": YAW_THRESHOLD,
+            "pitch_range": list(PITCH_RANGE),
+            "identity_threshold": IDENTITY_THRESHOLD,
+            "yolo_conf": YOLO_CONF_FLOOR,
+            "yolo_interval": self.yolo_interval,
+            "holds": {key: flag.hold for key, flag in self.event_flags.items()},
+            "release": self.away_flag.release,
+            "cooldown": self.away_flag.cooldown,
+            "tracker": self.tracker.settings(),
+        }
+
+    def set_face_preset(self, name):
+        """Switch face detection to one of FACE_PRESETS"""
+        preset = FACE_PRESETS[name]
+        self.face_preset = name
+        self.face_detect_width = preset["detect_width"]
+        self.mtcnn = MTCNN(keep_all=True, device=self.device, min_face_size=preset["min_face_size"],
+                           factor=preset["factor"], thresholds=preset["thresholds"])
+
+    def detect_faces(self, rgb):
+        """
+        MTCNN on the frame downscaled to the preset's detect width.
+        Returns (boxes, probs, landmarks) in full-resolution coordinates.
+        """
+        h, w = rgb.shape[:2]
+        scale = 1.0
+        if self.face_detect_width and w > self.face_detect_width:
+            scale = self.face_detect_width / w
+            rgb = cv2.resize(rgb, (self.face_detect_width, int(round(h * scale))),
+                             interpolation=cv2.INTER_AREA)
+        boxes, probs, landmarks = self.mtcnn.detect(rgb, landmarks=True)
+        if boxes is not None and scale != 1.0:
+            boxes = boxes / scale
+            landmarks = landmarks / scale
+        return boxes, probs, landmarks
 
     def set_reference_face(self, frame_bgr):
         """Capture embedding for the first face found"""
         if frame_bgr is None: return False
         rgb = preprocess_bgr_to_rgb(frame_bgr)
         try:
-            # Get cropped face tensor directly
-            img_cropped = self.mtcnn(rgb)
-            if img_cropped is not None:
-                # mtcnn returns list of tensors if keep_all=True
-                # But here we want the main face. 
-                # If keep_all=True, it returns a LIST of tensors.
-                # Use detect to find largest face first?
-                # Simpler: just use detect to get box, then crop/resize manually or use mtcnn on crop
+            # Detect at the preset's scale; boxes come back in full-resolution
+            # coordinates so the crop keeps full detail
+            boxes, probs, _ = self.detect_faces(rgb)
+            if boxes is not None and len(boxes) > 0:
+                # Pick largest
+                areas = [(b[2]-b[0])*(b[3]-b[1]) for b in boxes]
+                idx = int(np.argmax(areas))
+                box = boxes[idx]
                 
-                # Let's rely on detect first to pick the best face (largest)
-                boxes, probs = self.mtcnn.detect(rgb)
-                if boxes is not None and len(boxes) > 0:
-                    # Pick largest
-                    areas = [(b[2]-b[0])*(b[3]-b[1]) for b in boxes]
-                    idx = int(np.argmax(areas))
-                    box = boxes[idx]
-                    
-                    # Crop and resize to 160x160
-                    x1, y1, x2, y2 = [int(n) for n in box]
-                    padding = 10
-                    h, w, _ = rgb.shape
-                    x1 = max(0, x1 - padding)
-                    y1 = max(0, y1 - padding)
-                    x2 = min(w, x2 + padding)
-                    y2 = min(h, y2 + padding)
-                    
-                    face_img = rgb[y1:y2, x1:x2]
-                    if face_img.size == 0: return False
-                    
-                    face_resized = cv2.resize(face_img, (160, 160))
-                    # Normalize (0-1) and standardized for Inception
-                    face_tensor = torch.from_numpy(face_resized).permute(2, 0, 1).float() / 255.0
-                    info_mean = 127.5/255.0 # standard
-                    face_tensor = (face_tensor - 0.5) / 0.5 # Approximate standardization
-                    
-                    # Get embedding
-                    with torch.no_grad():
-                         self.reference_embedding = self.resnet(face_tensor.unsqueeze(0).to(self.device))
-                    
-                    self.identity_confirmed = True
-                    print("✅ Identity Locked with Deep Learning")
-                    return True
+                # Crop and resize to 160x160
+                x1, y1, x2, y2 = [int(n) for n in box]
+                padding = 10
+                h, w, _ = rgb.shape
+                x1 = max(0, x1 - padding)
+                y1 = max(0, y1 - padding)
+                x2 = min(w, x2 + padding)
+                y2 = min(h, y2 + padding)
+                
+                face_img = rgb[y1:y2, x1:x2]
+                if face_img.size == 0: return False
+                
+                face_resized = cv2.resize(face_img, (160, 160))
+                # Normalize (0-1) and standardized for Inception
+                face_tensor = torch.from_numpy(face_resized).permute(2, 0, 1).float() / 255.0
+                info_mean = 127.5/255.0 # standard
+                face_tensor = (face_tensor - 0.5) / 0.5 # Approximate standardization
+                
+                # Get embedding
+                with torch.no_grad():
+                     self.reference_embedding = self.resnet(face_tensor.unsqueeze(0).to(self.device))
+                
+                self.identity_confirmed = True
+                print("✅ Identity Locked with Deep Learning")
+                return True
         except Exception as e:
             print(f"Set Reference Error: {e}")
         return False
@@ -186,41 +423,62 @@ class ProctorMonitor:
         if frame_bgr is None:
             return frame_bgr, {"face_count": 0, "away_now": False, "phone_present": False, "book_present": False, "identity_mismatch": False, "counters": self.counters}
 
+        timer = self.metrics.frame_timer() if self.metrics is not None else NULL_FRAME_TIMER
         h, w = frame_bgr.shape[:2]
-        rgb = preprocess_bgr_to_rgb(frame_bgr)
         annotated = frame_bgr.copy()
 
+        # ---------------------------
+        # 0. Frame quality gate
+        # ---------------------------
+        # A dark, covered or badly blurred camera would only ever report "no
+        # face"; skip the models and raise an obstruction event instead
+        quality_ok, quality_reason, quality = assess_frame_quality(frame_bgr)
+        obstructed_state = self.obstructed_flag.update(not quality_ok)
+        timer.mark("quality")
+        if not quality_ok:
+            result = self._obstructed_frame(annotated, quality_reason, quality, obstructed_state)
+            timer.done(obstructed=True)
+            return result
+
+        rgb = preprocess_bgr_to_rgb(frame_bgr)
+        timer.mark("preprocess")
+
         # ---------------------------
         # 1. Face & Head Pose (MTCNN)
         # ---------------------------
         # Using try-except to handle MTCNN errors gracefully if any
         try:
-             boxes, probs, landmarks = self.mtcnn.detect(rgb, landmarks=True)
+             boxes, probs, landmarks = self.detect_faces(rgb)
         except Exception as e:
              # Fallback if detection fails
              print(f"MTCNN Error: {e}")
              boxes, probs, landmarks = None, None, None
+        timer.mark("face_detect")
              
         face_count = 0 if boxes is None else len(boxes)
 
         # Multi-face detection
-        multi_trigger = self.multi_flag.update(face_count > 1)
-        if multi_trigger:
-            self.counters["multi_face_events"] += 1
+        states = {}
+        states["multi"] = self.multi_flag.update(face_count > 1)
+        states["obstructed"] = obstructed_state
 
         # Looking Away detection
         away_now = False  # Changed: Assume NOT away if no face (to avoid spam if camera blips)
         identity_mismatch = False
+        yaw_ratio = pitch_pos = embed_dist = float("nan")
+        primary = -1
         
         if boxes is not None and landmarks is not None and face_count > 0:
             # Pick primary face (largest area)
             areas = [(b[2]-b[0])*(b[3]-b[1]) for b in boxes]
             idx = int(np.argmax(areas))
+            primary = idx
             box = boxes[idx]
             kps = landmarks[idx]  # (5,2) points
 
             # Check head pose
-            away_now = compute_head_pose_flags(kps, box)
+            yaw_ratio, pitch_pos = compute_head_pose(kps)
+            away_now = is_looking_away(yaw_ratio, pitch_pos)
             
             # Check Identity (if verified)
             if self.identity_confirmed and self.reference_embedding is not None:
@@ -243,9 +501,10 @@ class ProctorMonitor:
                             curr_emb = self.resnet(face_tensor.unsqueeze(0).to(self.device))
                             # Euclidean distance
                             dist = (curr_emb - self.reference_embedding).norm().item()
+                            embed_dist = dist
                             
                             # Threshold (approx 1.0 for VGGface2, tune as needed)
-                            if dist > 0.9: 
+                            if dist > IDENTITY_THRESHOLD:
                                 identity_mismatch = True
                                 cv2.putText(annotated, f"ID: MISMATCH ({dist:.2f})", (x1, y1-20), 
                                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
@@ -263,77 +522,47 @@ class ProctorMonitor:
             for (lx, ly) in kps:
                 cv2.circle(annotated, (int(lx), int(ly)), 2, (0, 255, 255), -1)
 
-        away_trigger = self.away_flag.update(away_now)
-        if away_trigger:
-            self.counters["away_events"] += 1
-            
-        identity_trigger = self.identity_flag.update(identity_mismatch)
-        if identity_trigger:
-            self.counters["identity_events"] += 1
+        states["away"] = self.away_flag.update(away_now)
+        states["identity"] = self.identity_flag.update(identity_mismatch)
+        timer.mark("pose_identity")
 
         # ---------------------------
         # 2. Object Detection (YOLO)
         # ---------------------------
-        now = time.time()
+        now = self.clock()
         detect_now = (now - self.last_yolo_time) >= self.yolo_interval
-        phone_present = False
-        book_present = False
 
         if detect_now:
             self.last_yolo_time = now
-            # Resize for speed optimization
-            short_side = 320 # Reduced from 640 for speed
-            scale = short_side / max(h, w)
-            new_w, new_h = int(w*scale), int(h*scale)
-            resized = cv2.resize(rgb, (new_w, new_h))
-            
-            # Run YOLO
-            # stream=True is faster
-            results = self.yolo.predict(
-                resized,
-                imgsz=short_side, 
-                conf=0.4,
-                verbose=False,
-                device=self.device
-            )
-            
-            found = []
-            for r in results:
-                names = r.names
-                for b in r.boxes:
-                    cls_id = int(b.cls.item())
-                    name = names.get(cls_id, str(cls_id))
-                    conf = float(b.conf.item())
-                    
-                    if name in (COCO_PHONE_NAME, COCO_BOOK_NAME):
-                        # Scale bbox back to original frame size
-                        x1, y1, x2, y2 = b.xyxy[0].cpu().numpy().tolist()
-                        x1, y1, x2, y2 = [v/scale for v in (x1, y1, x2, y2)]
-                        found.append((name, conf, (x1, y1, x2, y2)))
-            
-            self.last_objects = found
-        else:
-             # Check consistency with previous frames for flags
-             pass
-        
-        # Check objects from last detection
-        for name, conf, box in self.last_objects:
-             if name == COCO_PHONE_NAME: phone_present = True
-             if name == COCO_BOOK_NAME: book_present = True
+            self.last_objects = self.detect_objects(rgb)
+            timer.mark("yolo")
+            self.tracker.update(self.last_objects, now)
+
+        # Presence and confidence come from the tracks, which accumulate
+        # evidence across YOLO runs and survive a single missed detection
+        phone_present, phone_conf = self.tracker.presence(COCO_PHONE_NAME)
+        book_present, book_conf = self.tracker.presence(COCO_BOOK_NAME)
 
-        # Draw tracked objects
-        for name, conf, box in self.last_objects:
-            color = (0, 0, 255) if name == COCO_PHONE_NAME else (255, 0, 0)
-            draw_box(annotated, box, color=color, label=f"{name} {conf:.2f}")
+        # Draw tracked objects (extrapolated between YOLO runs)
+        for track, box in self.tracker.active(now):
+            color = (0, 0, 255) if track.name == COCO_PHONE_NAME else (255, 0, 0)
+            draw_box(annotated, box, color=color, label=f"{track.name} {track.score:.2f}")
 
         # Update persistent flags
-        phone_trigger = self.phone_flag.update(phone_present)
-        book_trigger = self.book_flag.update(book_present)
-        
-        if phone_trigger:
-            self.counters["phone_events"] += 1
-        if book_trigger:
-            self.counters["book_events"] += 1
+        states["phone"] = self.phone_flag.update(phone_present)
+        states["book"] = self.book_flag.update(book_present)
+        timer.mark("tracking")
+        triggers, events = self._collect_events(states, annotated)
+
+        if self.telemetry is not None:
+            flags = ((FLAG_AWAY if away_now else 0) | (FLAG_PHONE if phone_present else 0)
+                     | (FLAG_BOOK if book_present else 0) | (FLAG_IDENTITY if identity_mismatch else 0)
+                     | (FLAG_MULTI if face_count > 1 else 0))
+            self.telemetry.record(now, face_count, yaw_ratio, pitch_pos, embed_dist,
+                                  phone_conf, book_conf, detect_now, flags)
+        if self.raw_outputs is not None:
+            self.raw_outputs.record(now, boxes, probs, landmarks, primary, embed_dist,
+                                    self.last_objects if detect_now else None)
 
         # ---------------------------
         # 3. Annotations / HUD
@@ -346,24 +575,137 @@ class ProctorMonitor:
         put_label(annotated, f"Book: {'YES' if book_present else 'NO'}", (10, 112), 
                  color=(0, 0, 255) if book_present else (0, 255, 0))
         
-        stats_str = f"Events A/M/P/B/I: {self.counters['away_events']}/{self.counters['multi_face_events']}/{self.counters['phone_events']}/{self.counters['book_events']}/{self.counters['identity_events']}"
-        put_label(annotated, stats_str, (10, 140))
+        self._put_event_stats(annotated)
 
         info = {
             "face_count": face_count,
             "away_now": away_now,
             "phone_present": phone_present,
             "book_present": book_present,
+            "obstructed": False,
+            "quality": quality,
             "counters": self.counters,
-            "triggers": {
-                "away": away_trigger,
-                "multi": multi_trigger,
-                "phone": phone_trigger,
-                "book": book_trigger,
-                "identity": identity_trigger
-            }
+            # True only on the frame an event opens
+            "triggers": triggers,
+            # Opened/closed events with their interval
+            "events": events
         }
+        timer.mark("events_annotate")
+        timer.done()
         return annotated, info
 
+    def _put_event_stats(self, annotated):
+        stats_str = f"Events A/M/P/B/I/O: {self.counters['away_events']}/{self.counters['multi_face_events']}/{self.counters['phone_events']}/{self.counters['book_events']}/{self.counters['identity_events']}/{self.counters['obstructed_events']}"
+        put_label(annotated, stats_str, (10, 140))
+
+    def _obstructed_frame(self, annotated, reason, quality, obstructed_state):
+        """Result for a frame that failed the quality gate: no models run, nothing else observed"""
+        now = self.clock()
+        states = {key: flag.update(False) for key, flag in self.event_flags.items()
+                  if key != "obstructed"}
+        states["obstructed"] = obstructed_state
+        triggers, events = self._collect_events(states, annotated)
+
+        if self.telemetry is not None:
+            nan = float("nan")
+            self.telemetry.record(now, 0, nan, nan, nan, 0.0, 0.0, False, FLAG_OBSTRUCTED)
+        if self.raw_outputs is not None:
+            self.raw_outputs.record_obstructed(now)
+
+        put_label(annotated, f"CAMERA OBSTRUCTED ({reason})", (10, 28), color=(0, 0, 255))
+        self._put_event_stats(annotated)
+        info = {
+            "face_count": 0,
+            "away_now": False,
+            "phone_present": False,
+            "book_present": False,
+            "obstructed": True,
+            "quality": quality,
+            "counters": self.counters,
+            "triggers": triggers,
+            "events": events
+        }
+        return annotated, info
+
+    def detect_objects(self, rgb):
+        """Run YOLO on an RGB frame; returns [(name, conf, (x1, y1, x2, y2))] of phones and books"""
+        h, w = rgb.shape[:2]
+        # Resize for speed optimization
+        short_side = YOLO_IMGSZ # Reduced from 640 for speed; the cached model is exported at this size
+        scale = short_side / max(h, w)
+        new_w, new_h = int(w*scale), int(h*scale)
+        resized = cv2.resize(rgb, (new_w, new_h))
+        
+        if self.object_classes is None:
+            self.object_classes = {int(i): n for i, n in self.yolo.names.items()
+                                   if n in (COCO_PHONE_NAME, COCO_BOOK_NAME)}
+        if not self.object_classes:
+            return []
+
+        # Run YOLO, keeping only phone/book classes in NMS. The low
+        # confidence floor lets the tracker accumulate weak detections.
+        results = self.yolo.predict(
+            resized,
+            imgsz=short_side, 
+            conf=YOLO_CONF_FLOOR,
+            classes=list(self.object_classes),
+            verbose=False,
+            device=self.device
+        )
+        
+        # One device->host copy for all boxes: (n, 6) = x1, y1, x2, y2, conf, cls
+        data = results[0].boxes.data.cpu().numpy()
+        if len(data) == 0:
+            return []
+        # Scale bboxes back to original frame size
+        boxes = (data[:, :4] / scale).tolist()
+        return [(self.object_classes[int(c)], float(conf), tuple(box))
+                for box, conf, c in zip(boxes, data[:, 4], data[:, 5])]
+
+    def _collect_events(self, states, frame=None):
+        """
+        Turn EventFlag transitions into triggers, event records and counters,
+        and publish them to the bus (opened events carry a copy of `frame`)
+        """
+        triggers = {}
+        events = []
+        for key, state in states.items():
+            triggers[key] = state == EVENT_OPENED
+            if state is None:
+                continue
+            if state == EVENT_OPENED:
+                self.counters[EVENT_COUNTERS[key]] += 1
+            flag = self.event_flags[key]
+            events.append({
+                "type": key,
+                "state": state,
+                "start": flag.event_start,
+                "duration": flag.duration,
+            })
+            if self.bus is not None:
+                snapshot = frame.copy() if frame is not None and state == EVENT_OPENED else None
+                # A close is reported `release` after the last active frame
+                lag = flag.closed_at - flag.event_end if state == EVENT_CLOSED else 0.0
+                self.bus.publish(ViolationEvent(state, key, flag.event_start, flag.duration,
+                                                frame=snapshot, lag=lag))
+        return triggers, events
+
+    def close_events(self):
+        """Close any open events (end of session); returns the closed event records"""
+        states = {key: flag.close() for key, flag in self.event_flags.items()}
+        return self._collect_events({k: v for k, v in states.items() if v})[1]
+
+    def reset(self):
+        """Start over for a new recording: events, counters, YOLO cache and reference face"""
+        for flag in self.event_flags.values():
+            flag.reset()
+        for key in self.counters:
+            self.counters[key] = 0
+        self.last_yolo_time = 0.0
+        self.last_objects = []
+        self.tracker.reset()
+        self.reference_embedding = None
+        self.identity_confirmed = False
+
     def cleanup(self):
         pass
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+Violation event bus
+ProctorMonitor publishes each opened/closed violation as a ViolationEvent;
+sinks (database, UI feed, evidence snapshots, audit log, network) each
+consume on their own thread from a bounded queue. publish() never waits
+longer than a sink's block timeout, so a slow sink cannot stall frame
+processing; what happens when a sink's queue is full is set per sink:
+
+    DROP_OLDEST   discard the oldest queued event (live views)
+    DROP_NEWEST   discard the incoming event (expensive, best-effort work)
+    BLOCK         wait up to block_timeout for room, then drop the event
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+# Detector event key -> (violation type, message)
+VIOLATION_TYPES = {
+    'away': ('looking_away', '😒 Looking Away'),
+    'phone': ('phone_detected', '📱 Phone Detected'),
+    'book': ('book_detected', '📖 Book Detected'),
+    'multi': ('multiple_faces', '👥 Multiple Faces Detected'),
+    'identity': ('identity_mismatch', '🕵️ Identity Mismatch'),
+    'obstructed': ('camera_obstructed', '📷 Camera Obstructed'),
+}
+SEVERE_KEYS = ('phone', 'book', 'identity', 'obstructed')
+
+# Event kinds; the same values as detector.EVENT_OPENED / EVENT_CLOSED
+OPENED = "opened"
+CLOSED = "closed"
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+
+
+class ViolationEvent:
+    """
+    One violation transition. `start` and `duration` are on the detector's
+    clock; `t` is wall time. `lag` is how long after the interval's end the
+    transition happened (the release wait for closed events, 0 for opened).
+    `frame` is the annotated frame for opened events (None otherwise) and
+    is never serialized.
+    """
+
+    __slots__ = ("kind", "key", "type", "message", "t", "start", "duration", "confidence", "frame",
+                 "lag")
+
+    def __init__(self, kind, key, start, duration, confidence=1.0, frame=None, t=None, lag=0.0):
+        self.kind = kind
+        self.key = key
+        self.type, self.message = VIOLATION_TYPES[key]
+        self.t = time.time() if t is None else t
+        self.start = start
+        self.duration = duration
+        self.confidence = confidence
+        self.frame = frame
+        self.lag = lag
+
+    @property
+    def end_t(self):
+        """Wall time the interval ended (so far, for opened events)"""
+        return self.t - self.lag
+
+    @property
+    def start_t(self):
+        """Wall time the interval started (the condition began, before the hold)"""
+        return self.end_t - self.duration
+
+    @property
+    def severe(self):
+        return self.key in SEVERE_KEYS
+
+    def to_dict(self):
+        return {
+            "t": round(self.t, 3), "kind": self.kind, "key": self.key, "type": self.type,
+            "message": self.message, "duration": round(self.duration, 2),
+            "confidence": self.confidence,
+        }
+
+
+class Sink:
+    """
+    Base sink: a daemon thread draining a bounded queue into handle().
+    Subclasses implement handle(event) and optionally close().
+    """
+
+    def __init__(self, name, capacity=256, overflow=DROP_OLDEST, block_timeout=0.05):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.name = name
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.queue = queue.Queue(maxsize=capacity)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+        self._thread = None
+
+    def offer(self, event):
+        """Enqueue according to the overflow policy; returns False if an event was dropped"""
+        try:
+            if self.overflow == BLOCK:
+                self.queue.put(event, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(event)
+        except queue.Full:
+            if self.overflow != DROP_OLDEST:
+                self.dropped += 1
+                return False
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                pass
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+            return False
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"sink-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Deliver what is queued (up to `timeout`), then stop the thread"""
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            print(f"⚠️ Sink {self.name} did not drain in {timeout:.1f}s")
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    self.close()
+                    return
+                self.handle(event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Sink {self.name} error: {e}")
+
+    def handle(self, event):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"queued": self.queue.qsize(), "max_depth": self.max_depth, "delivered": self.delivered,
+                "dropped": self.dropped, "errors": self.errors, "overflow": self.overflow}
+
+
+class EventBus:
+    """Fans each published ViolationEvent out to every subscribed sink"""
+
+    def __init__(self):
+        self.sinks = []
+        self.published = 0
+        self.started = False
+
+    def subscribe(self, sink):
+        self.sinks.append(sink)
+        if self.started:
+            sink.start()
+        return sink
+
+    def publish(self, event):
+        self.published += 1
+        for sink in self.sinks:
+            sink.offer(event)
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+        self.started = True
+
+    def stop(self, timeout=2.0):
+        """Drain and stop all sinks; returns per-sink stats"""
+        for sink in self.sinks:
+            sink.stop(timeout)
+        self.started = False
+        return {sink.name: sink.stats() for sink in self.sinks}
+
+
+# ==========================================
+# Sinks
+# ==========================================
+
+class DatabaseSink(Sink):
+    """Opened events start (or merge into) a violation interval; closed events extend it"""
+
+    def __init__(self, auth, session_id, capacity=1024):
+        # Violations are rare; a full queue means the database is stuck,
+        # so wait briefly rather than silently losing records
+        super().__init__("db", capacity, BLOCK)
+        self.auth = auth
+        self.session_id = session_id
+
+    def handle(self, event):
+        if event.kind == OPENED:
+            self.auth.log_violation(self.session_id, event.type, event.message, event.confidence,
+                                    ts=event.start_t)
+        else:
+            self.auth.extend_violation(self.session_id, event.type, event.end_t)
+
+
+class JsonlAuditSink(Sink):
+    """Append-only audit trail, one JSON object per event, flushed per line"""
+
+    def __init__(self, path, capacity=1024):
+        super().__init__("audit", capacity, BLOCK)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def handle(self, event):
+        self._file.write(json.dumps(event.to_dict(), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class EvidenceSink(Sink):
+    """JPEG snapshot of the annotated frame when an event opens"""
+
+    def __init__(self, directory, quality=85, capacity=8):
+        # Encoding is the slowest work on the bus; under a burst keep the
+        # snapshots already queued and skip new ones
+        super().__init__("evidence", capacity, DROP_NEWEST)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.quality = quality
+
+    def handle(self, event):
+        if event.kind != OPENED or event.frame is None:
+            return
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(event.t))
+        path = os.path.join(self.directory, f"{stamp}_{int(event.t * 1000) % 1000:03d}_{event.type}.jpg")
+        cv2.imwrite(path, event.frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+
+
+class CallbackSink(Sink):
+    """Calls fn(event) on the sink thread (UI bridge signals, network forwarders)"""
+
+    def __init__(self, name, fn, capacity=256, overflow=DROP_OLDEST):
+        super().__init__(name, capacity, overflow)
+        self.fn = fn
+
+    def handle(self, event):
+        self.fn(event)
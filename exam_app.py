@@ -7,6 +7,11 @@ import sys
 import cv2
 import os
 import json
+import math
+import socket
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
@@ -15,32 +20,135 @@ import numpy as np
 
 # Assuming auth and detector are in the same directory and have been implemented/verified
 from auth import AuthManager
-from detector import ProctorMonitor
+from detector import ProctorMonitor, EVENT_COUNTERS
+from telemetry import TelemetryRecorder, new_run_dir
+from raw_outputs import RawOutputRecorder
+from question_bank import CACHE_ERRORS, OPTION_COUNT, load_question_bank
+from paper import PaperGenerator, session_seed
+from journal import AnswerJournal
+from session_summary import SessionSummary
+from watchdog import EventLoopWatchdog
+from frame_source import CameraSource
+from supervisor import StationPublisher
+from metrics import ProctorMetrics, parse_endpoint
+from event_bus import (EventBus, DatabaseSink, JsonlAuditSink, EvidenceSink, CallbackSink,
+                       OPENED, DROP_OLDEST, BLOCK, VIOLATION_TYPES)
+
+QUESTION_BANK_PATH = os.path.join('data', 'questions.txt')
+PAPER_SIZE = 20
+FEED_CAPACITY = 100  # violations kept in the on-screen feed; the full history is in the DB
 
 
 class VideoThread(QThread):
     """Thread for camera processing"""
     frame_ready = pyqtSignal(np.ndarray, dict) # Changed signal signature
+    source_failed = pyqtSignal(str)  # why the frame source stopped, e.g. "could not be opened"
     
-    def __init__(self, detector):
+    def __init__(self, detector, source=None):
         super().__init__()
         self.detector = detector
+        # frame_source.FrameSource; the default webcam if not given
+        self.source = source or CameraSource()
         self.running = False
     
     def run(self):
         self.running = True
-        cap = cv2.VideoCapture(0)
+        self.detector.cpu_budget.pin_current_thread()
+        if not self.source.open():
+            self.source.close()
+            self.source_failed.emit("could not be opened")
+            return
+        # Consume frames at the source rate; a camera read already blocks
+        # until the next frame, so this only paces files and generators
+        interval = 1.0 / self.source.fps
+        next_at = last_frame_at = time.monotonic()
+        failure = None
         while self.running:
-            ret, frame = cap.read()
-            if ret:
+            if self.source.finished:
+                failure = "ended"
+                break
+            frame = self.source.read()
+            if frame is not None:
+                last_frame_at = time.monotonic()
                 processed_frame, info = self.detector.process_frame(frame)
                 self.frame_ready.emit(processed_frame, info)
-            self.msleep(33)
-        cap.release()
+            elif (self.source.stall_timeout is not None
+                  and time.monotonic() - last_frame_at >= self.source.stall_timeout):
+                failure = "stopped delivering frames"
+                break
+            now = time.monotonic()
+            next_at += interval
+            if now - next_at >= interval and self.detector.metrics is not None:
+                # Whole frame intervals that passed while the detector was busy
+                self.detector.metrics.dropped_frames.inc(amount=int((now - next_at) // interval))
+            next_at = max(next_at, now)
+            self.msleep(int(max(0.0, next_at - time.monotonic()) * 1000))
+        self.source.close()
+        # Only an exam that is still running is left unproctored
+        if failure is not None and self.running:
+            self.source_failed.emit(failure)
     
-    def stop(self):
+    def stop(self, wait=True):
         self.running = False
-        self.wait()
+        if wait:
+            self.wait()
+
+class ViolationFeed(QObject):
+    """Carries bus events from the UI sink's thread to the GUI thread"""
+    event = pyqtSignal(object)
+
+
+class ViolationFeedModel(QAbstractListModel):
+    """
+    Newest-first list of the last `capacity` violations. Older rows are
+    dropped from memory (the database keeps the full history), so a long
+    session neither grows memory nor slows down insertion.
+    """
+
+    def __init__(self, capacity=FEED_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.rows = deque()     # [key, text, severe], newest first
+        self.open_rows = {}     # event key -> row entry of the open event
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        _, text, severe = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return text
+        if role == Qt.ForegroundRole:
+            return QColor("#FF5252") if severe else QColor("#FFEB3B")  # red severe, yellow warning
+        return None
+
+    def opened(self, key, text, severe):
+        if len(self.rows) >= self.capacity:
+            last = len(self.rows) - 1
+            self.beginRemoveRows(QModelIndex(), last, last)
+            evicted = self.rows.pop()
+            if self.open_rows.get(evicted[0]) is evicted:
+                del self.open_rows[evicted[0]]
+            self.endRemoveRows()
+        entry = [key, text, severe]
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.rows.appendleft(entry)
+        self.endInsertRows()
+        self.open_rows[key] = entry
+
+    def closed(self, key, suffix):
+        entry = self.open_rows.pop(key, None)
+        if entry is None:
+            return  # already scrolled out of the feed
+        entry[1] = f"{entry[1]} {suffix}"
+        for row, candidate in enumerate(self.rows):
+            if candidate is entry:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+                break
+
 
 class LoginWindow(QWidget):
     """Modern Login Screen"""
@@ -497,26 +605,59 @@ class DashboardWindow(QWidget):
 
 class ExamWindow(QWidget):
     """Professional CBT Exam Window"""
+    # Final violation total, once the finalizer has reconciled it with the detector
+    violations_final = pyqtSignal(int)
     
-    def __init__(self, user_data, auth_manager):
+    def __init__(self, user_data, auth_manager, exam_code="NET-101", resume_session=None,
+                 frame_source=None, supervisor=None, metrics=None, detector=None, raw_outputs=False):
         super().__init__()
         self.user_data = user_data
         self.auth = auth_manager
-        self.detector = ProctorMonitor()
-        
-        # Exam data
-        self.questions = self.load_questions()
+        self.exam_code = exam_code
+        # In-progress session to restore (journal.find_resumable_session)
+        self.resume_session = resume_session
+        self.frame_source = frame_source
+        # "host:port" or (host, port) of the supervisor console to publish this station to
+        self.supervisor = supervisor
+        self.publisher = None
+        # Keep raw model outputs for offline threshold re-tuning (retune.py)
+        self.raw_outputs = raw_outputs
+        self.bus = None
+        self.detector = detector or ProctorMonitor()
+
+        # Opt-in Prometheus endpoint, "[host:]port" or (host, port)
+        self.metrics = None
+        if metrics:
+            self.metrics = ProctorMetrics()
+            self.metrics.watch_monitor(self.detector)
+            self.metrics.instrument_auth(self.auth)
+            self.metrics.serve(*parse_endpoint(metrics))
+        
+        # Exam data (the paper is drawn once the session id is known)
+        self.questions = []
+        self.from_bank = False  # False when the built-in fallback questions are used
         self.current_q = 0
         self.answers = {}
         self.score = 0
         
         # Session state
         self.session_id = None
-        self.violations = []
+        self.violation_feed_model = ViolationFeedModel()
+        self.journal = None
+        self.summary = None     # SessionSummary, kept current on every answer and violation
+        self.prior_violations = {}  # per-type counts recorded before a crash (resumed session)
+        self.result_box = None  # result dialog, while it is up
+        self.finalizer = None   # thread that shuts down and writes the session after submission
+        self.source_down = False  # frame source failed; exam on hold until frames arrive
         
         # Timer
         self.exam_duration = 30 * 60  # 30 minutes in seconds
         self.time_left = self.exam_duration
+        self.deadline = None            # time.monotonic() at which time runs out
+        self.last_checkpoint = None     # time_left last written to the journal
+        
+        # Event-loop latency / stall profiling for the exam window
+        self.watchdog = EventLoopWatchdog()
         
         self.init_ui()
         self.start_exam()
@@ -541,8 +682,8 @@ class ExamWindow(QWidget):
         split.setSpacing(0)
         
         # LEFT: Questions (65%)
-        questions_panel = self.create_questions_panel()
-        split.addWidget(questions_panel, 65)
+        self.questions_panel = self.create_questions_panel()
+        split.addWidget(self.questions_panel, 65)
         
         # RIGHT: Camera (35%)
         camera_panel = self.create_camera_panel()
@@ -554,11 +695,17 @@ class ExamWindow(QWidget):
         
         # Setup Timer
         self.timer = QTimer()
-        self.timer.timeout.connect(self.update_timer)
+        self.timer.timeout.connect(self.watchdog.instrument("update_timer", self.update_timer))
         
         # Video thread
-        self.video_thread = VideoThread(self.detector)
-        self.video_thread.frame_ready.connect(self.update_frame)
+        self.video_thread = VideoThread(self.detector, self.frame_source)
+        self.video_thread.frame_ready.connect(self.watchdog.instrument("update_frame", self.update_frame))
+        self.video_thread.source_failed.connect(self.on_source_failed)
+
+        # Violation events reach the UI through the bus (see start_exam)
+        self.violation_feed = ViolationFeed()
+        self.violation_feed.event.connect(self.watchdog.instrument("on_violation", self.on_violation))
+        self.violations_final.connect(self.show_final_violations)
     
     def create_top_bar(self):
         bar = QWidget()
@@ -640,13 +787,11 @@ class ExamWindow(QWidget):
         """)
         progress_layout = QVBoxLayout()
         
-        self.progress_text = QLabel("Question 1 of 20")
+        self.progress_text = QLabel()
         self.progress_text.setStyleSheet("font-size: 14px; font-weight: bold; color: #666;")
         progress_layout.addWidget(self.progress_text)
         
         self.progress_bar = QProgressBar()
-        self.progress_bar.setMaximum(20)
-        self.progress_bar.setValue(1)
         self.progress_bar.setStyleSheet("""
             QProgressBar {
                 border: none;
@@ -702,7 +847,7 @@ class ExamWindow(QWidget):
         self.option_group = QButtonGroup()
         self.option_buttons = []
         
-        for i in range(4):
+        for i in range(OPTION_COUNT):
             radio = QRadioButton()
             radio.setStyleSheet("""
                 QRadioButton {
@@ -730,7 +875,7 @@ class ExamWindow(QWidget):
             options_layout.addWidget(radio)
             
         # Connect button clicked signal instead of toggled for cleaner handling
-        self.option_group.buttonClicked.connect(self.option_selected)
+        self.option_group.buttonClicked.connect(self.watchdog.instrument("option_selected", self.option_selected))
         
         options_widget.setLayout(options_layout)
         layout.addWidget(options_widget)
@@ -768,6 +913,8 @@ class ExamWindow(QWidget):
             }
             QPushButton:hover { background-color: #1976D2; }
         """)
+        self.next_btn.clicked.connect(self.next_question)
+        self.next_btn.setCursor(Qt.PointingHandCursor)
         nav_layout.addWidget(self.next_btn)
         
         self.submit_btn = QPushButton("✅ SUBMIT EXAM")
@@ -843,9 +990,11 @@ class ExamWindow(QWidget):
         viol_header.setStyleSheet("color: #ffeb3b; font-weight: bold; font-size: 14px;")
         layout.addWidget(viol_header)
         
-        self.violations_list = QListWidget()
+        self.violations_list = QListView()
+        self.violations_list.setModel(self.violation_feed_model)
+        self.violations_list.setUniformItemSizes(True)
         self.violations_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #37474F;
                 color: #ffeb3b;
                 border: none;
@@ -853,7 +1002,7 @@ class ExamWindow(QWidget):
                 padding: 8px;
                 font-size: 12px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 10px;
                 border-bottom: 1px solid #455A64;
             }
@@ -867,7 +1016,16 @@ class ExamWindow(QWidget):
         return panel
     
     def load_questions(self):
-        """Load 20 networking questions"""
+        """Draw this candidate's paper from the compiled question bank"""
+        try:
+            with load_question_bank(QUESTION_BANK_PATH) as bank:
+                generator = PaperGenerator(bank, size=PAPER_SIZE)
+                paper = generator.generate(session_seed(self.exam_code, self.session_id))
+                self.from_bank = True
+                return paper
+        except (OSError, *CACHE_ERRORS) as e:
+            print(f"⚠️ Question bank unavailable ({type(e).__name__}: {e}), using built-in questions")
+
         return [
             {"q": "What does LAN stand for?", "options": ["Large Area Network", "Local Area Network", "Long Area Network", "Limited Area Network"], "answer": 1},
             {"q": "Which device is used to connect multiple computers within a LAN?", "options": ["Modem", "Router", "Switch", "Firewall"], "answer": 2},
@@ -892,25 +1050,127 @@ class ExamWindow(QWidget):
         ]
 
     def start_exam(self):
-        # Create session in DB
-        self.session_id = self.auth.start_exam_session(
-            self.user_data['user_id'], 
-            "NET-101"
-        )
+        if self.resume_session:
+            # Continue the crashed session; the seed regenerates the same paper
+            self.session_id = self.resume_session['session_id']
+            self.exam_code = self.resume_session['exam_code'] or self.exam_code
+        else:
+            # Create session in DB
+            self.session_id = self.auth.start_exam_session(
+                self.user_data['user_id'], 
+                self.exam_code
+            )
+
+        # Per-candidate paper, regenerable from the session seed
+        self.questions = self.load_questions()
+        self.progress_bar.setMaximum(len(self.questions))
+        self.summary = SessionSummary(self.questions)
+
+        if self.session_id is not None:
+            self.journal = AnswerJournal(self.session_id)
+            if self.resume_session:
+                self.restore_session(self.resume_session['state'])
+                # The new detector counts from 0; earlier runs' violations are in the DB
+                self.prior_violations = self.recorded_violations()
+                self.summary.set_violations(self.prior_violations)
+            else:
+                self.journal.start(self.exam_code, self.exam_duration)
+
+        # Record per-frame detector signals for post-exam review
+        if self.session_id is not None:
+            # Each attempt of a resumed session is its own run: the detector starts over
+            self.detector.telemetry = TelemetryRecorder(
+                new_run_dir(os.path.join('data', 'telemetry', f"session_{self.session_id}"))
+            )
+            if self.raw_outputs:
+                self.detector.raw_outputs = RawOutputRecorder(
+                    new_run_dir(os.path.join('data', 'raw_outputs', f"session_{self.session_id}")),
+                    self.detector.decision_settings()
+                )
+
+        if self.supervisor:
+            self.publisher = StationPublisher(self.supervisor, {
+                'station': socket.gethostname(),
+                'name': self.user_data['name'],
+                'student_id': self.user_data.get('student_id', ''),
+                'session_id': self.session_id,
+                'exam_code': self.exam_code,
+            }).start()
+
+        self.bus = self.create_event_bus()
+        self.detector.bus = self.bus
+        self.bus.start()
+        if self.metrics is not None:
+            self.metrics.watch_bus(self.bus)
+            self.metrics.watch_queues(self.queue_depths)
+        
+        # Remaining time is derived from a monotonic deadline, so slow or
+        # coalesced timer ticks cannot make the clock drift
+        self.deadline = time.monotonic() + self.time_left
+        self.last_checkpoint = self.time_left
         
         # Start timer and video
+        self.watchdog.start()
         self.timer.start(1000)
         self.video_thread.start()
         
         self.update_question_display()
 
+    def create_event_bus(self):
+        """Sinks for detector violations, each draining on its own thread"""
+        bus = EventBus()
+        if self.session_id is not None:
+            bus.subscribe(DatabaseSink(self.auth, self.session_id))
+            bus.subscribe(JsonlAuditSink(os.path.join('data', 'audit', f"session_{self.session_id}.jsonl")))
+            bus.subscribe(EvidenceSink(os.path.join('data', 'evidence', f"session_{self.session_id}")))
+        # The summary must see every event; the feed may skip some under load
+        bus.subscribe(CallbackSink("summary", self.count_violation, overflow=BLOCK))
+        bus.subscribe(CallbackSink("ui", self.violation_feed.event.emit, overflow=DROP_OLDEST))
+        if self.publisher is not None:
+            publisher = self.publisher
+            bus.subscribe(CallbackSink("network", lambda e: publisher.publish_event(e.to_dict()),
+                                       overflow=DROP_OLDEST))
+        return bus
+
+    def queue_depths(self):
+        """Current depth of each internal queue (read when metrics are scraped)"""
+        depths = {f"sink_{sink.name}": sink.queue.qsize() for sink in self.bus.sinks}
+        if self.journal is not None:
+            depths['journal'] = self.journal.pending()
+        if self.publisher is not None:
+            depths['supervisor_events'] = len(self.publisher.events)
+        return depths
+
+    def restore_session(self, state):
+        """Apply replayed journal state (answers, position, remaining time)"""
+        self.answers = {q: o for q, o in state['answers'].items() if 0 <= q < len(self.questions)}
+        for q, o in self.answers.items():
+            self.summary.answer(q, o)
+        self.current_q = min(max(state['current_q'], 0), max(len(self.questions) - 1, 0))
+        if state['remaining'] is not None:
+            self.time_left = state['remaining']
+        else:
+            try:
+                started = datetime.fromisoformat(self.resume_session['start_time'])
+                elapsed = int((datetime.now() - started).total_seconds())
+            except (TypeError, ValueError):
+                elapsed = 0
+            self.time_left = max(0, self.exam_duration - elapsed)
+        self.timer_label.setText(f"{self.time_left // 60:02d}:{self.time_left % 60:02d}")
+        self.status_label.setText("🔄 Session Restored")
+        print(f"✅ Session {self.session_id} restored: {len(self.answers)} answers, {self.time_left}s left")
+
     def update_timer(self):
-        self.time_left -= 1
+        self.time_left = max(0, math.ceil(self.deadline - time.monotonic()))
+        if self.journal is not None and self.last_checkpoint - self.time_left >= 5:
+            self.journal.remaining(self.time_left)
+            self.last_checkpoint = self.time_left
         
         minutes = self.time_left // 60
         seconds = self.time_left % 60
         
         self.timer_label.setText(f"{minutes:02d}:{seconds:02d}")
+        self.publish_status('running')
         
         # Color coding
         if self.time_left <= 300: # 5 mins
@@ -923,57 +1183,115 @@ class ExamWindow(QWidget):
             self.submit_exam()
 
     def update_frame(self, frame, info):
+        if self.source_down and self.finalizer is None:
+            self.source_restored()
         # Capture reference face if not set
         if not self.detector.identity_confirmed:
             if self.detector.set_reference_face(frame):
                 self.status_label.setText("✅ Identity Locked")
 
-        # Using info dict from ProctorMonitor
-        # info keys: 'face_count', 'away_now', 'phone_present', 'book_present', 'counters', 'triggers'
-        
-        triggers = info.get('triggers', {})
-        new_violations = []
-
-        if triggers.get('away'):
-             new_violations.append({'type': 'looking_away', 'message': '😒 Looking Away', 'confidence': 1.0})
-        if triggers.get('phone'):
-             new_violations.append({'type': 'phone_detected', 'message': '📱 Phone Detected', 'confidence': 1.0})
-        if triggers.get('book'):
-             new_violations.append({'type': 'book_detected', 'message': '📖 Book Detected', 'confidence': 1.0})
-        if triggers.get('multi'):
-             new_violations.append({'type': 'multiple_faces', 'message': '👥 Multiple Faces Detected', 'confidence': 1.0})
-        if triggers.get('identity'):
-             new_violations.append({'type': 'identity_mismatch', 'message': '🕵️ Identity Mismatch', 'confidence': 1.0})
-        
+        # Violations arrive separately through the event bus (on_violation)
         # Convert frame to QPixmap
         h, w, ch = frame.shape
         bytes_per_line = ch * w
         qt_img = QImage(frame.data, w, h, bytes_per_line, QImage.Format_BGR888)
         self.camera_label.setPixmap(QPixmap.fromImage(qt_img))
-        
-        # Log new violations
-        for v in new_violations:
-            self.auth.log_violation(
-                self.session_id,
-                v['type'],
-                v['message'],
-                v['confidence']
-            )
-            
-            # Update UI
-            item = QListWidgetItem(f"{v['message']} ({datetime.now().strftime('%H:%M:%S')})")
-            if 'phone' in v['type'] or 'book' in v['type'] or 'identity' in v['type']:
-                 item.setForeground(QColor("#FF5252")) # Red for severe
-            else:
-                 item.setForeground(QColor("#FFEB3B")) # Yellow for warning
-            self.violations_list.insertItem(0, item)
-            self.violations.append(v)
-            
+        if self.publisher is not None:
+            self.publisher.offer_thumbnail(frame)
+
+    def on_source_failed(self, reason):
+        """
+        The camera (or --source) could not be opened, ended or stopped
+        delivering frames. An unproctored exam can't continue, so the clock
+        and the questions are held until a retry gets frames flowing again,
+        or the candidate submits.
+        """
+        if self.finalizer is not None:
+            return
+        self.timer.stop()
+        self.questions_panel.setEnabled(False)
+        self.status_label.setText("❌ Camera Unavailable")
+        self.publish_status('camera_failed')
+        print(f"❌ Frame source {reason}; session {self.session_id} on hold")
+        while True:
+            choice = QMessageBox.critical(
+                self, "Camera Unavailable",
+                f"The camera {reason}, so the exam cannot be proctored.\n\n"
+                "Check the camera and press Retry, or Abort to submit the exam now.",
+                QMessageBox.Retry | QMessageBox.Abort)
+            if choice == QMessageBox.Retry:
+                break
+            self.submit_exam()
+            if self.finalizer is not None:
+                return
+
+        # Stay on hold until the first frame arrives (update_frame)
+        self.video_thread.wait()
+        self.source_down = True
+        self.status_label.setText("🔄 Reconnecting Camera...")
+        self.video_thread.start()
+
+    def source_restored(self):
+        self.source_down = False
+        self.questions_panel.setEnabled(True)
+        self.status_label.setText("✅ System Active")
+        self.publish_status('running')
+        # The clock was held while the source was down
+        self.deadline = time.monotonic() + self.time_left
+        self.timer.start(1000)
+
+    def on_violation(self, event):
+        """UI sink: a violation opened (new feed item) or closed (append its duration)"""
+        if event.kind == OPENED:
+            text = f"{event.message} ({datetime.fromtimestamp(event.t).strftime('%H:%M:%S')})"
+            self.violation_feed_model.opened(event.key, text, event.severe)
+        else:
+            # Show how long the event lasted
+            self.violation_feed_model.closed(event.key, f"· {event.duration:.0f}s")
+
         # Update counts
-        self.violation_label.setText(f"⚠️ {len(self.violations_list)}")
+        self.violation_label.setText(f"⚠️ {self.violation_count()}")
+
+    def count_violation(self, event):
+        """Summary sink: running per-type counts of opened events"""
+        if event.kind == OPENED:
+            self.summary.violation(event.type)
+
+    def violation_count(self):
+        """Violation events opened so far (the feed only holds the latest ones)"""
+        return sum(self.prior_violations.values()) + sum(self.detector.counters.values())
+
+    def recorded_violations(self):
+        """Per-type violation events already in the database for this session"""
+        counts = {}
+        for interval in self.auth.get_session_intervals(self.session_id):
+            counts[interval['type']] = counts.get(interval['type'], 0) + interval['count']
+        return counts
+
+    def final_violations(self):
+        """Per-type totals from the stopped detector, plus any from before a crash"""
+        counts = dict(self.prior_violations)
+        for key, name in EVENT_COUNTERS.items():
+            vtype = VIOLATION_TYPES[key][0]
+            counts[vtype] = counts.get(vtype, 0) + self.detector.counters.get(name, 0)
+        return counts
+
+    def publish_status(self, state):
+        if self.publisher is None:
+            return
+        self.publisher.publish_status({
+            'time_left': self.time_left,
+            'answered': len(self.answers),
+            'total': len(self.questions),
+            'violations': self.violation_count(),
+            'state': state,
+        })
 
     def update_question_display(self):
         question = self.questions[self.current_q]
+        self.summary.visit(self.current_q)
+        if self.journal is not None:
+            self.journal.position(self.current_q)
         
         self.progress_text.setText(f"Question {self.current_q + 1} of {len(self.questions)}")
         self.progress_bar.setValue(self.current_q + 1)
@@ -1013,6 +1331,9 @@ class ExamWindow(QWidget):
     def option_selected(self, btn):
         id = self.option_group.id(btn)
         self.answers[self.current_q] = id
+        self.summary.answer(self.current_q, id)
+        if self.journal is not None:
+            self.journal.answer(self.current_q, id)
 
     def submit_exam(self):
         # Confirmation
@@ -1023,26 +1344,84 @@ class ExamWindow(QWidget):
             if confirm == QMessageBox.No:
                 return
 
-        self.timer.stop()
-        self.video_thread.stop()
-        
-        # Calculate score
-        correct_count = 0
-        for i, q in enumerate(self.questions):
-            if i in self.answers and self.answers[i] == q['answer']:
-                correct_count += 1
+        pct_score = self.finish_exam()
         
-        pct_score = (correct_count / len(self.questions)) * 100
-        
-        # Save results
-        self.auth.end_exam_session(self.session_id, len(self.violations_list), pct_score)
-        
-        # Show result
+        # Show result; the violation figure is filled in by show_final_violations
         msg = QMessageBox()
         msg.setWindowTitle("Exam Completed")
         msg.setText(f"Exam Submitted Automatically!" if self.time_left <= 0 else "Exam Submitted successfully!")
-        msg.setInformativeText(f"Your Score: {pct_score:.1f}%\nViolations Detected: {len(self.violations_list)}")
+        msg.setInformativeText(f"Your Score: {pct_score:.1f}%\nViolations Detected: counting...")
         msg.setIcon(QMessageBox.Information)
+        self.result_box = msg
         msg.exec_()
+        self.result_box = None
         
-        self.close()
\ No newline at end of file
+        self.close()
+
+    def show_final_violations(self, total):
+        if self.result_box is not None:
+            self.result_box.setInformativeText(
+                f"Your Score: {self.summary.score_pct:.1f}%\nViolations Detected: {total}")
+
+    def finish_exam(self):
+        """
+        End the exam without waiting on anything: the score comes from the
+        running summary, and thread shutdown plus the final database writes
+        run on self.finalizer once control returns to the event loop (i.e.
+        while the result dialog is up). The final violation count is only
+        known once the video thread has stopped; it arrives through
+        violations_final. Returns the score %.
+        """
+        self.timer.stop()
+        self.video_thread.stop(wait=False)  # exits after the current frame
+        self.watchdog.stop()
+        self.summary.finish()
+        if self.publisher is not None:
+            self.publish_status('submitted')
+
+        self.finalizer = threading.Thread(target=self.finalize_session,
+                                          name=f"finalize-{self.session_id}")
+        QTimer.singleShot(0, self.finalizer.start)
+        return self.summary.score_pct
+
+    def finalize_session(self):
+        """Background half of submission: join threads, drain sinks, write the session"""
+        self.video_thread.wait()
+        # Events still open at submission close now, so their CLOSED records
+        # (interval end, audit line, feed duration) reach the sinks below
+        self.detector.close_events()
+        if self.bus is not None:
+            # Let the database and audit sinks finish before the session is closed
+            for name, stats in self.bus.stop().items():
+                if stats['dropped'] or stats['errors']:
+                    print(f"⚠️ Sink {name}: {stats['dropped']} dropped, {stats['errors']} errors")
+        # The detector has stopped: its counters are the final word on violations
+        final = self.final_violations()
+        if {t: n for t, n in final.items() if n} != self.summary.violations:
+            print(f"⚠️ Running violation counts {self.summary.violations} differ from the detector's {final}")
+        self.summary.set_violations(final)
+        self.violations_final.emit(self.summary.violation_total)
+        if self.detector.telemetry is not None:
+            self.detector.telemetry.close()
+        if self.detector.raw_outputs is not None:
+            self.detector.raw_outputs.close(self.detector.counters)
+        if self.session_id is not None:
+            report = self.watchdog.report()
+            self.watchdog.dump(os.path.join('data', 'profiling', f"session_{self.session_id}_eventloop.json"))
+            print(f"⏱️ Event loop: p95 {report['latency_ms']['p95']:.1f} ms, "
+                  f"max {report['latency_ms']['max']:.1f} ms, {report['stall_count']} stalls")
+            self.summary.save(os.path.join('data', 'summaries', f"session_{self.session_id}.json"))
+
+        # Responses are already in bank coordinates (for later regrading). The
+        # built-in questions aren't bank items, so grading.py must not see them
+        if self.from_bank:
+            self.auth.save_responses(self.session_id, self.exam_code, self.summary.items, self.summary.choices)
+        else:
+            print(f"ℹ️ Session {self.session_id} used the built-in questions; responses not saved for regrading")
+        self.auth.end_exam_session(self.session_id, self.summary.violation_total, self.summary.score_pct)
+        if self.journal is not None:
+            self.journal.close(ended=True)
+        if self.publisher is not None:
+            self.publisher.stop()
+        if self.metrics is not None:
+            self.metrics.stop()
@@ -0,0 +1,269 @@
+"""
+Frame sources
+Everything VideoThread can read frames from: a webcam with explicit
+capture settings, a video file, a folder of images, or a synthetic
+generator, so the whole pipeline can run (and be load-tested) on
+machines without a camera.
+
+Source specs (main.py --source):
+    camera:0                      webcam index 0 (default)
+    file:recordings/exam.mp4      video file (a bare path to a file works too)
+    folder:frames/                images in name order (a bare directory works too)
+    synthetic[:1280x720]          generated frames
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def _draw_blob(frame, offset=0):
+    h, w = frame.shape[:2]
+    cv2.ellipse(frame, (w // 2 + offset, h // 2), (w // 8, h // 5), 0, 0, 360, (140, 170, 210), -1)
+
+
+def synthetic_frame(width, height, seed=0, blob=True):
+    """Deterministic webcam-like frame: smooth gradient, a face-sized blob and sensor noise"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = (x * 200 // max(width - 1, 1)).astype(np.uint8)
+    frame = np.dstack([base, np.flipud(base), np.full_like(base, 120)])
+    if blob:
+        _draw_blob(frame)
+    noise = rng.integers(-8, 9, frame.shape, dtype=np.int16)
+    return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+class FrameSource:
+    """
+    Base class. read() returns a BGR frame, or None if no frame is available
+    right now; `finished` turns True once a finite source is exhausted, and
+    open() starts it over. `fps` is the rate frames should be consumed at.
+    VideoThread reports the source as failed after `stall_timeout` seconds
+    without a frame (None: never).
+    """
+
+    fps = 30.0
+    stall_timeout = 5.0
+
+    def __init__(self):
+        self.finished = False
+
+    def open(self):
+        self.finished = False
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CameraSource(FrameSource):
+    """
+    Webcam with explicit capture settings. MJPG lets USB cameras deliver
+    640x480@30 without saturating the bus, and a one-frame driver buffer
+    means read() returns the newest frame instead of a stale one.
+    """
+
+    def __init__(self, index=0, width=640, height=480, fps=30, fourcc="MJPG", buffer_size=1):
+        super().__init__()
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fps = float(fps)
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.cap = None
+
+    def open(self):
+        self.finished = False
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            print(f"❌ Cannot open camera {self.index}")
+            return False
+        # FOURCC first: some drivers only offer higher resolutions/rates in MJPG
+        if self.fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.buffer_size is not None:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        # Drivers silently fall back to what they support; report what we got
+        actual_w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        actual_h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if actual_fps > 0:
+            self.fps = actual_fps
+        print(f"📷 Camera {self.index}: {actual_w}x{actual_h} @ {self.fps:.0f} fps")
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return None
+        ok, frame = self.cap.read()
+        return frame if ok else None
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class FileSource(FrameSource):
+    """Recorded video, consumed at its own frame rate"""
+
+    def __init__(self, path, loop=False):
+        super().__init__()
+        self.path = path
+        self.loop = loop
+        self.cap = None
+
+    def open(self):
+        self.finished = False
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            print(f"❌ Cannot open video {self.path}")
+            self.finished = True
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def read(self):
+        if self.cap is None:
+            return None
+        ok, frame = self.cap.read()
+        if not ok and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self.cap.read()
+        if not ok:
+            self.finished = True
+            return None
+        return frame
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageFolderSource(FrameSource):
+    """Images in file-name order, played back at `fps`"""
+
+    def __init__(self, path, fps=10, loop=True):
+        super().__init__()
+        self.path = path
+        self.fps = float(fps)
+        self.loop = loop
+        self.files = []
+        self.position = 0
+
+    def open(self):
+        self.finished = False
+        self.position = 0
+        try:
+            names = os.listdir(self.path)
+        except OSError as e:
+            print(f"❌ Cannot open image folder {self.path}: {e}")
+            self.finished = True
+            return False
+        self.files = sorted(
+            os.path.join(self.path, name) for name in names
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            print(f"❌ No images in {self.path}")
+            self.finished = True
+            return False
+        return True
+
+    def read(self):
+        if self.position >= len(self.files):
+            if not (self.loop and self.files):
+                self.finished = True
+                return None
+            self.position = 0
+        frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        return frame
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames with a slowly moving face-sized blob. A cycle of frames
+    is rendered up front so read() costs only a copy, leaving the detector
+    as the only load.
+    """
+
+    def __init__(self, width=640, height=480, fps=30, cycle=60, seed=0):
+        super().__init__()
+        self.width = width
+        self.height = height
+        self.fps = float(fps)
+        self.cycle = cycle
+        self.seed = seed
+        self.frames = []
+        self.position = 0
+
+    def open(self):
+        self.finished = False
+        background = synthetic_frame(self.width, self.height, self.seed, blob=False)
+        amplitude = self.width // 8
+        self.frames = []
+        for i in range(self.cycle):
+            frame = background.copy()
+            _draw_blob(frame, int(amplitude * np.sin(2 * np.pi * i / self.cycle)))
+            self.frames.append(frame)
+        return True
+
+    def read(self):
+        frame = self.frames[self.position % len(self.frames)]
+        self.position += 1
+        return frame.copy()
+
+
+def _parse_size(value, default):
+    if not value:
+        return default
+    try:
+        w, h = value.lower().split("x", 1)
+        return int(w), int(h)
+    except ValueError:
+        raise ValueError(f"Bad frame size {value!r}, expected WxH") from None
+
+
+def open_source(spec=None, width=640, height=480, fps=30):
+    """Build a FrameSource from a spec string (see module docstring); not yet opened"""
+    spec = spec or "camera:0"
+    kind, _, arg = spec.partition(":")
+    if kind == "camera" or spec.isdigit():
+        try:
+            index = int(spec) if spec.isdigit() else int(arg or 0)
+        except ValueError:
+            raise ValueError(f"Bad camera index {arg!r}") from None
+        return CameraSource(index, width, height, fps)
+    if kind == "synthetic":
+        w, h = _parse_size(arg, (width, height))
+        return SyntheticSource(w, h, fps)
+    if kind == "file":
+        return FileSource(arg)
+    if kind == "folder":
+        return ImageFolderSource(arg, fps)
+    if os.path.isdir(spec):
+        return ImageFolderSource(spec, fps)
+    if os.path.isfile(spec):
+        return FileSource(spec)
+    raise ValueError(f"Unknown frame source {spec!r}")
@@ -0,0 +1,178 @@
+"""
+Batch grading and item analysis
+Loads every submitted paper of an exam into a (candidates x items) int8
+matrix and regrades / analyses the whole cohort in vectorized passes.
+
+Usage:
+    python grading.py NET-101 --bank data/questions.txt
+    python grading.py NET-101 --bank data/questions.txt --override 12=C --write
+    python grading.py NET-101 --bank data/questions.txt --items items.csv
+"""
+
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from auth import AuthManager
+from question_bank import OPTION_COUNT, load_question_bank
+
+NOT_PRESENTED = -2
+UNANSWERED = -1
+
+
+class ResponseMatrix:
+    """
+    session_ids: (n,) int64
+    items: (m,) int32 bank indices, one column each
+    choices: (n, m) int8 original option index, UNANSWERED, or NOT_PRESENTED
+    """
+
+    def __init__(self, session_ids, items, choices):
+        self.session_ids = session_ids
+        self.items = items
+        self.choices = choices
+
+    @property
+    def presented(self):
+        return self.choices != NOT_PRESENTED
+
+
+def load_responses(auth, exam_code, batch_size=5000):
+    """Build the response matrix of an exam from the responses table"""
+    session_ids = []
+    item_parts = []
+    choice_parts = []
+    lengths = []
+    for row in auth.iter_exam_responses(exam_code, batch_size):
+        items = np.frombuffer(row['items'], dtype='<i4')
+        session_ids.append(row['session_id'])
+        item_parts.append(items)
+        choice_parts.append(np.frombuffer(row['choices'], dtype='i1'))
+        lengths.append(len(items))
+
+    if not session_ids:
+        return ResponseMatrix(np.zeros(0, np.int64), np.zeros(0, np.int32),
+                              np.zeros((0, 0), np.int8))
+
+    flat_items = np.concatenate(item_parts)
+    flat_choices = np.concatenate(choice_parts)
+    rows = np.repeat(np.arange(len(session_ids)), lengths)
+    items, cols = np.unique(flat_items, return_inverse=True)
+
+    choices = np.full((len(session_ids), len(items)), NOT_PRESENTED, dtype=np.int8)
+    choices[rows, cols] = flat_choices
+    return ResponseMatrix(np.asarray(session_ids, dtype=np.int64), items.astype(np.int32), choices)
+
+
+def answer_key(bank, items, overrides=None):
+    """Correct original option per column; overrides is {bank_index: option}"""
+    overrides = overrides or {}
+    return np.array([overrides.get(int(i), bank[int(i)]['answer']) for i in items], dtype=np.int8)
+
+
+def grade(matrix, key):
+    """Percentage score per candidate, over the questions they were given"""
+    correct = (matrix.choices == key[None, :]).sum(axis=1)
+    presented = matrix.presented.sum(axis=1)
+    return np.where(presented > 0, correct * 100.0 / np.maximum(presented, 1), 0.0)
+
+
+def item_analysis(matrix, key, scores=None, n_options=OPTION_COUNT):
+    """
+    Per-item statistics across the cohort:
+      presented      candidates who saw the item
+      difficulty     proportion correct among them (p-value)
+      discrimination point-biserial correlation of item correctness with
+                     candidate score, among candidates who saw the item
+      distractors    (m, n_options + 1) counts of each original option
+                     chosen; the last column counts unanswered
+    """
+    if scores is None:
+        scores = grade(matrix, key)
+    presented = matrix.presented
+    correct = matrix.choices == key[None, :]
+
+    P = presented.astype(np.float32)
+    C = correct.astype(np.float32)
+    s = scores.astype(np.float32)[:, None]
+
+    n = P.sum(axis=0)
+    n1 = C.sum(axis=0)
+    n0 = n - n1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        difficulty = n1 / n
+        mean = (P * s).sum(axis=0) / n
+        var = (P * s * s).sum(axis=0) / n - mean ** 2
+        mean1 = (C * s).sum(axis=0) / n1
+        mean0 = ((P - C) * s).sum(axis=0) / n0
+        discrimination = (mean1 - mean0) / np.sqrt(var) * np.sqrt(n1 * n0) / n
+    discrimination = np.nan_to_num(discrimination)
+
+    distractors = np.stack(
+        [(matrix.choices == o).sum(axis=0) for o in range(n_options)]
+        + [(matrix.choices == UNANSWERED).sum(axis=0)],
+        axis=1,
+    )
+    return {
+        "items": matrix.items,
+        "presented": n.astype(np.int64),
+        "difficulty": np.nan_to_num(difficulty),
+        "discrimination": discrimination,
+        "distractors": distractors,
+    }
+
+
+def regrade(auth, exam_code, bank, overrides=None, write=False):
+    """Regrade every candidate of an exam, optionally writing scores back"""
+    matrix = load_responses(auth, exam_code)
+    key = answer_key(bank, matrix.items, overrides)
+    scores = grade(matrix, key)
+    if write and len(scores):
+        auth.update_scores(dict(zip(matrix.session_ids.tolist(), np.round(scores, 2).tolist())))
+    return matrix, key, scores
+
+
+def _parse_override(value):
+    index, option = value.split("=", 1)
+    option = option.strip()
+    return int(index), int(option) if option.isdigit() else ord(option.upper()) - ord('A')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regrade an exam and compute item statistics")
+    parser.add_argument("exam_code")
+    parser.add_argument("--bank", required=True, help="Question bank the exam was drawn from")
+    parser.add_argument("--override", action="append", default=[], type=_parse_override,
+                        metavar="BANK_INDEX=OPTION", help="Corrected answer key entry")
+    parser.add_argument("--write", action="store_true", help="Write regraded scores to the database")
+    parser.add_argument("--items", help="Write item statistics to this CSV file")
+    args = parser.parse_args(argv)
+
+    auth = AuthManager()
+    with load_question_bank(args.bank) as bank:
+        matrix, key, scores = regrade(auth, args.exam_code, bank, dict(args.override), args.write)
+    if not len(scores):
+        print(f"⚠️ No submitted responses for {args.exam_code}")
+        return 1
+    print(f"📊 {len(scores)} candidates x {len(matrix.items)} items: "
+          f"mean {scores.mean():.1f}%, median {np.median(scores):.1f}%")
+
+    if args.items:
+        stats = item_analysis(matrix, key, scores)
+        with open(args.items, "w", newline='') as f:
+            writer = csv.writer(f)
+            n_opts = stats["distractors"].shape[1] - 1
+            writer.writerow(["bank_index", "key", "presented", "difficulty", "discrimination"]
+                            + [chr(ord('A') + o) for o in range(n_opts)] + ["unanswered"])
+            for j, item in enumerate(stats["items"]):
+                writer.writerow([int(item), chr(ord('A') + int(key[j])), int(stats["presented"][j]),
+                                 f"{stats['difficulty'][j]:.3f}", f"{stats['discrimination'][j]:.3f}"]
+                                + stats["distractors"][j].tolist())
+        print(f"✅ Item statistics written to {args.items}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
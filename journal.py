@@ -0,0 +1,145 @@
+"""
+Append-only answer journal
+Every answer, navigation and timer checkpoint of a session is appended to
+data/journal/session_<id>.log. Appends only queue the record; a background
+thread writes and fsyncs batches every `sync_interval` seconds, so the UI
+never waits on disk. After a crash the journal is replayed to resume the
+session.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+JOURNAL_DIR = os.path.join('data', 'journal')
+
+# Record kinds
+START = "start"        # exam_code, duration
+ANSWER = "a"           # q, o
+POSITION = "p"         # q
+REMAINING = "r"        # s (seconds left)
+END = "end"
+
+
+def journal_path(session_id, journal_dir=JOURNAL_DIR):
+    return os.path.join(journal_dir, f"session_{session_id}.log")
+
+
+class AnswerJournal:
+    """Batched, fsynced append-only journal for one session"""
+
+    def __init__(self, session_id, journal_dir=JOURNAL_DIR, sync_interval=0.25):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = journal_path(session_id, journal_dir)
+        self.sync_interval = sync_interval
+        self._pending = deque()
+        self._file = open(self.path, "a+", encoding="utf-8")
+        self._terminate_torn_line()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"journal-{session_id}", daemon=True)
+        self._thread.start()
+
+    def _terminate_torn_line(self):
+        """After a crash mid-write, start appending on a fresh line"""
+        size = self._file.seek(0, os.SEEK_END)
+        if size:
+            self._file.seek(size - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+                self._file.flush()
+
+    def append(self, kind, **fields):
+        """Queue a record; never blocks on I/O"""
+        fields["k"] = kind
+        fields["t"] = round(time.time(), 3)
+        self._pending.append(fields)
+
+    def pending(self):
+        """Records queued but not yet written"""
+        return len(self._pending)
+
+    def start(self, exam_code, duration):
+        self.append(START, exam_code=exam_code, duration=duration)
+
+    def answer(self, q, option):
+        self.append(ANSWER, q=q, o=option)
+
+    def position(self, q):
+        self.append(POSITION, q=q)
+
+    def remaining(self, seconds):
+        self.append(REMAINING, s=seconds)
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        lines = []
+        while self._pending:
+            lines.append(json.dumps(self._pending.popleft(), separators=(",", ":")))
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, ended=False):
+        """Flush everything; `ended` marks the session as submitted"""
+        if self._file is None:
+            return
+        if ended:
+            self.append(END)
+        self._stop.set()
+        self._thread.join()
+        self._file.close()
+        self._file = None
+
+
+def replay_journal(session_id, journal_dir=JOURNAL_DIR):
+    """
+    Rebuild session state from its journal.
+    Returns {"exam_code", "duration", "answers", "current_q", "remaining", "ended"}
+    or None if there is no journal. A torn final line (crash mid-write) is ignored.
+    """
+    path = journal_path(session_id, journal_dir)
+    if not os.path.exists(path):
+        return None
+
+    state = {"exam_code": None, "duration": None, "answers": {}, "current_q": 0,
+             "remaining": None, "ended": False}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            kind = rec.get("k")
+            if kind == ANSWER:
+                state["answers"][rec["q"]] = rec["o"]
+            elif kind == POSITION:
+                state["current_q"] = rec["q"]
+            elif kind == REMAINING:
+                state["remaining"] = rec["s"]
+            elif kind == START:
+                state["exam_code"] = rec["exam_code"]
+                state["duration"] = rec["duration"]
+            elif kind == END:
+                state["ended"] = True
+    return state
+
+
+def find_resumable_session(auth, user_id, journal_dir=JOURNAL_DIR):
+    """
+    Most recent in-progress session of a user that has an open journal,
+    as {"session_id", "exam_code", "start_time", "state"}; None otherwise.
+    """
+    for session in auth.get_in_progress_sessions(user_id):
+        state = replay_journal(session["session_id"], journal_dir)
+        if state is not None and not state["ended"]:
+            session["state"] = state
+            return session
+    return None
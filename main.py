@@ -3,11 +3,16 @@ main.py - FIXED Entry Point
 Run this file to start the exam proctoring system
 """
 
+import os
 import sys
+import argparse
 from PyQt5.QtWidgets import QApplication
 import importlib.util
 from pathlib import Path
 
+from metrics import parse_endpoint
+from supervisor import parse_address
+
 # Load `auth.py` explicitly to avoid import-time conflicts or partial modules
 spec = importlib.util.spec_from_file_location('auth_local', str(Path(__file__).parent / 'auth.py'))
 auth_mod = importlib.util.module_from_spec(spec)
@@ -15,8 +20,9 @@ spec.loader.exec_module(auth_mod)
 AuthManager = auth_mod.AuthManager
 
 class App:
-    def __init__(self):
-        self.app = QApplication(sys.argv)
+    def __init__(self, args=None, qt_argv=None):
+        self.args = args
+        self.app = QApplication(qt_argv if qt_argv is not None else sys.argv)
         self.auth = AuthManager()
         self.user_data = None
         self.show_login()
@@ -30,13 +36,55 @@ class App:
     def start_exam(self, user_data):
         self.user_data = user_data
         from exam_app import ExamWindow
-        self.exam_window = ExamWindow(user_data, self.auth)
+        from journal import find_resumable_session
+        # Resume an attempt that was interrupted by a crash
+        resume = find_resumable_session(self.auth, user_data['user_id'])
+        source = None
+        if self.args is not None:
+            from frame_source import open_source
+            source = open_source(self.args.source, self.args.width, self.args.height, self.args.fps)
+        supervisor = self.args.supervisor if self.args is not None else None
+        metrics = self.args.metrics if self.args is not None else None
+        raw_outputs = self.args.raw_outputs if self.args is not None else False
+        self.exam_window = ExamWindow(user_data, self.auth, resume_session=resume, frame_source=source,
+                                      supervisor=supervisor, metrics=metrics, raw_outputs=raw_outputs)
         self.exam_window.show()
     
     def run(self):
         return self.app.exec_()
 
 
+def source_spec(value):
+    """argparse type for --source: fail at startup, not after login, on a bad spec"""
+    from frame_source import open_source
+    try:
+        source = open_source(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    path = getattr(source, 'path', None)
+    if path is not None and not os.path.exists(path):
+        raise argparse.ArgumentTypeError(f"{path}: no such file or directory")
+    return value
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Exam proctoring system")
+    parser.add_argument("--source", default="camera:0", type=source_spec,
+                        help="camera:N, file:PATH, folder:DIR or synthetic[:WxH] (see frame_source.py)")
+    parser.add_argument("--width", type=int, default=640, help="Capture width")
+    parser.add_argument("--height", type=int, default=480, help="Capture height")
+    parser.add_argument("--fps", type=float, default=30, help="Capture / playback rate")
+    parser.add_argument("--supervisor", metavar="HOST:PORT", type=parse_address,
+                        help="Publish events and thumbnails to a supervisor console (supervisor.py)")
+    parser.add_argument("--metrics", metavar="[HOST:]PORT", type=parse_endpoint,
+                        help="Serve Prometheus metrics at /metrics (a bare port binds to localhost)")
+    parser.add_argument("--raw-outputs", action="store_true",
+                        help="Record raw model outputs under data/raw_outputs for retune.py")
+    # Remaining arguments are left for Qt
+    return parser.parse_known_args(argv)
+
+
 if __name__ == '__main__':
-    app = App()
+    args, qt_args = parse_args(sys.argv[1:])
+    app = App(args, sys.argv[:1] + qt_args)
     sys.exit(app.run())
\ No newline at end of file
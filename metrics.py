@@ -0,0 +1,318 @@
+"""
+Runtime metrics in Prometheus text format
+An opt-in HTTP endpoint (main.py --metrics [HOST:]PORT) serving /metrics:
+frame counts and rate, per-stage detector latency, AuthManager call
+latency, event-bus and journal queue depths, violation counters and
+process RSS/CPU.
+
+Recording is a perf_counter() call plus a locked bucket increment;
+everything else (counters, queue depths, process stats) is read only when
+the endpoint is scraped, so collection can stay on during exams.
+
+    curl -s localhost:9464/metrics
+"""
+
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+# Seconds; detector stages run from ~0.1 ms (quality gate) to ~100 ms (MTCNN on CPU)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+DEFAULT_PORT = 9464
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.type = COUNTER
+        self.labelnames = tuple(labelnames)
+        self._values = {} if labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe(seconds, *label_values)"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.type = HISTOGRAM
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}       # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        names = self.labelnames + ("le",)
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(names, labels + (_format_value(bound),)), cumulative
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), series[-1]
+
+
+class CallbackMetric:
+    """Metric read at scrape time: fn() -> [(label values tuple, value)]"""
+
+    def __init__(self, name, help, type, fn, labelnames=()):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        for labels, value in self.fn():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        # Re-registering a name replaces it (e.g. a new exam window's queues)
+        self.metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name):
+        self.metrics.pop(name, None)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                print(f"⚠️ Metric {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class FrameTimer:
+    """Times one process_frame call stage by stage"""
+
+    __slots__ = ("metrics", "started", "last")
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, stage):
+        """Record the time since the previous mark as `stage`"""
+        now = time.perf_counter()
+        self.metrics.stage_seconds.observe(now - self.last, stage)
+        self.last = now
+
+    def done(self, obstructed=False):
+        self.metrics.record_frame(time.perf_counter() - self.started, obstructed)
+
+
+class _NullFrameTimer:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def done(self, obstructed=False):
+        pass
+
+
+NULL_FRAME_TIMER = _NullFrameTimer()
+
+
+class ProctorMetrics:
+    """The proctoring runtime's metrics, plus the HTTP endpoint serving them"""
+
+    def __init__(self):
+        self.registry = Registry()
+        r = self.registry
+        self.frames = r.register(Counter("proctor_frames_total", "Frames processed by the detector"))
+        self.obstructed_frames = r.register(Counter(
+            "proctor_obstructed_frames_total", "Frames that failed the quality gate"))
+        self.dropped_frames = r.register(Counter(
+            "proctor_dropped_frames_total", "Source frames skipped because processing fell behind"))
+        self.frame_seconds = r.register(Histogram("proctor_frame_seconds", "process_frame latency"))
+        self.stage_seconds = r.register(Histogram(
+            "proctor_stage_seconds", "Detector stage latency", ("stage",)))
+        self.db_seconds = r.register(Histogram(
+            "proctor_db_call_seconds", "AuthManager call latency", ("call",)))
+        r.register(CallbackMetric("proctor_frame_rate", "Frames per second (smoothed)", GAUGE,
+                                  lambda: [((), round(self.frame_rate, 2))]))
+        self.frame_rate = 0.0
+        self._last_frame = None
+
+        self._process = psutil.Process()
+        r.register(CallbackMetric("process_resident_memory_bytes", "Resident set size", GAUGE,
+                                  lambda: [((), self._process.memory_info().rss)]))
+        r.register(CallbackMetric("process_cpu_seconds_total", "User + system CPU time", COUNTER,
+                                  lambda: [((), round(sum(self._process.cpu_times()[:2]), 3))]))
+        r.register(CallbackMetric("process_num_threads", "OS threads", GAUGE,
+                                  lambda: [((), self._process.num_threads())]))
+        self.server = None
+        self._thread = None
+
+    # ---- recording (hot path) ----
+
+    def frame_timer(self):
+        return FrameTimer(self)
+
+    def record_frame(self, seconds, obstructed=False):
+        self.frames.inc()
+        if obstructed:
+            self.obstructed_frames.inc()
+        self.frame_seconds.observe(seconds)
+        now = time.monotonic()
+        if self._last_frame is not None and now > self._last_frame:
+            # Exponential moving average over roughly the last 20 frames
+            rate = 1.0 / (now - self._last_frame)
+            self.frame_rate = rate if self.frame_rate == 0.0 else 0.95 * self.frame_rate + 0.05 * rate
+        self._last_frame = now
+
+    # ---- wiring ----
+
+    def watch_monitor(self, monitor):
+        """Mirror ProctorMonitor.counters and attach the stage timers"""
+        monitor.metrics = self
+        self.registry.register(CallbackMetric(
+            "proctor_violation_events_total", "Violation events opened, by counter", COUNTER,
+            lambda: [((name,), value) for name, value in monitor.counters.items()], ("counter",)))
+
+    def instrument_auth(self, auth):
+        """Time every public AuthManager method on this instance"""
+        if getattr(auth, "_metrics", None) is self:
+            return auth
+        for name in dir(type(auth)):
+            if name.startswith("_"):
+                continue
+            method = getattr(auth, name)
+            if callable(method):
+                setattr(auth, name, self._timed(name, method))
+        auth._metrics = self
+        return auth
+
+    def _timed(self, call, method):
+        histogram = self.db_seconds
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - t0, call)
+        return timed
+
+    def watch_queues(self, depths):
+        """depths() -> {queue name: current depth}, read at scrape time"""
+        self.registry.register(CallbackMetric(
+            "proctor_queue_depth", "Items waiting in internal queues", GAUGE,
+            lambda: [((name,), value) for name, value in depths().items()], ("queue",)))
+
+    def watch_bus(self, bus):
+        """Per-sink delivered/dropped counts of an event_bus.EventBus"""
+        self.registry.register(CallbackMetric(
+            "proctor_sink_events_total", "Events handled by each bus sink", COUNTER,
+            lambda: [((s.name, outcome), getattr(s, outcome)) for s in bus.sinks
+                     for outcome in ("delivered", "dropped", "errors")], ("sink", "outcome")))
+
+    # ---- endpoint ----
+
+    def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Serve /metrics from a daemon thread; returns False if the port is unavailable"""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # a scrape every few seconds would flood the console
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"❌ Metrics endpoint {host}:{port} unavailable: {e}")
+            return False
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+        print(f"📈 Metrics at http://{host}:{self.server.server_port}/metrics")
+        return True
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def parse_endpoint(value):
+    """'[host:]port' -> (host, port); a bare port binds to localhost only"""
+    if isinstance(value, tuple):
+        return value
+    host, _, port = str(value).rpartition(":")
+    port = int(port)
+    if not 0 <= port <= 65535:
+        raise ValueError(f"Port {port} out of range")
+    return host or "127.0.0.1", port
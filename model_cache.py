@@ -0,0 +1,237 @@
+"""
+Compiled model cache
+Stores ready-to-run TorchScript artifacts of the detector models in
+data/cache/models/, so ProctorMonitor starts by loading a frozen graph
+instead of rebuilding, loading weights and fusing every launch.
+
+Artifacts are named <model>.<variant>.<key>: the variant is the device
+plus the model inputs (weights, input size), the key additionally covers
+the torch / facenet-pytorch / ultralytics versions. When a version
+changes, the variant is rebuilt and its stale artifacts are removed;
+artifacts of other devices or inputs sharing the directory are left alone.
+
+Usage:
+    python model_cache.py build [--device cpu]
+    python model_cache.py bench [--device cpu] [--runs 3]
+    python model_cache.py clear
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+import torch
+
+CACHE_DIR = os.path.join('data', 'cache', 'models')
+FORMAT_VERSION = 1
+
+FACE_WEIGHTS = "vggface2"
+FACE_INPUT = (1, 3, 160, 160)
+YOLO_WEIGHTS = "yolov8n.pt"
+YOLO_IMGSZ = 320
+
+
+def _version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _weights_version(weights):
+    """Identify a local weights file by size and mtime; remote names by name only"""
+    try:
+        st = os.stat(weights)
+    except OSError:
+        return weights
+    return f"{os.path.basename(weights)}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _device_id(device):
+    device = torch.device(device)
+    if device.type == "cuda":
+        return f"cuda:{torch.cuda.get_device_name(device)}"
+    return device.type
+
+
+def cache_key(name, device, **inputs):
+    """Short hash of everything the artifact depends on"""
+    parts = {
+        "format": FORMAT_VERSION,
+        "model": name,
+        "device": _device_id(device),
+        "torch": torch.__version__,
+        "facenet_pytorch": _version("facenet-pytorch"),
+        "ultralytics": _version("ultralytics"),
+        **inputs,
+    }
+    blob = json.dumps(parts, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+
+def cache_variant(device, **inputs):
+    """Readable device tag plus a short hash of the inputs, e.g. 'cpu-1a2b3c4d'"""
+    tag = re.sub(r"[^a-z0-9]+", "-", _device_id(device).lower()).strip("-")
+    blob = json.dumps(inputs, sort_keys=True).encode("utf-8")
+    return f"{tag}-{hashlib.sha256(blob).hexdigest()[:8]}"
+
+
+def _artifact_path(cache_dir, name, variant, key, ext):
+    return os.path.join(cache_dir, f"{name}.{variant}.{key}.{ext}")
+
+
+def _evict_stale(cache_dir, name, variant, ext, keep):
+    """
+    Remove this variant's artifacts built for other versions. In-flight
+    '<artifact>.<pid>.tmp' files of other processes don't match the pattern.
+    """
+    for path in glob.glob(os.path.join(cache_dir, f"{name}.{variant}.*.{ext}")):
+        if os.path.abspath(path) != os.path.abspath(keep):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another process evicted it first
+
+
+def load_face_embedder(device, cache_dir=CACHE_DIR, weights=FACE_WEIGHTS):
+    """
+    InceptionResnetV1 as a frozen TorchScript module.
+    Traced and frozen (batch norm folded into the convolutions) on a cache miss.
+    """
+    key = cache_key("face_embedder", device, weights=weights, input=FACE_INPUT)
+    variant = cache_variant(device, weights=weights, input=FACE_INPUT)
+    path = _artifact_path(cache_dir, "face_embedder", variant, key, "pt")
+    if os.path.exists(path):
+        try:
+            return torch.jit.load(path, map_location=device)
+        except Exception as e:
+            print(f"⚠️ Discarding unreadable model cache {path}: {e}")
+
+    from facenet_pytorch import InceptionResnetV1
+    print("🔧 Compiling face embedder (first run for this device/version)...")
+    model = InceptionResnetV1(pretrained=weights).eval().to(device)
+    with torch.no_grad():
+        traced = torch.jit.trace(model, torch.zeros(FACE_INPUT, device=device))
+    frozen = torch.jit.freeze(traced)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.jit.save(frozen, tmp_path)
+    os.replace(tmp_path, path)
+    _evict_stale(cache_dir, "face_embedder", variant, "pt", keep=path)
+    return frozen
+
+
+def load_object_detector(device, cache_dir=CACHE_DIR, weights=YOLO_WEIGHTS, imgsz=YOLO_IMGSZ):
+    """
+    YOLO exported to TorchScript at a fixed input size (layers already fused).
+    The returned model only runs at `imgsz` and takes its device per predict() call.
+    """
+    from ultralytics import YOLO
+
+    key = cache_key("object_detector", device, weights=_weights_version(weights), imgsz=imgsz)
+    variant = cache_variant(device, weights=os.path.basename(weights), imgsz=imgsz)
+    path = _artifact_path(cache_dir, "object_detector", variant, key, "torchscript")
+    if os.path.exists(path):
+        try:
+            return YOLO(path, task="detect")
+        except Exception as e:
+            print(f"⚠️ Discarding unreadable model cache {path}: {e}")
+
+    print("🔧 Exporting object detector (first run for this device/version)...")
+    exported = YOLO(weights).export(format="torchscript", imgsz=imgsz, device=device, verbose=False)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.move(exported, tmp_path)
+    os.replace(tmp_path, path)
+    _evict_stale(cache_dir, "object_detector", variant, "torchscript", keep=path)
+    return YOLO(path, task="detect")
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    if os.path.isdir(cache_dir):
+        shutil.rmtree(cache_dir)
+    print(f"🗑️ Cleared {cache_dir}")
+
+
+# ==========================================
+# Startup benchmark
+# ==========================================
+
+def _time_startup(device, cache_dir, use_cache):
+    """Seconds to get both models ready to run, the way ProctorMonitor does"""
+    t0 = time.perf_counter()
+    if use_cache:
+        load_face_embedder(device, cache_dir)
+        load_object_detector(device, cache_dir)
+    else:
+        from facenet_pytorch import InceptionResnetV1
+        from ultralytics import YOLO
+        InceptionResnetV1(pretrained=FACE_WEIGHTS).eval().to(device)
+        YOLO(YOLO_WEIGHTS).to(device)
+    return time.perf_counter() - t0
+
+
+def _run_child(mode, device, cache_dir):
+    """Time one startup in a fresh interpreter, so nothing is warm in-process"""
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "_time", mode, "--device", device,
+         "--cache-dir", cache_dir],
+        capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def bench(device, runs=3):
+    """Cold and warm runs use a scratch cache, so the real one is left alone"""
+    results = {"uncached": [], "cold": [], "warm": []}
+    cache_dir = tempfile.mkdtemp(prefix="model_cache_bench_")
+    try:
+        for _ in range(runs):
+            results["uncached"].append(_run_child("uncached", device, cache_dir))
+        results["cold"].append(_run_child("cached", device, cache_dir))
+        for _ in range(runs):
+            results["warm"].append(_run_child("cached", device, cache_dir))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"📊 Model startup on {device} (best of {runs}, fresh process each):")
+    for mode, times in results.items():
+        print(f"  {mode:<9} {min(times) * 1000:8.0f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compiled detector model cache")
+    parser.add_argument("command", choices=["build", "bench", "clear", "_time"])
+    parser.add_argument("mode", nargs="?", choices=["uncached", "cached"])
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        load_face_embedder(args.device, args.cache_dir)
+        load_object_detector(args.device, args.cache_dir)
+        print(f"✅ Models cached in {args.cache_dir}")
+    elif args.command == "bench":
+        bench(args.device, args.runs)
+    elif args.command == "clear":
+        clear_cache(args.cache_dir)
+    else:
+        print(_time_startup(args.device, args.cache_dir, args.mode == "cached"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Randomized paper generation
+Draws a per-candidate paper from a compiled QuestionBank, stratified by
+topic and difficulty, with shuffled question and option order. Papers are
+seeded from the exam code and session id, so any paper can be regenerated
+for grading instead of being stored.
+"""
+
+import hashlib
+import random
+
+
+def session_seed(exam_code, session_id):
+    """Deterministic 64-bit seed for a candidate's paper"""
+    digest = hashlib.sha256(f"{exam_code}:{session_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def allocate(strata_sizes, size):
+    """
+    Split `size` questions across strata proportionally to their sizes
+    (largest remainder, ties broken by key so the result is deterministic).
+    strata_sizes: {key: available questions}. Returns {key: count}.
+    """
+    total = sum(strata_sizes.values())
+    size = min(size, total)
+    if size == 0:
+        return {key: 0 for key in strata_sizes}
+
+    quotas = {key: n * size / total for key, n in strata_sizes.items()}
+    counts = {key: int(q) for key, q in quotas.items()}
+    leftover = size - sum(counts.values())
+    by_remainder = sorted(quotas, key=lambda k: (counts[k] - quotas[k], k))
+    for key in by_remainder:
+        if leftover == 0:
+            break
+        if counts[key] < strata_sizes[key]:
+            counts[key] += 1
+            leftover -= 1
+    return counts
+
+
+class PaperGenerator:
+    """
+    Generate papers from a QuestionBank.
+    blueprint: optional {(topic, difficulty): count}; by default questions
+    are allocated proportionally to the size of each stratum.
+    Sampling touches only the chosen questions, so generating a paper costs
+    O(paper size) regardless of bank size.
+    """
+
+    def __init__(self, bank, size=20, blueprint=None, shuffle_options=True):
+        self.bank = bank
+        self.shuffle_options = shuffle_options
+        if blueprint is None:
+            sizes = {key: n for key, (_, n) in bank.strata.items()}
+            blueprint = allocate(sizes, size)
+        for key, count in blueprint.items():
+            available = bank.strata.get(key, (0, 0))[1]
+            if count > available:
+                raise ValueError(f"Blueprint asks for {count} {key} questions, bank has {available}")
+        # Sorted so iteration order (and hence the RNG stream) never depends on dict order
+        self.blueprint = dict(sorted(blueprint.items()))
+
+    def generate(self, seed):
+        """
+        Build the paper for `seed`. Each question carries 'bank_index' and
+        'option_order' (original option index for each displayed option);
+        'answer' is remapped to the displayed order.
+        """
+        rng = random.Random(seed)
+        picks = []
+        for key, count in self.blueprint.items():
+            if count == 0:
+                continue
+            _, n = self.bank.strata[key]
+            for j in rng.sample(range(n), count):
+                picks.append(self.bank.stratum_question(key, j))
+        rng.shuffle(picks)
+
+        paper = []
+        for bank_index in picks:
+            q = self.bank[bank_index]
+            order = list(range(len(q["options"])))
+            if self.shuffle_options:
+                rng.shuffle(order)
+            paper.append({
+                "q": q["q"],
+                "options": [q["options"][i] for i in order],
+                "answer": order.index(q["answer"]),
+                "topic": q["topic"],
+                "difficulty": q["difficulty"],
+                "bank_index": bank_index,
+                "option_order": order,
+            })
+        return paper
@@ -0,0 +1,357 @@
+"""
+Question bank loader
+Parses markdown (data/questions.txt format) or JSON banks and compiles them
+into a binary cache that is memory-mapped at exam start. The cache is keyed
+on the source's mtime/size and SHA-256, and questions are decoded lazily.
+
+Usage:
+    python question_bank.py compile data/questions.txt
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+CACHE_DIR = os.path.join('data', 'cache')
+DEFAULT_TOPIC = "general"
+DEFAULT_DIFFICULTY = "medium"
+OPTION_COUNT = 4  # the exam window has one button per option
+
+MAGIC = b"QBNK"
+FORMAT_VERSION = 2  # 2: banks are validated to OPTION_COUNT options per question
+# magic, version, reserved, count, src mtime_ns, src size, src sha256,
+# meta offset, meta length, index offset, strata offset, records offset
+HEADER = struct.Struct("<4sHHIQQ32sQQQQQ")
+OFFSET = struct.Struct("<Q")
+INDEX = struct.Struct("<I")
+
+_QUESTION_RE = re.compile(r"^\*\*\s*(\d+)[.)]\s*(.+?)\s*\*\*$")
+_OPTION_RE = re.compile(r"^([A-Z])[.)]\s*(.+)$")
+_FIELD_RE = re.compile(r"^\*\*\s*(Answer|Topic|Difficulty)\s*:\s*\*\*\s*(.+)$", re.IGNORECASE)
+
+
+# ==========================================
+# Parsing
+# ==========================================
+
+def _answer_index(value, n_options):
+    """'B' / 'b' / 1 -> option index"""
+    if isinstance(value, int):
+        idx = value
+    else:
+        value = str(value).strip()
+        idx = int(value) if value.isdigit() else ord(value[0].upper()) - ord('A')
+    if not 0 <= idx < n_options:
+        raise ValueError(f"Answer {value!r} out of range")
+    return idx
+
+
+def _check_options(number, options):
+    if len(options) != OPTION_COUNT:
+        raise ValueError(f"Question {number} has {len(options)} options, expected {OPTION_COUNT}")
+
+
+def parse_markdown_bank(text):
+    """
+    Parse the markdown bank format:
+        ## Bank title
+        ### Topic heading (optional, applies to following questions)
+        **1. Question text?**
+        A. option ...
+        **Answer:** B
+        **Topic:** ... / **Difficulty:** ... (optional, per question)
+    Returns (title, questions).
+    """
+    title = ""
+    topic = DEFAULT_TOPIC
+    questions = []
+    current = None
+
+    def finish():
+        if current is None:
+            return
+        if current["answer"] is None:
+            raise ValueError(f"Question {current['number']} is missing an answer")
+        _check_options(current["number"], current["options"])
+        questions.append(current)
+
+    for line_no, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("### "):
+            topic = line[4:].strip()
+            continue
+        if line.startswith("## "):
+            title = line[3:].strip()
+            continue
+
+        m = _QUESTION_RE.match(line)
+        if m:
+            finish()
+            current = {"number": int(m.group(1)), "q": m.group(2), "options": [],
+                       "answer": None, "topic": topic, "difficulty": DEFAULT_DIFFICULTY}
+            continue
+        if current is None:
+            continue
+
+        m = _FIELD_RE.match(line)
+        if m:
+            field, value = m.group(1).lower(), m.group(2).strip()
+            if field == "answer":
+                current["answer"] = _answer_index(value, len(current["options"]))
+            else:
+                current[field] = value
+            continue
+
+        m = _OPTION_RE.match(line)
+        if m:
+            current["options"].append(m.group(2))
+        else:
+            raise ValueError(f"Line {line_no}: unrecognised bank line {raw!r}")
+
+    finish()
+    return title, questions
+
+
+def parse_json_bank(text):
+    """
+    Parse the JSON bank format:
+        {"title": "...", "questions": [{"q": "...", "options": [...], "answer": 1 | "B",
+                                        "topic": "...", "difficulty": "..."}]}
+    A bare list of questions is accepted too. Returns (title, questions).
+    """
+    data = json.loads(text)
+    if isinstance(data, list):
+        data = {"questions": data}
+    questions = []
+    for number, q in enumerate(data["questions"], 1):
+        number = q.get("number", number)
+        options = list(q["options"])
+        _check_options(number, options)
+        questions.append({
+            "number": number,
+            "q": q["q"],
+            "options": options,
+            "answer": _answer_index(q["answer"], len(options)),
+            "topic": q.get("topic", DEFAULT_TOPIC),
+            "difficulty": q.get("difficulty", DEFAULT_DIFFICULTY),
+        })
+    return data.get("title", ""), questions
+
+
+def parse_bank(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith(".json"):
+        return parse_json_bank(text)
+    return parse_markdown_bank(text)
+
+
+# ==========================================
+# Compiled cache
+# ==========================================
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.digest()
+
+
+def compile_bank(source, cache_path):
+    """Parse a bank and write its compiled form atomically to cache_path"""
+    st = os.stat(source)
+    digest = _file_sha256(source)
+    title, questions = parse_bank(source)
+
+    # Questions grouped by (topic, difficulty) so papers can be drawn per stratum
+    groups = {}
+    for i, q in enumerate(questions):
+        groups.setdefault((q["topic"], q["difficulty"]), []).append(i)
+    strata = []
+    strata_blob = bytearray()
+    for (topic, difficulty), indices in groups.items():
+        strata.append([topic, difficulty, len(strata_blob) // INDEX.size, len(indices)])
+        for i in indices:
+            strata_blob += INDEX.pack(i)
+
+    records = [json.dumps(q, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+               for q in questions]
+    meta = json.dumps({"title": title, "source": os.path.abspath(source),
+                       "strata": strata}).encode("utf-8")
+
+    meta_off = HEADER.size
+    index_off = meta_off + len(meta)
+    strata_off = index_off + OFFSET.size * (len(records) + 1)
+    records_off = strata_off + len(strata_blob)
+
+    offsets = bytearray()
+    pos = 0
+    for rec in records:
+        offsets += OFFSET.pack(pos)
+        pos += len(rec)
+    offsets += OFFSET.pack(pos)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(records), st.st_mtime_ns, st.st_size,
+                         digest, meta_off, len(meta), index_off, strata_off, records_off)
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(meta)
+        f.write(offsets)
+        f.write(strata_blob)
+        for rec in records:
+            f.write(rec)
+    os.replace(tmp_path, cache_path)
+    print(f"✅ Compiled question bank: {len(records)} questions -> {cache_path}")
+    return cache_path
+
+
+# What a truncated or corrupt cache file raises when it is decoded
+CACHE_ERRORS = (ValueError, KeyError, IndexError, TypeError, struct.error)
+
+
+def _read_header(cache_path):
+    try:
+        with open(cache_path, "rb") as f:
+            raw = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(raw) != HEADER.size:
+        return None
+    header = HEADER.unpack(raw)
+    if header[0] != MAGIC or header[1] != FORMAT_VERSION:
+        return None
+    return header
+
+
+def cache_path_for(source, cache_dir=CACHE_DIR):
+    """Cache file for a source bank (one per absolute source path)"""
+    key = hashlib.sha1(os.path.abspath(source).encode("utf-8")).hexdigest()[:10]
+    base = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, f"{base}.{key}.qbc")
+
+
+def load_question_bank(source, cache_dir=CACHE_DIR):
+    """
+    Open the compiled form of a bank, compiling it first if needed.
+    Unchanged mtime/size reuses the cache without reading the source; if
+    only the mtime changed but the content hash matches, the cache is
+    re-stamped instead of recompiled.
+    """
+    cache_path = cache_path_for(source, cache_dir)
+    st = os.stat(source)
+    header = _read_header(cache_path)
+
+    if header is None:
+        compile_bank(source, cache_path)
+        return QuestionBank(cache_path)
+    elif (header[4], header[5]) != (st.st_mtime_ns, st.st_size):
+        if _file_sha256(source) == header[6]:
+            stamped = HEADER.pack(*(header[:4] + (st.st_mtime_ns, st.st_size) + header[6:]))
+            with open(cache_path, "r+b") as f:
+                f.write(stamped)
+        else:
+            compile_bank(source, cache_path)
+            return QuestionBank(cache_path)
+
+    try:
+        return QuestionBank(cache_path)
+    except CACHE_ERRORS as e:
+        # A damaged cache is just a miss
+        print(f"⚠️ Question bank cache unreadable ({type(e).__name__}: {e}), recompiling")
+        compile_bank(source, cache_path)
+        return QuestionBank(cache_path)
+
+
+class QuestionBank:
+    """
+    Read-only view over a compiled bank.
+    Only the header and metadata are parsed on open; questions are decoded
+    from the memory map when accessed.
+    """
+
+    def __init__(self, cache_path):
+        self.path = cache_path
+        self._file = open(cache_path, "rb")
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (_, _, _, self.count, _, _, self.sha256,
+             meta_off, meta_len, self._index_off, self._strata_off, self._records_off) = \
+                HEADER.unpack_from(self._mm, 0)
+            meta = json.loads(self._mm[meta_off:meta_off + meta_len])
+            self.title = meta["title"]
+            # (topic, difficulty) -> (offset into strata array, count)
+            self.strata = {(t, d): (off, n) for t, d, off, n in meta["strata"]}
+            # The last index entry is the end of the records: catches truncation
+            records_len = OFFSET.unpack_from(self._mm, self._index_off + OFFSET.size * self.count)[0]
+            if self._records_off + records_len != len(self._mm):
+                raise ValueError(f"cache is {len(self._mm)} bytes, expected {self._records_off + records_len}")
+        except Exception:
+            if self._mm is not None:
+                self._mm.close()
+            self._file.close()
+            raise
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start, end = struct.unpack_from("<QQ", self._mm, self._index_off + OFFSET.size * i)
+        base = self._records_off
+        return json.loads(self._mm[base + start:base + end])
+
+    def load(self, indices):
+        """Decode only the given questions"""
+        return [self[i] for i in indices]
+
+    def load_all(self):
+        return self.load(range(self.count))
+
+    def stratum_question(self, key, j):
+        """Bank index of the j-th question in a (topic, difficulty) stratum"""
+        off, n = self.strata[key]
+        if not 0 <= j < n:
+            raise IndexError(j)
+        return INDEX.unpack_from(self._mm, self._strata_off + INDEX.size * (off + j))[0]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] != "compile":
+        print(__doc__)
+        return 2
+    try:
+        with load_question_bank(argv[1]) as bank:
+            print(f"📚 {bank.title or argv[1]}: {len(bank)} questions, {len(bank.strata)} topic/difficulty strata")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {argv[1]}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
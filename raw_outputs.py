@@ -0,0 +1,153 @@
+"""
+Raw per-frame model outputs
+Everything ProctorMonitor's violation decisions are computed from, before
+any threshold is applied: MTCNN face boxes, probabilities and landmarks,
+the primary face's embedding distance to the reference, and each YOLO
+phone/book detection above the confidence floor. Recording a session once
+lets retune.py replay the decisions under other thresholds and hold times
+without running the models again.
+
+Three tables in the telemetry.py column format under one directory, plus
+meta.json with the detector settings the session ran with:
+
+    frames/   one row per processed frame
+    faces/    one row per detected face, keyed by frame index
+    objects/  one row per YOLO detection, keyed by frame index
+
+A directory holds exactly one recording: frame indexes and the detector
+clock start over with every ProctorMonitor. A session that is resumed
+after a crash therefore records each attempt into its own run_<n>
+subdirectory (telemetry.new_run_dir), and telemetry.recording_runs lists
+them for replay.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from detector import COCO_PHONE_NAME, COCO_BOOK_NAME
+from telemetry import TelemetryRecorder, load_telemetry
+
+# 'cls' column of the objects table -> class name
+OBJECT_CLASSES = (COCO_PHONE_NAME, COCO_BOOK_NAME)
+_CLASS_IDS = {name: i for i, name in enumerate(OBJECT_CLASSES)}
+
+_BOX = {"x1": "<f4", "y1": "<f4", "x2": "<f4", "y2": "<f4"}
+
+FRAME_COLUMNS = {
+    "t": "<f8",            # detector clock (seconds)
+    "obstructed": "u1",    # 1 if the quality gate failed (no models ran)
+    "face_count": "u1",
+    "primary": "i1",       # index of the primary (largest) face in this frame's faces, -1 if none
+    "embed_dist": "<f4",   # primary face to reference; NaN when identity wasn't checked
+    "yolo_ran": "u1",      # 1 on frames where YOLO ran (its detections are in objects/)
+}
+FACE_COLUMNS = {
+    "frame": "<u4",
+    **_BOX,
+    "prob": "<f4",
+    # MTCNN landmarks: left eye, right eye, nose, mouth left, mouth right
+    **{f"kp{i}_{axis}": "<f4" for i in range(5) for axis in "xy"},
+}
+OBJECT_COLUMNS = {
+    "frame": "<u4",
+    "cls": "u1",           # index into OBJECT_CLASSES
+    "conf": "<f4",
+    **_BOX,
+}
+
+TABLES = {"frames": FRAME_COLUMNS, "faces": FACE_COLUMNS, "objects": OBJECT_COLUMNS}
+FORMAT_VERSION = 1
+
+
+class RawOutputRecorder:
+    """
+    Set as ProctorMonitor.raw_outputs; the monitor calls record() or
+    record_obstructed() once per frame. settings is
+    ProctorMonitor.decision_settings(), kept as the replay baseline.
+    Raises FileExistsError if path already holds a recording.
+    """
+
+    def __init__(self, path, settings=None, chunk_rows=4096):
+        if any(os.path.exists(os.path.join(path, name)) for name in ("meta.json", *TABLES)):
+            raise FileExistsError(f"{path} already holds a raw output recording")
+        self.path = path
+        self.settings = settings or {}
+        self.tables = {name: TelemetryRecorder(os.path.join(path, name), chunk_rows, columns)
+                       for name, columns in TABLES.items()}
+        self.frames = self.tables["frames"]
+        self.faces = self.tables["faces"]
+        self.objects = self.tables["objects"]
+        self._write_meta()
+
+    def _write_meta(self, counters=None, closed=False):
+        meta = {
+            "version": FORMAT_VERSION,
+            "object_classes": list(OBJECT_CLASSES),
+            "settings": self.settings,
+            # Live event counts, to check a replay at the recorded settings against
+            "counters": counters,
+            "closed": closed,
+        }
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def record(self, t, boxes, probs, landmarks, primary, embed_dist, detections=None):
+        """
+        One frame that passed the quality gate: MTCNN's (boxes, probs,
+        landmarks), the primary face index, and the YOLO detections
+        [(name, conf, box)] if YOLO ran on this frame
+        """
+        frame = self.frames.rows
+        face_count = 0
+        if boxes is not None and landmarks is not None:
+            face_count = len(boxes)
+            for box, prob, kps in zip(boxes, probs, landmarks):
+                self.faces.record(frame, *box, prob, *kps.ravel())
+        if detections is not None:
+            for name, conf, box in detections:
+                self.objects.record(frame, _CLASS_IDS[name], conf, *box)
+        self._record_frame(t, 0, face_count, primary, embed_dist, detections is not None)
+
+    def record_obstructed(self, t):
+        self._record_frame(t, 1, 0, -1, float("nan"), 0)
+
+    def _record_frame(self, *values):
+        self.frames.record(*values)
+        if self.frames._n == 0:
+            # The frames table just flushed; flush the others with it so the
+            # faces and objects on disk always cover the frames on disk
+            self.faces.flush()
+            self.objects.flush()
+
+    def close(self, counters=None):
+        for table in self.tables.values():
+            table.close()
+        self._write_meta(counters, closed=True)
+
+
+def load_raw_outputs(path):
+    """
+    One recording (see telemetry.recording_runs):
+    {'meta': ..., 'frames': {column: array}, 'faces': ..., 'objects': ...}
+    After a crash the tables are trimmed to the frames that were fully written.
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    data = {"meta": meta}
+    for name in TABLES:
+        table = load_telemetry(os.path.join(path, name))
+        rows = min(len(col) for col in table.values())
+        data[name] = {col: values[:rows] for col, values in table.items()}
+    n = len(data["frames"]["t"])
+    for name in ("faces", "objects"):
+        keep = data[name]["frame"] < n
+        if not keep.all():
+            data[name] = {col: values[keep] for col, values in data[name].items()}
+    return data
+
+
+def face_landmarks(faces):
+    """(n, 5, 2) landmark array from a faces table"""
+    return np.stack([np.stack([faces[f"kp{i}_x"], faces[f"kp{i}_y"]], axis=-1) for i in range(5)], axis=1)
@@ -0,0 +1,363 @@
+"""
+Offline threshold re-tuning
+Replays ProctorMonitor's violation decisions over model outputs recorded
+with raw_outputs.py, for a grid of thresholds and hold times, and reports
+how many events each configuration would have raised. No model runs: the
+per-frame conditions are recomputed as (configurations x frames) arrays
+and EventFlag's hold/release logic is applied to all of them at once.
+Phone and book presence replays the ObjectTracker over the recorded YOLO
+detections, once per confidence floor.
+
+Each behaviour depends only on its own parameters, so each is swept over
+its own grid rather than one product of everything:
+
+    away        --yaw  --pitch-min  --pitch-max  --hold-away
+    identity    --identity  --hold-identity
+    phone/book  --min-conf  --confirm  --hold-objects
+    multi       --hold-multi
+    obstructed  --hold-obstructed
+    all         --release
+
+Options take comma-separated values. A parameter that is left out keeps
+the value the session was recorded with, so a bare run reproduces the
+live event counts (shown alongside for comparison).
+
+Record with `python main.py --raw-outputs` or
+`python batch_proctor.py recordings/ --raw-outputs`, then:
+
+    python retune.py data/raw_outputs/session_12 --yaw 0.35,0.45,0.55 --hold-away 1.5,2.5,4
+    python retune.py data/reports/*_raw --min-conf 0.25,0.4 --confirm 0.3,0.4,0.6 --csv sweep.csv
+
+A session directory with several runs (the exam was resumed) replays
+each run as a separate recording.
+"""
+
+import argparse
+import csv
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from detector import (COCO_BOOK_NAME, COCO_PHONE_NAME, EVENT_COUNTERS, compute_head_pose,
+                      is_looking_away)
+from raw_outputs import OBJECT_CLASSES, face_landmarks, load_raw_outputs
+from telemetry import recording_runs
+from tracking import ObjectTracker
+
+BEHAVIOURS = ("away", "identity", "phone", "book", "multi", "obstructed")
+
+# Behaviour -> grid parameters its per-frame condition depends on
+CONDITION_PARAMS = {
+    "away": ("yaw", "pitch_min", "pitch_max"),
+    "identity": ("identity",),
+    "phone": ("min_conf", "confirm"),
+    "book": ("min_conf", "confirm"),
+    "multi": (),
+    "obstructed": (),
+}
+OBJECT_BEHAVIOURS = {"phone": COCO_PHONE_NAME, "book": COCO_BOOK_NAME}
+
+
+# ==========================================
+# Event replay
+# ==========================================
+
+def count_events(t, active, holds, release, cooldown=0.0):
+    """
+    Events EventFlag would open for each row of `active` (K, N), for each
+    hold time: returns (K, H) counts. t is the (N,) frame clock.
+
+    A run of active frames opens an event if it lasts `hold`; once open, the
+    event absorbs following runs until an inactive frame comes `release`
+    after the last active one. So runs chain into clusters independently
+    of the hold, and each cluster holds one event if any run in it is long
+    enough. A cooldown makes clusters depend on the previous close time and
+    is replayed cluster by cluster.
+    """
+    active = np.atleast_2d(active)
+    holds = np.asarray(holds, dtype=np.float64)
+    k = active.shape[0]
+    counts = np.zeros((k, len(holds)), dtype=np.int64)
+
+    edges = np.diff(active.astype(np.int8), axis=1, prepend=0, append=0)
+    run_row, run_first = np.nonzero(edges == 1)
+    run_stop = np.nonzero(edges == -1)[1]       # first inactive frame after each run (N at the end)
+    if len(run_row) == 0:
+        return counts
+    start = t[run_first]
+    end = t[run_stop - 1]
+    qualifies = ((end - start)[:, None] >= holds[None, :]).astype(np.uint8)   # (runs, H)
+
+    # A run joins the previous run's cluster if the last inactive frame
+    # between them came less than `release` after the previous run ended
+    joins = np.zeros(len(run_row), dtype=bool)
+    joins[1:] = (run_row[1:] == run_row[:-1]) & (t[run_first[1:] - 1] - end[:-1] < release)
+    cluster_first = np.flatnonzero(~joins)
+
+    if cooldown <= 0:
+        opened = np.maximum.reduceat(qualifies, cluster_first, axis=0)
+        np.add.at(counts, run_row[cluster_first], opened)
+        return counts
+
+    cluster_stop = np.append(cluster_first[1:], len(run_row))
+    for h, hold in enumerate(holds):
+        closed_at = np.full(k, -np.inf)
+        for a, b in zip(cluster_first, cluster_stop):
+            row = run_row[a]
+            # Opens at a frame at least `hold` into a run and `cooldown` after the last close
+            if not np.any((end[a:b] - start[a:b] >= hold) & (end[a:b] - closed_at[row] >= cooldown)):
+                continue
+            counts[row, h] += 1
+            after = t[run_stop[b - 1]:] - end[b - 1]
+            i = np.searchsorted(after, release)
+            closed_at[row] = t[run_stop[b - 1] + i] if i < len(after) else np.inf
+    return counts
+
+
+# ==========================================
+# Per-frame signals
+# ==========================================
+
+def session_signals(data):
+    """Per-frame arrays the conditions are computed from, for one recorded session"""
+    frames, faces = data["frames"], data["faces"]
+    n = len(frames["t"])
+    t = np.asarray(frames["t"], dtype=np.float64)
+    primary = np.asarray(frames["primary"], dtype=np.int64)
+
+    # Head pose of each frame's primary face (NaN without one, i.e. never "away")
+    yaw = np.full(n, np.nan, dtype=np.float32)
+    pitch = np.full(n, np.nan, dtype=np.float32)
+    with_face = np.flatnonzero(primary >= 0)
+    if len(with_face):
+        # faces are stored in frame order; a frame's faces start at its first row
+        rows = np.searchsorted(faces["frame"], with_face) + primary[with_face]
+        kps = face_landmarks({name: np.asarray(col)[rows] for name, col in faces.items()})
+        yaw[with_face], pitch[with_face] = compute_head_pose(kps)
+
+    return {
+        "data": data,
+        "settings": data["meta"]["settings"],
+        "counters": data["meta"].get("counters"),
+        "t": t,
+        "ok": np.asarray(frames["obstructed"]) == 0,
+        "face_count": np.asarray(frames["face_count"]),
+        "yaw": yaw,
+        "pitch": pitch,
+        "embed_dist": np.asarray(frames["embed_dist"], dtype=np.float64),
+        "object_scores": {},
+    }
+
+
+def object_scores(signals, min_conf):
+    """
+    (classes, N) best accumulated track score per frame, replaying the
+    tracker over the recorded detections at or above min_conf
+    """
+    cached = signals["object_scores"].get(min_conf)
+    if cached is not None:
+        return cached
+    data = signals["data"]
+    frames, objects = data["frames"], data["objects"]
+    t = signals["t"]
+    n = len(t)
+    tracker = ObjectTracker(**signals["settings"]["tracker"])
+
+    yolo_frames = np.flatnonzero(np.asarray(frames["yolo_ran"]))
+    frame_col = np.asarray(objects["frame"])
+    starts = np.searchsorted(frame_col, yolo_frames, "left")
+    stops = np.searchsorted(frame_col, yolo_frames, "right")
+    conf = np.asarray(objects["conf"])
+    cls = np.asarray(objects["cls"])
+    boxes = np.stack([np.asarray(objects[c]) for c in ("x1", "y1", "x2", "y2")], axis=1)
+    keep = conf >= min_conf
+
+    at_runs = np.zeros((len(OBJECT_CLASSES), len(yolo_frames)))
+    for j, (f, a, b) in enumerate(zip(yolo_frames, starts, stops)):
+        detections = [(OBJECT_CLASSES[cls[i]], float(conf[i]), tuple(boxes[i].tolist()))
+                      for i in range(a, b) if keep[i]]
+        tracker.update(detections, t[f])
+        for c, name in enumerate(OBJECT_CLASSES):
+            at_runs[c, j] = tracker.presence(name)[1]
+
+    # Track scores only change when YOLO runs; carry them forward in between
+    last_run = np.searchsorted(yolo_frames, np.arange(n), "right") - 1
+    scores = np.where(last_run >= 0, at_runs[:, np.maximum(last_run, 0)], 0.0)
+    signals["object_scores"][min_conf] = scores
+    return scores
+
+
+def conditions(behaviour, signals, combos):
+    """(len(combos), N) per-frame condition for each parameter combination"""
+    ok = signals["ok"]
+    if behaviour == "away":
+        yaw_t, pitch_min, pitch_max = (np.array(v, dtype=np.float64)[:, None] for v in zip(*combos))
+        return is_looking_away(signals["yaw"][None, :], signals["pitch"][None, :],
+                               yaw_t, (pitch_min, pitch_max))
+    if behaviour == "identity":
+        thresholds = np.array([c[0] for c in combos], dtype=np.float64)[:, None]
+        return signals["embed_dist"][None, :] > thresholds
+    if behaviour in OBJECT_BEHAVIOURS:
+        c = OBJECT_CLASSES.index(OBJECT_BEHAVIOURS[behaviour])
+        return np.stack([(object_scores(signals, min_conf)[c] >= confirm) & ok
+                         for min_conf, confirm in combos])
+    if behaviour == "multi":
+        return (signals["face_count"] > 1)[None, :]
+    return (~ok)[None, :]
+
+
+# ==========================================
+# Sweep
+# ==========================================
+
+def default_grid(settings):
+    """Every parameter at the value the session was recorded with"""
+    pitch_min, pitch_max = settings["pitch_range"]
+    grid = {
+        "yaw": [settings["yaw_threshold"]],
+        "pitch_min": [pitch_min],
+        "pitch_max": [pitch_max],
+        "identity": [settings["identity_threshold"]],
+        "min_conf": [settings["yolo_conf"]],
+        "confirm": [settings["tracker"]["confirm_score"]],
+        "release": [settings["release"]],
+    }
+    for key, hold in settings["holds"].items():
+        grid[f"hold_{key}"] = [hold]
+    return grid
+
+
+def sweep(sessions, grid, behaviours=BEHAVIOURS, cooldown=0.0):
+    """[(behaviour, {param: value}, events summed over sessions)]"""
+    results = []
+    for behaviour in behaviours:
+        names = CONDITION_PARAMS[behaviour]
+        combos = list(itertools.product(*(grid[name] for name in names)))
+        holds = grid[f"hold_{behaviour}"]
+        counts = np.zeros((len(grid["release"]), len(combos), len(holds)), dtype=np.int64)
+        for signals in sessions:
+            active = conditions(behaviour, signals, combos)
+            for r, release in enumerate(grid["release"]):
+                counts[r] += count_events(signals["t"], active, holds, release, cooldown)
+        for (k, combo), (h, hold), (r, release) in itertools.product(
+                enumerate(combos), enumerate(holds), enumerate(grid["release"])):
+            params = dict(zip(names, combo), hold=hold, release=release)
+            results.append((behaviour, params, int(counts[r, k, h])))
+    return results
+
+
+def _recorded_params(behaviour, grid):
+    params = {name: grid[name][0] for name in CONDITION_PARAMS[behaviour]}
+    return dict(params, hold=grid[f"hold_{behaviour}"][0], release=grid["release"][0])
+
+
+def print_results(results, recorded_grid, live):
+    for behaviour in dict.fromkeys(b for b, _, _ in results):
+        rows = [(params, events) for b, params, events in results if b == behaviour]
+        names = list(rows[0][0])
+        baseline = _recorded_params(behaviour, recorded_grid)
+        live_events = live.get(behaviour)
+        print(f"\n📊 {behaviour} ({len(rows)} configurations"
+              + (f", {live_events} live events)" if live_events is not None else ")"))
+        print("    " + "".join(f"{name:>11}" for name in names) + f"{'events':>9}")
+        for params, events in rows:
+            mark = "*" if all(params[n] == baseline[n] for n in names) else " "
+            print(f"  {mark} " + "".join(f"{params[n]:>11g}" for n in names) + f"{events:>9}")
+    print("\n  * recorded settings")
+
+
+def write_csv(path, results):
+    names = list(dict.fromkeys(name for _, params, _ in results for name in params))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["behaviour", *names, "events"])
+        writer.writeheader()
+        for behaviour, params, events in results:
+            writer.writerow({"behaviour": behaviour, **params, "events": events})
+
+
+def _values(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay violation decisions over recorded model outputs for a grid of thresholds")
+    parser.add_argument("paths", nargs="+", help="Raw output directories (raw_outputs.py)")
+    for flag, help in (
+        ("--yaw", "Yaw ratio above which the candidate is looking away"),
+        ("--pitch-min", "Pitch position below which the candidate is looking away"),
+        ("--pitch-max", "Pitch position above which the candidate is looking away"),
+        ("--identity", "Embedding distance above which the face is a mismatch"),
+        ("--min-conf", "YOLO confidence floor (not below the recorded one)"),
+        ("--confirm", "Accumulated track score at which a phone/book is present"),
+        ("--hold-away", "Seconds before a looking-away event opens"),
+        ("--hold-identity", "Seconds before an identity event opens"),
+        ("--hold-objects", "Seconds before a phone or book event opens"),
+        ("--hold-multi", "Seconds before a multiple-faces event opens"),
+        ("--hold-obstructed", "Seconds before a camera-obstructed event opens"),
+        ("--release", "Gap in seconds that closes an event"),
+    ):
+        parser.add_argument(flag, type=_values, metavar="V[,V...]", help=help)
+    parser.add_argument("--cooldown", type=float, help="Seconds after a close before the next event "
+                        "(default: as recorded)")
+    parser.add_argument("--behaviours", default=",".join(BEHAVIOURS),
+                        help=f"Comma-separated subset of {','.join(BEHAVIOURS)}")
+    parser.add_argument("--csv", help="Also write every configuration's count to this file")
+    args = parser.parse_args(argv)
+
+    behaviours = [b for b in args.behaviours.split(",") if b]
+    unknown = set(behaviours) - set(BEHAVIOURS)
+    if unknown:
+        parser.error(f"unknown behaviours: {', '.join(sorted(unknown))}")
+
+    # Each run of a resumed session is replayed on its own clock
+    sessions = []
+    for path in args.paths:
+        try:
+            runs = recording_runs(path)
+            if not runs:
+                print(f"❌ {path}: no raw output recordings")
+            for run in runs:
+                sessions.append(session_signals(load_raw_outputs(run)))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ {path}: {e}")
+    if not sessions:
+        return 1
+
+    settings = sessions[0]["settings"]
+    baseline = default_grid(settings)
+    grid = dict(baseline)
+    for name in ("yaw", "pitch_min", "pitch_max", "identity", "min_conf", "confirm", "release",
+                 "hold_away", "hold_identity", "hold_multi", "hold_obstructed"):
+        if getattr(args, name) is not None:
+            grid[name] = getattr(args, name)
+    if args.hold_objects is not None:
+        grid["hold_phone"] = grid["hold_book"] = args.hold_objects
+    if min(grid["min_conf"]) < settings["yolo_conf"]:
+        print(f"⚠️ Detections below {settings['yolo_conf']} were not recorded; "
+              "lower --min-conf values behave like the floor")
+    cooldown = settings["cooldown"] if args.cooldown is None else args.cooldown
+
+    frames = sum(len(s["t"]) for s in sessions)
+    hours = sum(float(s["t"][-1] - s["t"][0]) for s in sessions if len(s["t"])) / 3600
+    print(f"🔁 Replaying {len(sessions)} recordings ({frames} frames, {hours:.2f} h)")
+    started = time.perf_counter()
+    results = sweep(sessions, grid, behaviours, cooldown)
+    elapsed = time.perf_counter() - started
+
+    live = {}
+    # Live counts are only comparable when the cooldown is the recorded one
+    if cooldown == settings["cooldown"] and all(s["counters"] for s in sessions):
+        live = {b: sum(s["counters"][EVENT_COUNTERS[b]] for s in sessions) for b in behaviours}
+    print_results(results, baseline, live)
+    print(f"⏱️ {len(results)} configurations in {elapsed:.2f}s")
+    if args.csv:
+        write_csv(args.csv, results)
+        print(f"📄 Wrote {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Roster import / results export
+Bulk-load students from CSV and stream sessions or violations out
+
+Usage:
+    python roster.py import students.csv [--chunk-size 500]
+    python roster.py export sessions results.csv
+    python roster.py export violations violations.jsonl
+"""
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+
+from auth import AuthManager
+
+ROSTER_COLUMNS = ("student_id", "full_name", "email", "password")
+
+
+def read_roster(path):
+    """
+    Iterator of (student_id, full_name, email, password) rows from a CSV roster.
+    The header is checked here, before any row is read: raises ValueError
+    if required columns are missing. A UTF-8 BOM (Excel exports) is skipped.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    missing = {"student_id", "full_name", "password"} - set(header)
+    if missing:
+        raise ValueError(f"Roster is missing columns: {', '.join(sorted(missing))}")
+    return _roster_rows(path)
+
+
+def _roster_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            yield tuple((row.get(col) or '').strip() for col in ROSTER_COLUMNS)
+
+
+def import_roster(auth, path, chunk_size=500):
+    """Import a CSV roster; returns (imported_count, conflicts)"""
+    return auth.bulk_register_users(read_roster(path), chunk_size=chunk_size)
+
+
+def export_rows(rows, out, fmt):
+    """Write an iterator of dicts to a file object as CSV or JSONL, one row at a time"""
+    count = 0
+    writer = None
+    for row in rows:
+        if fmt == "jsonl":
+            out.write(json.dumps(row) + "\n")
+        else:
+            if writer is None:
+                writer = csv.DictWriter(out, fieldnames=list(row.keys()))
+                writer.writeheader()
+            writer.writerow(row)
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roster import and results export")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="Import students from a CSV roster")
+    imp.add_argument("csv_path")
+    imp.add_argument("--chunk-size", type=int, default=500)
+
+    exp = sub.add_parser("export", help="Export sessions or violations")
+    exp.add_argument("what", choices=["sessions", "violations"])
+    exp.add_argument("out_path", help="Output file, or '-' for stdout")
+    exp.add_argument("--format", choices=["csv", "jsonl"],
+                     help="Defaults to the output file extension")
+    exp.add_argument("--batch-size", type=int, default=1000)
+
+    args = parser.parse_args(argv)
+    auth = AuthManager()
+
+    if args.command == "import":
+        try:
+            imported, conflicts = import_roster(auth, args.csv_path, args.chunk_size)
+        except (OSError, ValueError, csv.Error, sqlite3.Error) as e:
+            print(f"❌ Import failed: {e}")
+            return 1
+        for student_id, reason in conflicts:
+            print(f"⚠️ {student_id or '<blank>'}: {reason}")
+        print(f"✅ Imported {imported} students, {len(conflicts)} conflicts")
+        return 0 if imported or not conflicts else 1
+
+    fmt = args.format or ("jsonl" if args.out_path.endswith((".jsonl", ".json")) else "csv")
+    if args.what == "sessions":
+        rows = auth.iter_session_results(args.batch_size)
+    else:
+        rows = auth.iter_violation_records(args.batch_size)
+
+    if args.out_path == "-":
+        count = export_rows(rows, sys.stdout, fmt)
+    else:
+        with open(args.out_path, "w", newline='', encoding='utf-8') as out:
+            count = export_rows(rows, out, fmt)
+    print(f"✅ Exported {count} {args.what}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
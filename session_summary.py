@@ -0,0 +1,97 @@
+"""
+Running session summary
+Kept up to date on every answer, navigation and violation, so submitting
+an exam only reads it: answered/correct counts and the provisional score,
+violation counts by type, time spent per question, and the responses in
+bank coordinates ready for AuthManager.save_responses. Once the detector
+has stopped, the violation counts are reconciled with its own counters
+(set_violations), the same numbers the session record gets.
+"""
+
+import json
+import os
+import time
+
+UNANSWERED = -1
+
+
+class SessionSummary:
+    """
+    questions: the candidate's paper (dicts with 'answer' and optionally
+    'bank_index' / 'option_order' from paper.py)
+    """
+
+    def __init__(self, questions, clock=time.monotonic):
+        self.clock = clock
+        self.total = len(questions)
+        self.key = [q['answer'] for q in questions]
+        self.items = [q.get('bank_index', i) for i, q in enumerate(questions)]
+        self.option_orders = [q.get('option_order') for q in questions]
+        self.choices = [UNANSWERED] * self.total   # bank option index per question
+        self.selected = [UNANSWERED] * self.total  # displayed option index per question
+        self.answered = 0
+        self.correct = 0
+        self.violations = {}                        # violation type -> opened events
+        self.violation_total = 0
+        self.time_per_question = [0.0] * self.total
+        self.current = None
+        self.visited_at = None
+
+    @property
+    def score_pct(self):
+        return (self.correct / self.total) * 100 if self.total else 0.0
+
+    def answer(self, q, option):
+        """Record (or change) the displayed option chosen for question q"""
+        previous = self.selected[q]
+        if previous == option:
+            return
+        if previous == UNANSWERED:
+            self.answered += 1
+        elif previous == self.key[q]:
+            self.correct -= 1
+        if option == self.key[q]:
+            self.correct += 1
+        self.selected[q] = option
+        order = self.option_orders[q]
+        self.choices[q] = order[option] if order is not None else option
+
+    def visit(self, q):
+        """Question q is now on screen; time on the previous one is banked"""
+        now = self.clock()
+        if self.current is not None and self.current != q:
+            self.time_per_question[self.current] += now - self.visited_at
+        if self.current != q:
+            self.current = q
+            self.visited_at = now
+
+    def violation(self, violation_type):
+        self.violations[violation_type] = self.violations.get(violation_type, 0) + 1
+        self.violation_total += 1
+
+    def set_violations(self, counts):
+        """Replace the running counts with {violation type: opened events}"""
+        self.violations = {vtype: n for vtype, n in counts.items() if n}
+        self.violation_total = sum(self.violations.values())
+
+    def finish(self):
+        """Bank the time on the current question; call once at submission"""
+        if self.current is not None:
+            self.time_per_question[self.current] += self.clock() - self.visited_at
+            self.current = None
+
+    def snapshot(self):
+        return {
+            'answered': self.answered,
+            'correct': self.correct,
+            'total': self.total,
+            'score_pct': round(self.score_pct, 2),
+            'violations': dict(self.violations),
+            'violation_total': self.violation_total,
+            'time_per_question': [round(t, 1) for t in self.time_per_question],
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
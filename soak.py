@@ -0,0 +1,152 @@
+"""
+Long-session soak test
+Runs a full ExamWindow (offscreen) for a simulated multi-hour exam on a
+simulated clock: the real ProctorMonitor processes synthetic frames, the
+camera is covered periodically so obstruction events flow through the
+event bus into the database, audit, evidence and UI sinks, and answers
+are journaled. Process RSS is sampled along the way; the run fails if
+memory keeps growing after warm-up.
+
+Everything is written to a scratch directory (users.db, telemetry,
+journal, evidence), not to ./data.
+
+Usage:
+    python soak.py --hours 3 [--fps 1] [--event-every 60] [--max-growth-mb 40]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import psutil
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from frame_source import FrameSource, SyntheticSource
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScriptedSource(FrameSource):
+    """Gives VideoThread nothing to read; the soak loop feeds the window itself"""
+
+    stall_timeout = None
+
+    def read(self):
+        return None
+
+
+def rss_mb(process):
+    return process.memory_info().rss / 1e6
+
+
+def soak(hours=3.0, fps=1.0, event_every=60.0, cover_seconds=4.0, sample_minutes=10.0,
+         width=640, height=480, workdir=None):
+    """Returns [(simulated hours, RSS MB, feed rows, violation count)]"""
+    from detector import ProctorMonitor
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    clock = SimClock()
+    # Models load from the normal cache before switching to the scratch directory
+    monitor = ProctorMonitor(clock=clock)
+
+    workdir = workdir or tempfile.mkdtemp(prefix="proctor_soak_")
+    os.chdir(workdir)
+    print(f"🧪 Soak: {hours:g} h simulated at {fps:g} fps in {workdir}")
+
+    from auth import AuthManager
+    from exam_app import ExamWindow
+    auth = AuthManager()
+    auth.register_user("soak", "Soak Test", "", "soak")
+    user = auth.login_user("soak", "soak")[1]
+    window = ExamWindow(user, auth, frame_source=ScriptedSource(), detector=monitor)
+    # Keep the real-time exam timer from ending the run
+    window.deadline = time.monotonic() + hours * 3600 + 3600
+
+    source = SyntheticSource(width, height, fps=fps)
+    source.open()
+    covered = np.zeros((height, width, 3), dtype=np.uint8)
+    process = psutil.Process()
+
+    steps = int(hours * 3600 * fps)
+    sample_every = max(1, int(sample_minutes * 60 * fps))
+    answer_every = max(1, int(60 * fps))
+    samples = []
+    started = time.perf_counter()
+    for step in range(steps + 1):
+        clock.now = step / fps
+        in_cycle = clock.now % event_every
+        frame = covered if event_every - cover_seconds <= in_cycle else source.read()
+        annotated, info = monitor.process_frame(frame)
+        window.update_frame(annotated, info)
+
+        if step % answer_every == 0:
+            window.option_buttons[step % 4].click()
+            if window.current_q < len(window.questions) - 1:
+                window.next_question()
+            else:
+                window.current_q = 0
+                window.update_question_display()
+        app.processEvents()
+
+        if step % sample_every == 0:
+            sample = (clock.now / 3600, rss_mb(process), window.violation_feed_model.rowCount(),
+                      window.violation_count())
+            samples.append(sample)
+            print(f"  {sample[0]:5.2f} h  RSS {sample[1]:7.1f} MB  feed {sample[2]:4d}  "
+                  f"violations {sample[3]:5d}  ({time.perf_counter() - started:.0f}s real)")
+
+    window.finish_exam()
+    app.processEvents()   # starts the finalizer
+    window.finalizer.join()
+    return samples
+
+
+def growth(samples, warmup=0.2):
+    """(RSS growth in MB, slope in MB/hour) over the samples after the warm-up fraction"""
+    steady = samples[int(len(samples) * warmup):]
+    if len(steady) < 2:
+        return 0.0, 0.0
+    hours = np.array([s[0] for s in steady])
+    rss = np.array([s[1] for s in steady])
+    slope = float(np.polyfit(hours, rss, 1)[0]) if np.ptp(hours) > 0 else 0.0
+    return float(rss[-1] - rss[0]), slope
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated long-session memory soak test")
+    parser.add_argument("--hours", type=float, default=3.0, help="Simulated session length")
+    parser.add_argument("--fps", type=float, default=1.0, help="Simulated frames per second")
+    parser.add_argument("--event-every", type=float, default=60.0,
+                        help="Seconds between camera-covered episodes (one violation each)")
+    parser.add_argument("--sample-minutes", type=float, default=10.0, help="Simulated minutes between RSS samples")
+    parser.add_argument("--max-growth-mb", type=float, default=40.0,
+                        help="Allowed RSS growth after warm-up")
+    parser.add_argument("--workdir", help="Scratch directory (default: a new temp dir)")
+    args = parser.parse_args(argv)
+
+    samples = soak(args.hours, args.fps, args.event_every, sample_minutes=args.sample_minutes,
+                   workdir=args.workdir)
+    grown, slope = growth(samples)
+    print(f"📈 RSS after warm-up: {grown:+.1f} MB ({slope:+.1f} MB/h), "
+          f"{samples[-1][3]} violations, feed held {samples[-1][2]}")
+    if grown > args.max_growth_mb:
+        print(f"❌ RSS grew more than {args.max_growth_mb:g} MB")
+        return 1
+    print("✅ Memory flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Concurrent-writer stress harness for the SQLite storage layer
+Simulates many candidates against AuthManager and reports throughput,
+latency percentiles, lock retries and errors.
+
+Usage:
+    python stress_db.py --candidates 200 --mode process --rate 5 --duration 30
+    python stress_db.py --candidates 50 --mode thread --exams 1 --shard-by none
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from auth import AuthManager
+
+OPERATIONS = ("init", "login", "start_session", "log_violation", "end_session")
+
+
+def _shard_by(value):
+    return None if value == "none" else value
+
+
+def simulate_candidate(idx, db_path, shard_by, exams, rate, duration, busy_timeout, max_retries,
+                       quiet=True):
+    """
+    One candidate: connect, login, start a session, log violations at `rate` per
+    second for `duration` seconds, end the session.
+    Returns {"latencies": {op: [seconds]}, "errors": {op: n}, "lock_retries": n}.
+    """
+    latencies = {op: [] for op in OPERATIONS}
+    errors = {op: 0 for op in OPERATIONS}
+
+    def timed(op, fn, *args, ok=lambda r: r is not None and r is not False):
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception:
+            result = None
+        latencies[op].append(time.perf_counter() - t0)
+        if not ok(result):
+            errors[op] += 1
+        return result
+
+    # AuthManager reports every call on stdout; keep the harness output readable.
+    # redirect_stdout is process-wide, so thread mode silences once in main().
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        auth = timed("init", AuthManager, db_path, shard_by, busy_timeout, max_retries)
+        if auth is None:
+            return {"latencies": latencies, "errors": errors, "lock_retries": 0}
+        login = timed("login", auth.login_user, f"stress{idx:05d}", "stress",
+                      ok=lambda r: bool(r and r[0]))
+        if not (login and login[0]):
+            return {"latencies": latencies, "errors": errors, "lock_retries": auth.lock_retries}
+        user = login[1]
+
+        session_id = timed("start_session", auth.start_exam_session,
+                           user["user_id"], f"STRESS-{idx % exams}")
+        if session_id is not None:
+            interval = 1.0 / rate if rate > 0 else duration
+            deadline = time.monotonic() + duration
+            next_at = time.monotonic()
+            logged = 0
+            while time.monotonic() < deadline:
+                timed("log_violation", auth.log_violation,
+                      session_id, "looking_away", "Looking Away", 1.0)
+                logged += 1
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.monotonic()))
+            timed("end_session", auth.end_exam_session, session_id, logged, 0)
+
+    return {"latencies": latencies, "errors": errors, "lock_retries": auth.lock_retries}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def summarize(results, wall_time):
+    """Merge per-candidate results into a report dict"""
+    report = {"wall_time_s": wall_time, "candidates": len(results),
+              "lock_retries": sum(r["lock_retries"] for r in results), "operations": {}}
+    total_ops = 0
+    for op in OPERATIONS:
+        values = sorted(v for r in results for v in r["latencies"][op])
+        errors = sum(r["errors"][op] for r in results)
+        total_ops += len(values)
+        report["operations"][op] = {
+            "count": len(values),
+            "errors": errors,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": (values[-1] * 1000) if values else 0.0,
+        }
+    report["total_ops"] = total_ops
+    report["throughput_ops_s"] = total_ops / wall_time if wall_time > 0 else 0.0
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 {report['candidates']} candidates, {report['wall_time_s']:.1f}s wall, "
+          f"{report['throughput_ops_s']:.0f} ops/s, {report['lock_retries']} lock retries")
+    print(f"{'operation':<15}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for op, s in report["operations"].items():
+        print(f"{op:<15}{s['count']:>8}{s['errors']:>8}{s['p50_ms']:>10.2f}"
+              f"{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the AuthManager SQLite storage layer")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--mode", choices=["process", "thread"], default="process")
+    parser.add_argument("--rate", type=float, default=2.0, help="Violations per second per candidate")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of violation logging")
+    parser.add_argument("--exams", type=int, default=4, help="Distinct exam codes (shards)")
+    parser.add_argument("--shard-by", choices=["exam", "day", "none"], default="exam")
+    parser.add_argument("--busy-timeout", type=float, default=5.0)
+    parser.add_argument("--max-retries", type=int, default=5)
+    parser.add_argument("--db", help="Database path (default: fresh temporary directory)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="proctor_stress_"), "users.db")
+    shard_by = _shard_by(args.shard_by)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        auth = AuthManager(db_path, shard_by=shard_by)
+        auth.bulk_register_users(
+            (f"stress{i:05d}", f"Stress Candidate {i}", "", "stress")
+            for i in range(args.candidates)
+        )
+    print(f"🗄️ Database: {db_path}")
+
+    threaded = args.mode == "thread"
+    pool_cls = ThreadPoolExecutor if threaded else ProcessPoolExecutor
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if threaded else contextlib.nullcontext():
+        with pool_cls(max_workers=args.candidates) as pool:
+            futures = [
+                pool.submit(simulate_candidate, i, db_path, shard_by, max(1, args.exams),
+                            args.rate, args.duration, args.busy_timeout, args.max_retries,
+                            not threaded)
+                for i in range(args.candidates)
+            ]
+            results = [f.result() for f in futures]
+    wall = time.perf_counter() - t0
+
+    report = summarize(results, wall)
+    report["config"] = vars(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if all(s["errors"] == 0 for s in report["operations"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
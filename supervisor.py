@@ -0,0 +1,548 @@
+"""
+Live supervisor console
+Each ExamWindow publishes compact event/status messages and low-rate JPEG
+thumbnails to a local asyncio service; the console shows every station in
+one grid. A station's connection only ever holds one pending thumbnail,
+and thumbnails are skipped while the socket is backed up, so events are
+never queued behind images.
+
+Wire format: 1-byte kind + 4-byte big-endian length + payload
+    H  hello      JSON {station, name, student_id, session_id, exam_code}
+    E  event      JSON event_bus.ViolationEvent.to_dict()
+    S  status     JSON {time_left, answered, total, violations, state}
+    T  thumbnail  JPEG bytes
+
+Usage:
+    python supervisor.py [--host 127.0.0.1] [--port 8765] [--columns 10]
+    python supervisor.py simulate --stations 120 [--port 8765]
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+
+import cv2
+
+from event_bus import SEVERE_KEYS, OPENED
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+KIND_HELLO = b"H"
+KIND_EVENT = b"E"
+KIND_STATUS = b"S"
+KIND_THUMB = b"T"
+HEADER = struct.Struct(">cI")
+MAX_MESSAGE = 1 << 20
+
+THUMB_SIZE = (160, 120)
+THUMB_QUALITY = 60
+THUMB_INTERVAL = 1.0            # seconds between thumbnails per station
+THUMB_BUFFER_LIMIT = 16 * 1024  # unsent bytes above which thumbnails are skipped
+SEND_BUFFER = 32 * 1024         # kernel send buffer; a large one would queue events behind images
+STATUS_INTERVAL = 1.0
+STALE_AFTER = 5.0               # seconds without a message before a station shows offline
+RECENT_EVENTS = 5
+
+
+def encode_message(kind, payload):
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+async def read_message(reader):
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_MESSAGE:
+        raise ValueError(f"Message of {length} bytes exceeds limit")
+    payload = await reader.readexactly(length)
+    if kind == KIND_THUMB:
+        return kind, payload
+    return kind, json.loads(payload)
+
+
+def encode_thumbnail(frame, size=THUMB_SIZE, quality=THUMB_QUALITY):
+    """BGR frame -> small JPEG bytes, or None"""
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes() if ok else None
+
+
+# ==========================================
+# Station side
+# ==========================================
+
+class StationPublisher:
+    """
+    Publishes one station to the supervisor from a background asyncio loop.
+    publish_event/publish_status/offer_thumbnail are safe to call from the
+    GUI thread and never block; if the supervisor is unreachable the
+    publisher keeps retrying and queued events are sent on reconnect.
+    """
+
+    def __init__(self, address, hello, max_events=1000, thumb_interval=THUMB_INTERVAL):
+        self.host, self.port = parse_address(address)
+        self.hello = hello
+        self.thumb_interval = thumb_interval
+        self.events = collections.deque(maxlen=max_events)
+        self.status = None
+        self.frame = None           # latest offered frame; encoded only when sent
+        self.dropped_thumbnails = 0
+        self.sent_thumbnails = 0
+        self._loop = None
+        self._wake = None
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run_loop, name="StationPublisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Flush queued events (up to `timeout`) and disconnect"""
+        self._stopping = True
+        self._notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def publish_event(self, event):
+        self.events.append(encode_message(KIND_EVENT, event))
+        self._notify()
+
+    def publish_status(self, status):
+        self.status = status
+        self._notify()
+
+    def offer_thumbnail(self, frame):
+        # Only keeps a reference; the frame is resized and encoded on the
+        # publisher thread when a thumbnail is actually due
+        self.frame = frame
+
+    def _notify(self):
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def _run_loop(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        retry = 0.5
+        warned = False
+        while not self._stopping:
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                if not warned:
+                    print(f"⚠️ Supervisor {self.host}:{self.port} unreachable ({e}); retrying")
+                    warned = True
+                await asyncio.sleep(retry)
+                retry = min(retry * 2, 5.0)
+                continue
+            print(f"📡 Publishing to supervisor {self.host}:{self.port}")
+            warned = False
+            retry = 0.5
+            try:
+                await self._pump(writer)
+            except (ConnectionError, OSError) as e:
+                print(f"⚠️ Supervisor connection lost: {e}")
+            finally:
+                writer.close()
+
+    async def _sleep(self, seconds):
+        try:
+            await asyncio.wait_for(self._wake.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _pump(self, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        writer.write(encode_message(KIND_HELLO, self.hello))
+        await writer.drain()
+        next_thumb = 0.0
+        next_status = 0.0
+        while True:
+            self._wake.clear()
+
+            # Events first, and they wait for the socket rather than being dropped
+            while self.events:
+                writer.write(self.events[0])
+                self.events.popleft()
+                await writer.drain()
+
+            now = time.monotonic()
+            if self.status is not None and (now >= next_status or self._stopping):
+                writer.write(encode_message(KIND_STATUS, self.status))
+                next_status = now + STATUS_INTERVAL
+
+            if self.frame is not None and now >= next_thumb:
+                next_thumb = now + self.thumb_interval
+                if writer.transport.get_write_buffer_size() > THUMB_BUFFER_LIMIT:
+                    self.dropped_thumbnails += 1
+                else:
+                    data = encode_thumbnail(self.frame)
+                    if data:
+                        writer.write(encode_message(KIND_THUMB, data))
+                        self.sent_thumbnails += 1
+
+            if self._stopping:
+                await writer.drain()
+                return
+            wait = min(next_thumb, next_status) - time.monotonic()
+            await self._sleep(max(wait, 0.05))
+
+
+def parse_address(address):
+    """'host:port' or 'port' -> (host, port)"""
+    if isinstance(address, tuple):
+        return address
+    host, _, port = str(address).rpartition(":")
+    port = int(port or DEFAULT_PORT)
+    if not 0 <= port <= 65535:
+        raise ValueError(f"Port {port} out of range")
+    return host or DEFAULT_HOST, port
+
+
+# ==========================================
+# Supervisor service
+# ==========================================
+
+class StationState:
+    __slots__ = ("station", "name", "student_id", "session_id", "exam_code", "connected",
+                 "last_seen", "status", "events", "violations", "severe", "thumbnail",
+                 "thumb_version")
+
+    def __init__(self, station):
+        self.station = station
+        self.name = station
+        self.student_id = ""
+        self.session_id = None
+        self.exam_code = ""
+        self.connected = True
+        self.last_seen = time.monotonic()
+        self.status = {}
+        self.events = collections.deque(maxlen=RECENT_EVENTS)
+        self.violations = 0
+        self.severe = False
+        self.thumbnail = None
+        self.thumb_version = 0
+
+    def online(self, now):
+        return self.connected and now - self.last_seen < STALE_AFTER
+
+
+class SupervisorServer:
+    """
+    Asyncio TCP service collecting station messages. State is shared with
+    the console through changed(), which returns only stations updated since
+    the previous call, so a refresh costs nothing for idle stations.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.stations = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_station, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"📡 Supervisor listening on {self.host}:{self.port}")
+        self._ready.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def start_in_thread(self):
+        """Run the service on a daemon thread; returns once it is listening"""
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.serve()),
+                                        name="SupervisorServer", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    def changed(self):
+        """Stations updated since the last call"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return [self.stations[s] for s in dirty if s in self.stations]
+
+    async def _handle_station(self, reader, writer):
+        state = None
+        peer = writer.get_extra_info("peername")
+        try:
+            kind, hello = await read_message(reader)
+            if kind != KIND_HELLO:
+                return
+            station = str(hello.get("station") or f"{peer[0]}:{peer[1]}")
+            with self._lock:
+                state = self.stations.get(station) or StationState(station)
+                state.name = hello.get("name") or station
+                state.student_id = hello.get("student_id", "")
+                state.session_id = hello.get("session_id")
+                state.exam_code = hello.get("exam_code", "")
+                state.connected = True
+                state.last_seen = time.monotonic()
+                self.stations[station] = state
+                self._dirty.add(station)
+
+            while True:
+                kind, payload = await read_message(reader)
+                with self._lock:
+                    state.last_seen = time.monotonic()
+                    if kind == KIND_EVENT:
+                        state.events.appendleft(payload)
+                        if payload.get("kind") == OPENED:
+                            state.violations += 1
+                            state.severe = state.severe or payload.get("key") in SEVERE_KEYS
+                    elif kind == KIND_STATUS:
+                        state.status = payload
+                    elif kind == KIND_THUMB:
+                        state.thumbnail = payload
+                        state.thumb_version += 1
+                    self._dirty.add(station)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if state is not None:
+                with self._lock:
+                    state.connected = False
+                    self._dirty.add(state.station)
+            writer.close()
+
+
+# ==========================================
+# Console
+# ==========================================
+
+def _build_console():
+    from PyQt5.QtCore import Qt, QTimer
+    from PyQt5.QtGui import QImage, QPixmap
+    from PyQt5.QtWidgets import (QFrame, QGridLayout, QLabel, QMainWindow, QScrollArea,
+                                 QVBoxLayout, QWidget)
+
+    class StationTile(QFrame):
+        """Thumbnail, candidate and latest event of one station"""
+
+        def __init__(self, state):
+            super().__init__()
+            self.thumb_version = -1
+            self.setFixedSize(THUMB_SIZE[0] + 12, THUMB_SIZE[1] + 58)
+            layout = QVBoxLayout(self)
+            layout.setContentsMargins(4, 4, 4, 4)
+            layout.setSpacing(2)
+            self.image = QLabel()
+            self.image.setFixedSize(*THUMB_SIZE)
+            self.image.setAlignment(Qt.AlignCenter)
+            self.image.setStyleSheet("background: #111; color: #777;")
+            self.image.setText("no video")
+            self.title = QLabel()
+            self.title.setStyleSheet("color: white; font-weight: bold; font-size: 11px;")
+            self.detail = QLabel()
+            self.detail.setStyleSheet("color: #BBB; font-size: 10px;")
+            layout.addWidget(self.image)
+            layout.addWidget(self.title)
+            layout.addWidget(self.detail)
+            self.border = None
+
+        def refresh(self, state, now):
+            online = state.online(now)
+            if state.thumb_version != self.thumb_version and state.thumbnail:
+                # Decoded only when a new thumbnail arrived
+                image = QImage.fromData(state.thumbnail, "JPG")
+                self.image.setPixmap(QPixmap.fromImage(image))
+                self.thumb_version = state.thumb_version
+
+            self.title.setText(state.name)
+            status = state.status
+            parts = []
+            if status.get("time_left") is not None:
+                parts.append(f"{status['time_left'] // 60:02d}:{status['time_left'] % 60:02d}")
+            if status.get("total"):
+                parts.append(f"{status.get('answered', 0)}/{status['total']}")
+            parts.append(f"⚠️ {state.violations}")
+            if state.events:
+                parts.append(state.events[0].get("message", ""))
+            self.detail.setText(" · ".join(parts))
+
+            if not online:
+                border = "#616161"
+            elif status.get("state") == "submitted":
+                border = "#1976D2"
+            elif state.severe:
+                border = "#FF5252"
+            elif state.violations:
+                border = "#FFC107"
+            else:
+                border = "#4CAF50"
+            if border != self.border:
+                self.setStyleSheet(f"StationTile {{ background: #263238; border: 2px solid {border}; }}")
+                self.border = border
+
+    class SupervisorWindow(QMainWindow):
+        """Grid of all stations, refreshed from the service's change set"""
+
+        def __init__(self, server, columns=10, refresh_ms=500):
+            super().__init__()
+            self.server = server
+            self.columns = columns
+            self.tiles = {}
+            self.setWindowTitle(f"Exam Supervisor - {server.host}:{server.port}")
+            self.resize(1400, 900)
+
+            central = QWidget()
+            layout = QVBoxLayout(central)
+            self.summary = QLabel("Waiting for stations...")
+            self.summary.setStyleSheet("font-size: 14px; font-weight: bold; padding: 6px;")
+            layout.addWidget(self.summary)
+
+            grid_host = QWidget()
+            grid_host.setStyleSheet("background: #37474F;")
+            self.grid = QGridLayout(grid_host)
+            self.grid.setSpacing(6)
+            self.grid.setAlignment(Qt.AlignTop | Qt.AlignLeft)
+            scroll = QScrollArea()
+            scroll.setWidgetResizable(True)
+            scroll.setWidget(grid_host)
+            layout.addWidget(scroll)
+            self.setCentralWidget(central)
+
+            self.timer = QTimer(self)
+            self.timer.timeout.connect(self.refresh)
+            self.timer.start(refresh_ms)
+            self.last_sweep = 0.0
+
+        def refresh(self):
+            now = time.monotonic()
+            changed = self.server.changed()
+            # Stations that went quiet don't send anything; re-check them every few seconds
+            if now - self.last_sweep > 1.0:
+                self.last_sweep = now
+                changed = {s.station: s for s in changed}
+                for station, tile in self.tiles.items():
+                    state = self.server.stations[station]
+                    if not state.online(now) and tile.border != "#616161":
+                        changed[station] = state
+                changed = list(changed.values())
+
+            for state in changed:
+                tile = self.tiles.get(state.station)
+                if tile is None:
+                    tile = StationTile(state)
+                    index = len(self.tiles)
+                    self.grid.addWidget(tile, index // self.columns, index % self.columns)
+                    self.tiles[state.station] = tile
+                tile.refresh(state, now)
+
+            if changed:
+                states = list(self.server.stations.values())
+                online = sum(s.online(now) for s in states)
+                alerting = sum(1 for s in states if s.violations and s.online(now))
+                self.summary.setText(f"🖥️ Stations: {online} online / {len(states)} · "
+                                     f"⚠️ {alerting} with violations")
+
+    return SupervisorWindow
+
+
+def run_console(host=DEFAULT_HOST, port=DEFAULT_PORT, columns=10, qt_argv=None):
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication(qt_argv if qt_argv is not None else sys.argv[:1])
+    server = SupervisorServer(host, port).start_in_thread()
+    window = _build_console()(server, columns)
+    window.show()
+    code = app.exec_()
+    server.stop()
+    return code
+
+
+# ==========================================
+# Load simulator
+# ==========================================
+
+def simulate(address, stations=120, seconds=None, fps=10):
+    """Fake stations (synthetic frames, random events) for sizing the console"""
+    from event_bus import ViolationEvent
+    from frame_source import SyntheticSource
+
+    source = SyntheticSource(320, 240, fps, cycle=30)
+    source.open()
+    host = socket.gethostname()
+    publishers = []
+    for i in range(stations):
+        hello = {"station": f"sim-{i:03d}", "name": f"Candidate {i:03d}",
+                 "student_id": f"sim{i:03d}", "session_id": i, "exam_code": "SIM-1"}
+        publishers.append(StationPublisher(address, hello).start())
+    print(f"🧪 Simulating {stations} stations from {host} against {address}")
+
+    rng = random.Random(0)
+    started = time.monotonic()
+    violations = [0] * stations
+    try:
+        while seconds is None or time.monotonic() - started < seconds:
+            elapsed = int(time.monotonic() - started)
+            for i, pub in enumerate(publishers):
+                frame = source.read()
+                cv2.putText(frame, str(i), (10, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2)
+                pub.offer_thumbnail(frame)
+                if rng.random() < 0.002:
+                    key = rng.choice(["away", "phone", "multi", "obstructed"])
+                    violations[i] += 1
+                    pub.publish_event(ViolationEvent(OPENED, key, 0.0, 0.0).to_dict())
+                pub.publish_status({"time_left": max(0, 1800 - elapsed), "answered": elapsed // 60,
+                                    "total": 20, "violations": violations[i], "state": "running"})
+            time.sleep(1.0 / fps)
+    except KeyboardInterrupt:
+        pass
+    for pub in publishers:
+        pub.stop(0.5)
+    dropped = sum(p.dropped_thumbnails for p in publishers)
+    sent = sum(p.sent_thumbnails for p in publishers)
+    print(f"✅ Sent {sent} thumbnails, dropped {dropped} under backpressure")
+    return sent, dropped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live supervisor console for exam stations")
+    parser.add_argument("command", nargs="?", default="console", choices=["console", "simulate"])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--columns", type=int, default=10, help="Grid columns in the console")
+    parser.add_argument("--stations", type=int, default=120, help="Simulated stations")
+    parser.add_argument("--seconds", type=float, help="Stop the simulation after this long")
+    args, qt_args = parser.parse_known_args(argv)
+
+    if args.command == "simulate":
+        simulate((args.host, args.port), args.stations, args.seconds)
+        return 0
+    return run_console(args.host, args.port, args.columns, sys.argv[:1] + qt_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
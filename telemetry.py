@@ -0,0 +1,163 @@
+"""
+Per-frame telemetry recorder
+Keeps the signals behind every ProctorMonitor decision in preallocated
+numpy columns and appends them to one raw file per column, so a whole
+session's timeline can be memory-mapped back without any video.
+
+A directory holds one recording: rows and the monotonic 't' clock of a
+second ProctorMonitor can't be appended to the first. A session that is
+resumed after a crash records each attempt into its own run_<n>
+subdirectory (new_run_dir); recording_runs lists them in order.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+# Bits of the 'flags' column
+FLAG_AWAY = 1
+FLAG_PHONE = 2
+FLAG_BOOK = 4
+FLAG_IDENTITY = 8
+FLAG_MULTI = 16
+FLAG_OBSTRUCTED = 32
+
+# Column name -> dtype (fixed width, little-endian on disk)
+COLUMNS = {
+    "t": "<f8",            # detector clock (seconds)
+    "face_count": "u1",
+    "yaw_ratio": "<f4",    # NaN when no face
+    "pitch_pos": "<f4",    # NaN when no face
+    "embed_dist": "<f4",   # NaN when identity wasn't checked
+    "phone_conf": "<f4",   # best accumulated phone track score, 0 if none
+    "book_conf": "<f4",    # best accumulated book track score, 0 if none
+    "yolo_ran": "u1",      # 1 on frames where YOLO actually ran
+    "flags": "u1",         # FLAG_* bitmask of per-frame conditions
+}
+
+FORMAT_VERSION = 1
+RUN_PREFIX = "run_"
+
+
+def _run_numbers(path):
+    """{run number: directory name} of the run_<n> subdirectories of path"""
+    runs = {}
+    for name in os.listdir(path):
+        suffix = name[len(RUN_PREFIX):]
+        if name.startswith(RUN_PREFIX) and suffix.isdigit():
+            runs[int(suffix)] = name
+    return runs
+
+
+def new_run_dir(path):
+    """path/run_<n> for the next recording of a session (n counts up from 1)"""
+    os.makedirs(path, exist_ok=True)
+    n = max(_run_numbers(path), default=0) + 1
+    return os.path.join(path, f"{RUN_PREFIX}{n:03d}")
+
+
+def recording_runs(path):
+    """Recording directories at path: path itself if it is one, else its runs in order"""
+    if os.path.exists(os.path.join(path, "meta.json")):
+        return [path]
+    runs = _run_numbers(path)
+    return [os.path.join(path, runs[n]) for n in sorted(runs)
+            if os.path.exists(os.path.join(path, runs[n], "meta.json"))]
+
+
+class TelemetryRecorder:
+    """
+    Append-only columnar recorder for one session.
+    Rows are buffered in preallocated arrays and written out every
+    'chunk_rows' frames, so record() never allocates or touches disk.
+    Raises FileExistsError if path already holds a recording.
+    """
+
+    def __init__(self, path, chunk_rows=4096, columns=COLUMNS):
+        if os.path.exists(os.path.join(path, "meta.json")):
+            raise FileExistsError(f"{path} already holds a telemetry recording")
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.columns = dict(columns)
+        self.rows = 0
+        self._n = 0
+        self._buffers = {name: np.zeros(chunk_rows, dtype=dt) for name, dt in self.columns.items()}
+        # Bind the buffers in column order once; record() fills them positionally
+        self._ordered = [self._buffers[name] for name in self.columns]
+
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "ab")
+                       for name in self.columns}
+        self._write_meta()
+
+    def _write_meta(self, closed=False):
+        meta = {
+            "version": FORMAT_VERSION,
+            "columns": self.columns,
+            "rows": self.rows,
+            "closed": closed,
+            # Pair of clock readings to map the 't' column to wall time
+            "wall_time": time.time(),
+            "monotonic_time": time.monotonic(),
+        }
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def record(self, *values):
+        """Append one frame; values in COLUMNS order"""
+        n = self._n
+        for buf, value in zip(self._ordered, values):
+            buf[n] = value
+        self._n = n + 1
+        self.rows += 1
+        if self._n == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        if self._n == 0:
+            return
+        for name, buf in self._buffers.items():
+            self._files[name].write(buf[:self._n].tobytes())
+            self._files[name].flush()
+        self._n = 0
+
+    def close(self):
+        if self._files is None:
+            return
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = None
+        self._write_meta(closed=True)
+
+
+def load_telemetry(path):
+    """
+    Memory-map a recorded session: returns {column: read-only array}.
+    Row count comes from the file sizes, so sessions that ended in a crash
+    load up to their last flush; a crash in the middle of a flush leaves
+    some columns longer, and all are cut to the shortest.
+    """
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {name: np.dtype(dt) for name, dt in meta["columns"].items()}
+    rows = min((os.path.getsize(os.path.join(path, f"{name}.bin")) // dtype.itemsize
+                for name, dtype in columns.items()), default=0)
+    data = {}
+    for name, dtype in columns.items():
+        file_path = os.path.join(path, f"{name}.bin")
+        if rows == 0:
+            data[name] = np.zeros(0, dtype=dtype)
+        else:
+            data[name] = np.memmap(file_path, dtype=dtype, mode="r", shape=(rows,))
+    return data
+
+
+def archive_telemetry(path, out_path=None):
+    """Pack a recorded session into one compressed .npz for long-term storage"""
+    data = load_telemetry(path)
+    out_path = out_path or os.path.join(path, "telemetry.npz")
+    np.savez_compressed(out_path, **{name: np.asarray(col) for name, col in data.items()})
+    return out_path
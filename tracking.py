@@ -0,0 +1,142 @@
+"""
+Object tracking between YOLO runs
+YOLO only runs every `yolo_interval` seconds. The tracker matches each
+run's detections to existing tracks by IoU, accumulates their confidence
+over consecutive detections, tolerates single missed detections, and
+extrapolates boxes in between runs, so phone/book presence comes from
+track state rather than from the last YOLO result alone.
+"""
+
+import itertools
+
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of (n, 4) and (m, 4) xyxy boxes -> (n, m)"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    a = a[:, None, :]
+    b = b[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class Track:
+    """One tracked object; `score` is the accumulated confidence"""
+
+    __slots__ = ("id", "name", "box", "velocity", "score", "hits", "misses", "updated_at")
+
+    def __init__(self, track_id, name, box, conf, now):
+        self.id = track_id
+        self.name = name
+        self.box = np.asarray(box, dtype=np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)   # box units per second
+        self.score = conf
+        self.hits = 1
+        self.misses = 0
+        self.updated_at = now
+
+    def predicted_box(self, now, max_predict):
+        dt = min(max(now - self.updated_at, 0.0), max_predict)
+        return self.box + self.velocity * dt
+
+
+class ObjectTracker:
+    """
+    iou_threshold: minimum IoU to match a detection to a track of the same class
+    confirm_score: accumulated confidence at which a track counts as present
+    miss_decay: score multiplier for each YOLO run that misses the track
+    max_misses: consecutive misses before a track is dropped
+    max_predict: seconds a box is extrapolated past its last detection
+    smoothing: weight of the new detection when updating a matched box
+    """
+
+    def __init__(self, iou_threshold=0.3, confirm_score=0.4, miss_decay=0.5, max_misses=2,
+                 max_predict=1.0, smoothing=0.7):
+        self.iou_threshold = iou_threshold
+        self.confirm_score = confirm_score
+        self.miss_decay = miss_decay
+        self.max_misses = max_misses
+        self.max_predict = max_predict
+        self.smoothing = smoothing
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def settings(self):
+        """Constructor arguments, e.g. to rebuild an identical tracker for replay"""
+        return {"iou_threshold": self.iou_threshold, "confirm_score": self.confirm_score,
+                "miss_decay": self.miss_decay, "max_misses": self.max_misses,
+                "max_predict": self.max_predict, "smoothing": self.smoothing}
+
+    def reset(self):
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def update(self, detections, now):
+        """Fold one YOLO run into the tracks; detections is [(name, conf, (x1, y1, x2, y2))]"""
+        matched_tracks = set()
+        matched_dets = set()
+
+        for name in {d[0] for d in detections} | {t.name for t in self.tracks}:
+            t_idx = [i for i, t in enumerate(self.tracks) if t.name == name]
+            d_idx = [j for j, d in enumerate(detections) if d[0] == name]
+            if not t_idx or not d_idx:
+                continue
+            predicted = np.array([self.tracks[i].predicted_box(now, self.max_predict) for i in t_idx])
+            boxes = np.array([detections[j][2] for j in d_idx], dtype=np.float32)
+            ious = iou_matrix(predicted, boxes)
+            # Greedy assignment, best overlap first
+            for flat in np.argsort(-ious, axis=None):
+                ti, di = np.unravel_index(flat, ious.shape)
+                if ious[ti, di] < self.iou_threshold:
+                    break
+                i, j = t_idx[ti], d_idx[di]
+                if i in matched_tracks or j in matched_dets:
+                    continue
+                matched_tracks.add(i)
+                matched_dets.add(j)
+                self._hit(self.tracks[i], detections[j], now)
+
+        kept = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+                track.score *= self.miss_decay
+                if track.misses > self.max_misses:
+                    continue
+            kept.append(track)
+        for j, (name, conf, box) in enumerate(detections):
+            if j not in matched_dets:
+                kept.append(Track(next(self._ids), name, box, conf, now))
+        self.tracks = kept
+
+    def _hit(self, track, detection, now):
+        _, conf, box = detection
+        box = np.asarray(box, dtype=np.float32)
+        predicted = track.predicted_box(now, self.max_predict)
+        dt = now - track.updated_at
+        if dt > 0:
+            # Damped so one jittery detection doesn't fling the prediction
+            track.velocity = 0.5 * track.velocity + 0.5 * (box - track.box) / dt
+        track.box = self.smoothing * box + (1 - self.smoothing) * predicted
+        # Independent-evidence accumulation: two 0.3 detections -> 0.51
+        track.score = 1 - (1 - track.score) * (1 - conf)
+        track.hits += 1
+        track.misses = 0
+        track.updated_at = now
+
+    def active(self, now):
+        """[(track, predicted box)] of confirmed tracks at time `now`"""
+        return [(t, t.predicted_box(now, self.max_predict))
+                for t in self.tracks if t.score >= self.confirm_score]
+
+    def presence(self, name):
+        """(present, best accumulated score) for a class"""
+        scores = [t.score for t in self.tracks if t.name == name]
+        best = max(scores, default=0.0)
+        return best >= self.confirm_score, best
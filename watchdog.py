@@ -0,0 +1,109 @@
+"""
+GUI event-loop watchdog
+A probe timer fires every `interval_ms`; how late it fires is the event
+loop latency. Slots wrapped with instrument() are timed, so a late probe
+can be blamed on the slowest slot that ran since the previous probe.
+"""
+
+import json
+import os
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class EventLoopWatchdog(QObject):
+    """Continuously measures event-loop latency and records stalls"""
+
+    def __init__(self, interval_ms=50, stall_ms=100, max_samples=4096, max_stalls=500, parent=None):
+        super().__init__(parent)
+        self.interval = interval_ms / 1000.0
+        self.stall_threshold = stall_ms / 1000.0
+        self.latencies = deque(maxlen=max_samples)   # recent probe lateness (seconds)
+        self.stalls = deque(maxlen=max_stalls)
+        self.stall_count = 0
+        self.max_latency = 0.0
+        self.slot_stats = {}                          # name -> [calls, total_s, max_s]
+        self._slowest_slot = (None, 0.0)              # since the previous probe
+        self._expected = None
+        self._started = None
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._probe)
+
+    def start(self):
+        self._started = time.monotonic()
+        self._expected = self._started + self.interval
+        self._timer.start(int(self.interval * 1000))
+
+    def stop(self):
+        self._timer.stop()
+
+    def instrument(self, name, slot):
+        """Wrap a slot so its run time is recorded and stalls can be attributed to it"""
+        def wrapper(*args):
+            t0 = time.monotonic()
+            try:
+                return slot(*args)
+            finally:
+                elapsed = time.monotonic() - t0
+                stats = self.slot_stats.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+                if elapsed > self._slowest_slot[1]:
+                    self._slowest_slot = (name, elapsed)
+        return wrapper
+
+    def _probe(self):
+        now = time.monotonic()
+        lateness = max(0.0, now - self._expected)
+        self._expected = now + self.interval
+        self.latencies.append(lateness)
+        self.max_latency = max(self.max_latency, lateness)
+
+        if lateness >= self.stall_threshold:
+            slot, slot_time = self._slowest_slot
+            self.stall_count += 1
+            self.stalls.append({
+                "at_s": round(now - self._started, 3),
+                "latency_ms": round(lateness * 1000, 1),
+                "slot": slot or "unknown",
+                "slot_ms": round(slot_time * 1000, 1),
+            })
+        self._slowest_slot = (None, 0.0)
+
+    def report(self):
+        """Latency percentiles, recent stalls and per-slot timings"""
+        values = sorted(self.latencies)
+        return {
+            "latency_ms": {
+                "p50": _percentile(values, 50) * 1000,
+                "p95": _percentile(values, 95) * 1000,
+                "p99": _percentile(values, 99) * 1000,
+                "max": self.max_latency * 1000,
+            },
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "stall_count": self.stall_count,
+            "stalls": list(self.stalls),
+            "slots": {
+                name: {"calls": calls, "total_ms": total * 1000,
+                       "mean_ms": total * 1000 / calls if calls else 0.0, "max_ms": worst * 1000}
+                for name, (calls, total, worst) in self.slot_stats.items()
+            },
+        }
+
+    def dump(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path